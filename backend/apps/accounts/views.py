@@ -2,15 +2,10 @@ from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from .serializers import UserSerializer
-from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
+from django.contrib.auth import authenticate, get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.pagination import LimitOffsetPagination
 
-
-class StandardResultsSetPagination(LimitOffsetPagination):
-    default_limit = 10
-    max_limit = 100
+User = get_user_model()
 
 
 @api_view(["POST"])
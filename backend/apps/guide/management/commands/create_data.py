@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from apps.places import importer
 from apps.places.models import Place, Category
 
 User = get_user_model()
@@ -1178,7 +1179,7 @@ class Command(BaseCommand):
                 "image": "places/nature/urunqach.jpg",
                 "rating": 4.8,
                 "price_range": "$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Zaamin National Park",
@@ -1190,7 +1191,7 @@ class Command(BaseCommand):
                 "image": "places/nature/zaamin.jpg",
                 "rating": 4.6,
                 "price_range": "$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Ustyurt Plateau",
@@ -1202,7 +1203,7 @@ class Command(BaseCommand):
                 "image": "places/nature/ustyurt.jpg",
                 "rating": 4.7,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Kitab Geological Reserve",
@@ -1214,7 +1215,7 @@ class Command(BaseCommand):
                 "image": "places/nature/kitab.jpg",
                 "rating": 4.4,
                 "price_range": "$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Paltau Waterfall",
@@ -1226,7 +1227,7 @@ class Command(BaseCommand):
                 "image": "places/nature/paltau.jpg",
                 "rating": 4.5,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
         ]
 
@@ -1243,7 +1244,7 @@ class Command(BaseCommand):
                 "image": "places/history/moynaq.jpg",
                 "rating": 4.8,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Sarmysh-Say Gorge",
@@ -1255,7 +1256,7 @@ class Command(BaseCommand):
                 "image": "places/history/sarmysh.jpg",
                 "rating": 4.6,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Langar Canyon and Langar-ota Mausoleum",
@@ -1267,7 +1268,7 @@ class Command(BaseCommand):
                 "image": "places/history/langar.jpg",
                 "rating": 4.5,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Mizdakhan Necropolis",
@@ -1279,7 +1280,7 @@ class Command(BaseCommand):
                 "image": "places/history/mizdakhan.jpg",
                 "rating": 4.7,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Chilpik Kala",
@@ -1291,7 +1292,7 @@ class Command(BaseCommand):
                 "image": "places/history/chilpik.jpg",
                 "rating": 4.3,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Toprak-Kala",
@@ -1303,7 +1304,7 @@ class Command(BaseCommand):
                 "image": "places/history/toprak.jpg",
                 "rating": 4.4,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Palace of the Emir of Bukhara in Kagan",
@@ -1315,7 +1316,7 @@ class Command(BaseCommand):
                 "image": "places/history/emir-palace.jpg",
                 "rating": 4.6,
                 "price_range": "$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Obi-Rakhmat Grotto",
@@ -1327,7 +1328,7 @@ class Command(BaseCommand):
                 "image": "places/history/obi-rakhmat.jpg",
                 "rating": 4.2,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
         ]
         self._create_places(hidden_gemms_history, "history")
@@ -1343,7 +1344,7 @@ class Command(BaseCommand):
                 "image": "places/culture/dovud-cave.jpg",
                 "rating": 4.5,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Kokand City",
@@ -1355,7 +1356,7 @@ class Command(BaseCommand):
                 "image": "places/culture/kokand.jpg",
                 "rating": 4.6,
                 "price_range": "$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Rishtan Ceramics Center",
@@ -1367,7 +1368,7 @@ class Command(BaseCommand):
                 "image": "places/culture/rishtan.jpg",
                 "rating": 4.8,
                 "price_range": "$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Margilan Yodgorlik Silk Factory",
@@ -1379,7 +1380,7 @@ class Command(BaseCommand):
                 "image": "places/culture/margilan.jpg",
                 "rating": 4.7,
                 "price_range": "$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Urgut Bazaar",
@@ -1391,7 +1392,7 @@ class Command(BaseCommand):
                 "image": "places/culture/urgut.jpg",
                 "rating": 4.4,
                 "price_range": "$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
         ]
 
@@ -1408,7 +1409,7 @@ class Command(BaseCommand):
                 "image": "places/travel/nuratau.jpg",
                 "rating": 4.9,
                 "price_range": "$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
             {
                 "name": "Yurt Camps at Aydarkul Lake",
@@ -1420,32 +1421,25 @@ class Command(BaseCommand):
                 "image": "places/travel/aydarkul.jpg",
                 "rating": 4.7,
                 "price_range": "$$$",
-                "is_hidden_gems": true,
+                "is_hidden_gems": True,
             },
         ]
 
         self._create_places(hidden_gemms_travel, "teavel")
 
     def _create_places(self, places_list, category_name):
-        """Helper function for creating places"""
-        created_count = 0
-        for p in places_list:
-            place, created = Place.objects.get_or_create(
-                slug=p["slug"],
-                defaults={
-                    "name": p["name"],
-                    "category": p["category"],
-                    "latitude": p["latitude"],
-                    "longitude": p["longitude"],
-                    "image": p["image"],
-                    "rating": p["rating"],
-                    "price_range": p["price_range"],
-                },
-            )
-            if created:
-                created_count += 1
-                self.stdout.write(self.style.SUCCESS(f"   ✅ Created: {place.name}"))
+        """Helper function for creating places (bulk upsert by slug)"""
+        rows = (
+            (line, {**p, "category": None, "category_id": p["category"].pk})
+            for line, p in enumerate(places_list, 1)
+        )
+        stats = importer.PlaceImporter().run(rows)
+        for line, message in stats.errors:
+            self.stdout.write(self.style.WARNING(f"   ⚠️ {places_list[line - 1]['name']}: {message}"))
 
         self.stdout.write(
-            self.style.SUCCESS(f"   📊 Created {created_count} {category_name} places")
+            self.style.SUCCESS(
+                f"   📊 Created {stats.created} {category_name} places, "
+                f"updated {stats.updated}"
+            )
         )
@@ -0,0 +1,504 @@
+import multiprocessing
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+
+from apps.guide.models import ChatSession, Message
+from apps.places import importer, versioning
+from apps.places.geo import grid_cell
+from apps.places.models import Category, Favorite, LeaderboardEntry, Place
+from apps.sync import changelog
+from apps.tours.models import FavoriteTour, Tour
+
+User = get_user_model()
+
+# Детерминированный синтетический набор данных для нагрузочного
+# тестирования. Каждая пачка строк генерируется в отдельном процессе со
+# своим seed (seed:вид:начало пачки), поэтому результат не зависит от
+# числа процессов. На SQLite пишет только основной процесс (одна запись за
+# раз), на остальных БД пачки записывают сами процессы.
+
+PREFIX = "lt"  # префикс slug/username сгенерированных объектов
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SPAN_SECONDS = 730 * 24 * 3600
+PASSWORD = "wayzen-load"
+
+# (город, широта, долгота, вес, разброс в градусах)
+CITIES = (
+    ("Tashkent", 41.3111, 69.2797, 30, 0.12),
+    ("Samarkand", 39.6542, 66.9597, 14, 0.08),
+    ("Bukhara", 39.7747, 64.4286, 10, 0.07),
+    ("Khiva", 41.3783, 60.3639, 6, 0.04),
+    ("Fergana", 40.3842, 71.7843, 6, 0.08),
+    ("Namangan", 40.9983, 71.6726, 5, 0.07),
+    ("Andijan", 40.7821, 72.3442, 5, 0.07),
+    ("Nukus", 42.4531, 59.6103, 3, 0.06),
+    ("Termez", 37.2242, 67.2783, 3, 0.06),
+    ("Karshi", 38.8606, 65.7891, 3, 0.06),
+    ("Navoi", 40.1039, 65.3688, 2, 0.05),
+    ("Jizzakh", 40.1158, 67.8422, 2, 0.05),
+    ("Urgench", 41.5500, 60.6333, 2, 0.05),
+    ("Shahrisabz", 39.0578, 66.8342, 2, 0.04),
+    ("Kokand", 40.5286, 70.9425, 2, 0.05),
+    ("Chimgan", 41.5333, 70.0167, 2, 0.10),
+)
+CITY_WEIGHTS = [city[3] for city in CITIES]
+
+ADJECTIVES = (
+    "Old", "Grand", "Silk Road", "Golden", "Blue", "Royal", "Hidden", "Green",
+    "Ancient", "Little", "Sunny", "Emerald", "Caravan", "Mountain", "River",
+)
+NOUNS = {
+    "sport": ("Arena", "Stadium", "Climbing Wall", "Pool", "Fitness Club", "Ski Slope"),
+    "culture": ("Museum", "Theater", "Gallery", "Craft Center", "Concert Hall"),
+    "history": ("Madrasa", "Mausoleum", "Minaret", "Fortress", "Mosque", "Caravanserai"),
+    "nature": ("Park", "Lake", "Gorge", "Waterfall", "Botanical Garden", "Canyon"),
+    "travel": ("Viewpoint", "Trail", "Camp", "Yurt Stay", "Guest House"),
+    "entertainments": ("Cinema", "Bowling Club", "Aquapark", "Escape Room", "Karaoke"),
+    "meal": ("Teahouse", "Plov Center", "Bakery", "Restaurant", "Bazaar Kitchen"),
+}
+DEFAULT_NOUNS = ("Place", "Spot", "Corner", "Square", "House")
+STREETS = (
+    "Amir Temur", "Navoi", "Mustaqillik", "Bobur", "Registan", "Shota Rustaveli",
+    "Afrosiyob", "Buyuk Ipak Yoli", "Chilonzor", "Mirzo Ulugbek", "Uzbekistan Ovozi",
+)
+PRICE_RANGES = ("", "$", "$$", "$$$", "$$$$")
+PRICE_WEIGHTS = (10, 35, 35, 15, 5)
+FIRST_NAMES = (
+    "Aziz", "Dilnoza", "Timur", "Malika", "Bekzod", "Nilufar", "Jasur", "Madina",
+    "Sardor", "Kamola", "Anna", "John", "Maria", "Elena", "Daniel", "Sofia",
+)
+LAST_NAMES = (
+    "Karimov", "Rashidova", "Ibatov", "Yusupova", "Tursunov", "Aliyeva",
+    "Smith", "Ivanova", "Miller", "Garcia", "Nazarov", "Saidova",
+)
+PROMPTS = (
+    "What should I see in {city} in two days?",
+    "Best plov in {city}?",
+    "Is it safe to travel to {city} in winter?",
+    "How do I get from Tashkent to {city}?",
+    "Tell me about the history of {city}",
+    "Family friendly places in {city}",
+    "Where to buy souvenirs in {city}?",
+)
+ANSWERS = (
+    "Here is a short plan for your trip to {city}: start with the old town in the "
+    "morning, have lunch at a local teahouse and spend the evening at the bazaar.",
+    "{city} is famous for its architecture and hospitality. I recommend booking a "
+    "guide for the historical part and trying the local bread.",
+    "The easiest option is the high-speed train; tickets sell out quickly in spring "
+    "and autumn, so buy them a few days in advance.",
+)
+
+# Заполняются в основном процессе перед созданием пула и наследуются
+# дочерними процессами при fork
+_STATE = {}
+
+
+def _rnd(seed, kind, start):
+    return random.Random(f"{seed}:{kind}:{start}")
+
+
+def _moment(rnd, after=None):
+    if after is None:
+        return START + timedelta(seconds=rnd.randrange(SPAN_SECONDS))
+    return after + timedelta(seconds=rnd.randrange(60, 3 * 24 * 3600))
+
+
+def _skewed(rnd, items):
+    """Элемент с перекосом к началу списка (популярные чаще)"""
+    return items[int(len(items) * rnd.random() ** 3)]
+
+
+def _sample_count(rnd, mean, limit):
+    if mean <= 0:
+        return 0
+    return min(limit, int(rnd.expovariate(1 / mean)))
+
+
+# --- Генераторы пачек -----------------------------------------------------
+
+
+def _users(seed, start, count):
+    rnd = _rnd(seed, "users", start)
+    rows = []
+    for i in range(start, start + count):
+        first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+        rows.append(
+            {
+                "username": f"{PREFIX}_{i:07d}",
+                "email": f"{first.lower()}.{last.lower()}.{i}@loadtest.wayzen.uz",
+                "first_name": first,
+                "last_name": last,
+                "password": _STATE["password"],
+                "date_joined": _moment(rnd),
+            }
+        )
+    return rows
+
+
+def _places(seed, start, count):
+    rnd = _rnd(seed, "places", start)
+    categories = _STATE["categories"]
+    rows = []
+    for i in range(start, start + count):
+        city, lat0, lon0, _, spread = rnd.choices(CITIES, CITY_WEIGHTS)[0]
+        # Большая часть мест в городе, часть — в пригородах и за городом
+        if rnd.random() < 0.15:
+            spread *= 4
+        lat = round(min(45.5, max(37.2, rnd.gauss(lat0, spread))), 6)
+        lon = round(min(73.1, max(56.0, rnd.gauss(lon0, spread * 1.3))), 6)
+        category_id, slug = rnd.choice(categories)
+        name = f"{rnd.choice(ADJECTIVES)} {rnd.choice(NOUNS.get(slug, DEFAULT_NOUNS))}"
+        rating = None
+        if rnd.random() > 0.05:
+            rating = round(min(5.0, max(1.0, rnd.gauss(4.2, 0.5))), 1)
+        created = _moment(rnd)
+        rows.append(
+            {
+                "name": f"{name} {city}",
+                "slug": f"{PREFIX}-{i:07d}-{slugify(name)}",
+                "description": f"{name} in {city}. {rnd.choice(ANSWERS).format(city=city)}",
+                "category_id": category_id,
+                "address": f"{rnd.randint(1, 150)} {rnd.choice(STREETS)} street, {city}",
+                "latitude": lat,
+                "longitude": lon,
+                "grid_cell": grid_cell(lat, lon),
+                "rating": rating,
+                "price_range": rnd.choices(PRICE_RANGES, PRICE_WEIGHTS)[0],
+                "is_hidden_gems": rnd.random() < 0.05,
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+    return rows
+
+
+def _tours(seed, start, count):
+    rnd = _rnd(seed, "tours", start)
+    # id мест, упорядоченные по ячейке сетки: соседи в списке — соседи на карте
+    place_ids = _STATE["places_by_cell"]
+    rows = []
+    for i in range(start, start + count):
+        # Чаще всего 4–8 мест, от 2 до 15
+        size = min(len(place_ids), max(2, round(rnd.triangular(2, 15, 5))))
+        anchor = rnd.randrange(max(1, len(place_ids) - size * 8))
+        window = place_ids[anchor : anchor + size * 8]
+        places = rnd.sample(window, min(size, len(window)))
+        created = _moment(rnd)
+        rows.append(
+            (
+                {
+                    "name": f"{rnd.choice(ADJECTIVES)} Route #{i}",
+                    "slug": f"{PREFIX}-tour-{i:07d}",
+                    "description": f"A {len(places)}-stop tour.",
+                    "price": round(rnd.uniform(10, 300), 2),
+                    "duration": timedelta(hours=rnd.choice((2, 3, 4, 6, 8, 24, 48))),
+                    "created_at": created,
+                    "updated_at": created,
+                },
+                places,
+            )
+        )
+    return rows
+
+
+def _favorites(seed, start, count):
+    rnd = _rnd(seed, "favorites", start)
+    user_ids, places, tours = (
+        _STATE["user_ids"], _STATE["places_by_popularity"], _STATE["tour_ids"],
+    )
+    favorites, favorite_tours = [], []
+    for user_id in user_ids[start : start + count]:
+        number = _sample_count(rnd, _STATE["favorites"], len(places))
+        for place_id in {_skewed(rnd, places) for _ in range(number)}:
+            favorites.append(
+                {"user_id": user_id, "place_id": place_id, "created_at": _moment(rnd)}
+            )
+        if tours:
+            number = _sample_count(rnd, _STATE["favorites"] / 5, len(tours))
+            for tour_id in {_skewed(rnd, tours) for _ in range(number)}:
+                favorite_tours.append(
+                    {"user_id": user_id, "tour_id": tour_id, "created_at": _moment(rnd)}
+                )
+    return favorites, favorite_tours
+
+
+def _chats(seed, start, count):
+    rnd = _rnd(seed, "chats", start)
+    sessions = []
+    for user_id in _STATE["user_ids"][start : start + count]:
+        for _ in range(_sample_count(rnd, _STATE["chats"], 50)):
+            city = rnd.choices(CITIES, CITY_WEIGHTS)[0][0]
+            created = moment = _moment(rnd)
+            messages = []
+            for turn in range(max(1, _sample_count(rnd, _STATE["messages"] / 2, 100))):
+                prompt = rnd.choice(PROMPTS).format(city=city)
+                messages.append({"role": "user", "content": prompt, "created_at": moment})
+                moment += timedelta(seconds=rnd.randint(2, 20))
+                answer = rnd.choice(ANSWERS).format(city=city)
+                messages.append({"role": "model", "content": answer, "created_at": moment})
+                moment = _moment(rnd, after=moment) if rnd.random() < 0.2 else (
+                    moment + timedelta(seconds=rnd.randint(20, 600))
+                )
+            session = {
+                "user_id": user_id,
+                "title": messages[0]["content"][:30],
+                "created_at": created,
+                "updated_at": messages[-1]["created_at"],
+            }
+            sessions.append((session, messages))
+    return sessions
+
+
+# --- Запись пачек ---------------------------------------------------------
+
+
+def _write_rows(model, rows):
+    return model.objects.bulk_create([model(**row) for row in rows])
+
+
+def _write_tours(rows):
+    tours = _write_rows(Tour, [fields for fields, _ in rows])
+    Tour.places.through.objects.bulk_create(
+        Tour.places.through(tour_id=tour.pk, place_id=place_id)
+        for tour, (_, places) in zip(tours, rows)
+        for place_id in places
+    )
+
+
+def _write_favorites(rows):
+    favorites, favorite_tours = rows
+    _write_rows(Favorite, favorites)
+    _write_rows(FavoriteTour, favorite_tours)
+
+
+def _write_chats(rows):
+    sessions = _write_rows(ChatSession, [session for session, _ in rows])
+    Message.objects.bulk_create(
+        Message(chat_id=session.pk, **message)
+        for session, (_, messages) in zip(sessions, rows)
+        for message in messages
+    )
+
+
+KINDS = {
+    "users": (_users, lambda rows: _write_rows(User, rows)),
+    "places": (_places, lambda rows: _write_rows(Place, rows)),
+    "tours": (_tours, _write_tours),
+    "favorites": (_favorites, _write_favorites),
+    "chats": (_chats, _write_chats),
+}
+
+
+def _write(kind, rows):
+    with transaction.atomic():
+        KINDS[kind][1](rows)
+
+
+def _run_chunk(task):
+    """Генерирует пачку; при параллельной записи сразу пишет её в БД"""
+    kind, seed, start, count, write = task
+    rows = KINDS[kind][0](seed, start, count)
+    if not write:
+        return rows
+    _write(kind, rows)
+    return None
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """Отключает auto_now/auto_now_add, чтобы записать сгенерированное время"""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset (users, places, tours, "
+        "favorites, chats) for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--places", type=int, default=100000)
+        parser.add_argument("--tours", type=int, default=5000)
+        parser.add_argument(
+            "--favorites", type=float, default=5, help="Average favorites per user"
+        )
+        parser.add_argument("--chats", type=float, default=2, help="Average chats per user")
+        parser.add_argument(
+            "--messages", type=float, default=8, help="Average messages per chat"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete previously generated data first"
+        )
+
+    def handle(self, *args, **options):
+        categories = list(Category.objects.order_by("id").values_list("id", "slug"))
+        if not categories:
+            raise CommandError("No categories found, run create_data first")
+        if options["clear"]:
+            self._clear()
+        elif User.objects.filter(username__startswith=f"{PREFIX}_").exists() or (
+            Place.objects.filter(slug__startswith=f"{PREFIX}-").exists()
+        ):
+            raise CommandError("Generated data already exists, pass --clear to replace it")
+
+        seed = options["seed"]
+        _STATE.update(
+            categories=categories,
+            # Один хэш на всех: PBKDF2 на каждого пользователя занял бы минуты
+            password=make_password(PASSWORD, salt=f"{PREFIX}{seed}"),
+            favorites=options["favorites"],
+            chats=options["chats"],
+            messages=options["messages"],
+        )
+        self.workers = max(1, options["workers"])
+        self.chunk_size = max(1, options["chunk_size"])
+        self.seed = seed
+        total_start = time.perf_counter()
+
+        with _explicit_timestamps(Place, Tour, Favorite, FavoriteTour, ChatSession, Message):
+            self._phase("users", options["users"])
+            user_ids = list(
+                User.objects.filter(username__startswith=f"{PREFIX}_")
+                .order_by("username")
+                .values_list("id", flat=True)
+            )
+            self._phase("places", options["places"])
+            places = Place.objects.filter(slug__startswith=f"{PREFIX}-")
+            _STATE["places_by_cell"] = list(
+                places.order_by("grid_cell", "id").values_list("id", flat=True)
+            )
+            if _STATE["places_by_cell"]:
+                self._phase("tours", options["tours"])
+            tours = Tour.objects.filter(slug__startswith=f"{PREFIX}-")
+            by_popularity = sorted(_STATE["places_by_cell"])
+            random.Random(seed).shuffle(by_popularity)
+            _STATE.update(
+                user_ids=user_ids,
+                places_by_popularity=by_popularity,
+                tour_ids=list(tours.order_by("id").values_list("id", flat=True)),
+            )
+            if by_popularity:
+                self._phase("favorites", len(user_ids))
+            self._phase("chats", len(user_ids))
+
+        self._finish(categories, places, tours)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Dataset generated in {time.perf_counter() - total_start:.1f}s "
+                f"(seed {seed})"
+            )
+        )
+
+    def _phase(self, kind, total):
+        if total <= 0:
+            return
+        start = time.perf_counter()
+        # На SQLite писать может только один процесс
+        parallel_writes = self.workers > 1 and connection.vendor != "sqlite"
+        tasks = [
+            (kind, self.seed, offset, min(self.chunk_size, total - offset), parallel_writes)
+            for offset in range(0, total, self.chunk_size)
+        ]
+        if self.workers == 1:
+            results = map(_run_chunk, tasks)
+            self._consume(kind, results)
+        else:
+            # Дочерние процессы не должны делить соединения с родителем
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(self.workers) as pool:
+                self._consume(kind, pool.imap(_run_chunk, tasks))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"   {kind:<10} {total:>10,} in {elapsed:6.1f}s")
+
+    def _consume(self, kind, results):
+        for rows in results:
+            if rows is not None:
+                _write(kind, rows)
+
+    def _clear(self):
+        """
+        Удаляет ранее сгенерированные данные. Обычный delete() вызывает
+        сигналы для каждого места, поэтому строки удаляются напрямую, а
+        производные данные перестраиваются в _finish.
+        """
+        start = time.perf_counter()
+        users = User.objects.filter(username__startswith=f"{PREFIX}_")
+        places = Place.objects.filter(slug__startswith=f"{PREFIX}-")
+        tours = Tour.objects.filter(slug__startswith=f"{PREFIX}-")
+        place_ids = list(places.values_list("id", flat=True))
+        tour_ids = list(tours.values_list("id", flat=True))
+        with transaction.atomic():
+            for qs in (
+                Message.objects.filter(chat__user__in=users),
+                ChatSession.objects.filter(user__in=users),
+                Favorite.objects.filter(Q(user__in=users) | Q(place__in=places)),
+                FavoriteTour.objects.filter(Q(user__in=users) | Q(tour__in=tours)),
+                Tour.places.through.objects.filter(Q(tour__in=tours) | Q(place__in=places)),
+                LeaderboardEntry.objects.filter(place__in=places),
+                tours,
+                places,
+            ):
+                qs._raw_delete(qs.db)
+            users.delete()
+            changelog.record(Place, place_ids, deleted=True)
+            changelog.record(Tour, tour_ids, deleted=True)
+        self.stdout.write(f"   cleared previous data in {time.perf_counter() - start:.1f}s")
+
+    def _finish(self, categories, places, tours):
+        """Счётчики и производные данные, которые обычно ведут сигналы"""
+        start = time.perf_counter()
+        favorites = (
+            Favorite.objects.filter(place=OuterRef("pk"))
+            .order_by()
+            .values("place")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        places.update(favorite_count=Coalesce(Subquery(favorites), 0))
+        favorite_tours = (
+            FavoriteTour.objects.filter(tour=OuterRef("pk"))
+            .order_by()
+            .values("tour")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        tours.update(favorite_count=Coalesce(Subquery(favorite_tours), 0))
+
+        importer.rebuild_derived([pk for pk, _ in categories])
+        # Клиенты дельта-синхронизации должны получить новые объекты
+        for model, qs in ((Place, places), (Tour, tours)):
+            ids = list(qs.order_by("id").values_list("id", flat=True))
+            for offset in range(0, len(ids), self.chunk_size):
+                changelog.record(model, ids[offset : offset + self.chunk_size])
+        for name in ("tours", "favorites"):
+            versioning.bump(name)
+        self.stdout.write(f"   {'derived':<10} {'':>10} in {time.perf_counter() - start:6.1f}s")
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_updated_at(apps, schema_editor):
+    ChatSession = apps.get_model("guide", "ChatSession")
+    Message = apps.get_model("guide", "Message")
+    # Время последнего сообщения, для пустых чатов — время создания
+    last = (
+        Message.objects.filter(chat=OuterRef("pk"))
+        .order_by("-created_at")
+        .values("created_at")[:1]
+    )
+    ChatSession.objects.update(updated_at=Coalesce(Subquery(last), F("created_at")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['-updated_at', '-id'], name='chat_updated_id_idx'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
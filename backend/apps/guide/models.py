@@ -8,6 +8,13 @@ class ChatSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     title = models.CharField(max_length=255, default="Новый чат")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Список чатов пользователя по последней активности
+            models.Index(fields=["user", "-updated_at", "-id"], name="chat_user_updated_idx"),
+        ]
 
     def __str__(self):
         return f"Chat {self.id} ({self.title})"
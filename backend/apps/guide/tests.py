@@ -0,0 +1,157 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.places.models import Category, Favorite, LeaderboardEntry, Place
+from apps.sync.models import ChangeLogEntry
+from apps.tours.models import Tour
+
+from .models import ChatSession, Message
+
+
+class ChatListTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="traveller", email="traveller@example.com", password="x"
+        )
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="x"
+        )
+        for i in range(15):
+            chat = ChatSession.objects.create(user=self.user, title=f"Chat {i}")
+            Message.objects.create(chat=chat, role="user", content="Hi")
+            Message.objects.create(chat=chat, role="model", content="Hello")
+        self.foreign = ChatSession.objects.create(user=other, title="Not yours")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(SQL_INSTRUMENTATION={"SAMPLE_RATE": 1.0})
+    def test_message_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/guide/chats/")
+        chats = response.json()["chats"]
+        self.assertEqual(len(chats), 15)
+        self.assertTrue(all(chat["message_count"] == 2 for chat in chats))
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+    def test_chats_require_authentication(self):
+        client = APIClient()
+        chat = ChatSession.objects.filter(user=self.user).first()
+        self.assertEqual(client.get("/api/guide/chats/").status_code, 401)
+        self.assertEqual(client.get(f"/api/guide/history/{chat.pk}/").status_code, 401)
+        self.assertEqual(client.post(f"/api/guide/chats/{chat.pk}/delete/").status_code, 401)
+        response = client.post("/api/guide/ask/", {"prompt": "Hi"}, format="json")
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(ChatSession.objects.filter(pk=chat.pk).exists())
+
+    def test_foreign_chat_is_not_found(self):
+        url = f"/api/guide/history/{self.foreign.pk}/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        url = f"/api/guide/chats/{self.foreign.pk}/delete/"
+        self.assertEqual(self.client.post(url).status_code, 404)
+        self.assertTrue(ChatSession.objects.filter(pk=self.foreign.pk).exists())
+
+    def test_delete_own_chat(self):
+        chat = ChatSession.objects.filter(user=self.user).first()
+        response = self.client.post(f"/api/guide/chats/{chat.pk}/delete/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ChatSession.objects.filter(pk=chat.pk).exists())
+
+
+class GenerateDataTests(TestCase):
+    options = {"users": 6, "places": 40, "tours": 4, "chunk_size": 7, "workers": 1}
+
+    def setUp(self):
+        for slug in ("history", "nature", "meal"):
+            Category.objects.create(name=slug.title(), slug=slug)
+        self.own = Place.objects.create(name="Ark Fortress", slug="ark-fortress")
+
+    def generate(self, **options):
+        call_command("generate_data", **self.options, stdout=io.StringIO(), **options)
+
+    def snapshot(self):
+        """Сгенерированные данные без id, которые зависят от порядка вставки"""
+        places = Place.objects.filter(slug__startswith="lt-").order_by("slug")
+        return {
+            "users": list(
+                get_user_model()
+                .objects.filter(username__startswith="lt_")
+                .order_by("username")
+                .values_list("username", "email", "date_joined")
+            ),
+            "places": list(
+                places.values_list(
+                    "slug",
+                    "name",
+                    "latitude",
+                    "longitude",
+                    "rating",
+                    "category__slug",
+                    "created_at",
+                    "favorite_count",
+                )
+            ),
+            "tours": [
+                (tour.slug, tour.price, sorted(place.slug for place in tour.places.all()))
+                for tour in Tour.objects.filter(slug__startswith="lt-")
+                .order_by("slug")
+                .prefetch_related("places")
+            ],
+            "favorites": sorted(
+                Favorite.objects.filter(place__in=places).values_list(
+                    "user__username", "place__slug"
+                )
+            ),
+            "chats": sorted(
+                ChatSession.objects.filter(user__username__startswith="lt_").values_list(
+                    "user__username", "title", "updated_at"
+                )
+            ),
+            "messages": Message.objects.filter(chat__user__username__startswith="lt_").count(),
+        }
+
+    def test_same_seed_gives_same_data(self):
+        self.generate(seed=7)
+        first = self.snapshot()
+        self.assertEqual(len(first["places"]), 40)
+        self.assertEqual(len(first["tours"]), 4)
+        self.assertTrue(first["messages"])
+
+        self.generate(seed=7, clear=True)
+        self.assertEqual(self.snapshot(), first)
+        self.generate(seed=8, clear=True)
+        self.assertNotEqual(self.snapshot()["places"], first["places"])
+
+    def test_existing_data_requires_clear(self):
+        self.generate(seed=7)
+        with self.assertRaises(CommandError):
+            self.generate(seed=7)
+
+    def test_clear_replaces_generated_data_only(self):
+        self.generate(seed=7)
+        old_ids = set(Place.objects.filter(slug__startswith="lt-").values_list("id", flat=True))
+        user = get_user_model().objects.filter(username__startswith="lt_").first()
+        Favorite.objects.create(user=user, place=self.own)
+
+        self.generate(seed=7, clear=True)
+        places = Place.objects.filter(slug__startswith="lt-")
+        self.assertEqual(places.count(), 40)
+        self.assertTrue(Place.objects.filter(pk=self.own.pk).exists())
+        # Избранное удалённого пользователя ушло вместе с ним
+        self.assertFalse(Favorite.objects.filter(place=self.own).exists())
+        # _raw_delete обходит сигналы — журнал и производные данные ведёт команда
+        deleted = set(
+            ChangeLogEntry.objects.filter(kind="place", deleted=True).values_list(
+                "object_id", flat=True
+            )
+        )
+        self.assertEqual(deleted, old_ids)
+        self.assertFalse(LeaderboardEntry.objects.filter(place_id__in=old_ids).exists())
+        self.assertTrue(LeaderboardEntry.objects.filter(place__in=places).exists())
+        for place in places:
+            self.assertEqual(place.favorite_count, place.favorites.count())
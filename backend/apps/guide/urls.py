@@ -5,6 +5,7 @@ urlpatterns = [
     path("ask/", views.ask, name="ask"),
     path("chats/", views.get_user_chats, name="get_user_chats"),
     path("history/<int:chat_id>/", views.get_chat_history, name="get_chat_history"),
-
+    path("chats/<int:chat_id>/delete/", views.delete_chat, name="delete_chat"),
+    path("health/", views.health_check, name="health_check"),
 ]
 
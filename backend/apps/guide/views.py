@@ -1,9 +1,11 @@
-from django.http import StreamingHttpResponse, JsonResponse
+from django.http import Http404, StreamingHttpResponse, JsonResponse
 from django.conf import settings
-from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_GET, require_POST
+from django.views.decorators.http import require_GET
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.db.models import Count
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
 import google.generativeai as genai
 import json
 import logging
@@ -52,16 +54,19 @@ def _prepare_chat_history(chat_history: list, is_first_message: bool = False) ->
     
     return full_history
 
+# Чаты доступны только владельцу. Вход — по JWT, как во всём API, поэтому
+# представления обёрнуты в api_view (CSRF не нужен: cookie не используются).
+
 # --- Основной эндпоинт для общения ---
-@csrf_exempt
-@require_POST
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
 def ask(request):
     if not model:
         logger.error("Попытка использования неинициализированной модели Gemini")
         return JsonResponse({"error": "Gemini API не настроен."}, status=500)
 
     try:
-        data = json.loads(request.body.decode("utf-8"))
+        data = request.data
         user_prompt = data.get("prompt", "").strip()
         chat_id = data.get("chat_id")
         chat_history = data.get("history", [])
@@ -79,16 +84,13 @@ def ask(request):
     # Создание или получение чата
     try:
         if chat_id:
-            chat = get_object_or_404(ChatSession, id=chat_id)
+            chat = get_object_or_404(ChatSession, id=chat_id, user=request.user)
             # Обновляем время последней активности
             chat.updated_at = timezone.now()
             chat.save()
         else:
             chat_title = _generate_chat_title(user_prompt)
-            chat = ChatSession.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                title=chat_title
-            )
+            chat = ChatSession.objects.create(user=request.user, title=chat_title)
             logger.info(f"Создан новый чат: {chat.id}")
 
         # Сохраняем сообщение пользователя
@@ -98,6 +100,8 @@ def ask(request):
             content=user_prompt
         )
 
+    except Http404:
+        raise
     except Exception as e:
         logger.error(f"Ошибка работы с базой данных: {e}")
         return JsonResponse({"error": "Ошибка базы данных"}, status=500)
@@ -149,10 +153,11 @@ def ask(request):
     )
 
 # --- История чата ---
-@require_GET
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
 def get_chat_history(request, chat_id):
+    chat = get_object_or_404(ChatSession, id=chat_id, user=request.user)
     try:
-        chat = get_object_or_404(ChatSession, id=chat_id)
         chat_messages = chat.messages.order_by("created_at")
         
         history = [
@@ -177,12 +182,16 @@ def get_chat_history(request, chat_id):
         return JsonResponse({"error": "Ошибка сервера"}, status=500)
 
 # --- Список чатов ---
-@require_GET
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
 def get_user_chats(request):
     try:
-        # Для анонимных пользователей возвращаем все чаты
-        # В реальном приложении нужно добавить фильтрацию по пользователю
-        chats = ChatSession.objects.all().order_by("-updated_at")
+        # Число сообщений считается в том же запросе, а не count() на каждый чат
+        chats = (
+            ChatSession.objects.filter(user=request.user)
+            .annotate(message_count=Count("messages"))
+            .order_by("-updated_at", "-id")
+        )
         
         result = [
             {
@@ -190,7 +199,7 @@ def get_user_chats(request):
                 "title": chat.title,
                 "created_at": chat.created_at.isoformat(),
                 "updated_at": chat.updated_at.isoformat(),
-                "message_count": chat.messages.count()
+                "message_count": chat.message_count
             }
             for chat in chats
         ]
@@ -202,11 +211,11 @@ def get_user_chats(request):
         return JsonResponse({"error": "Ошибка сервера"}, status=500)
 
 # --- Удаление чата ---
-@csrf_exempt
-@require_POST
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
 def delete_chat(request, chat_id):
+    chat = get_object_or_404(ChatSession, id=chat_id, user=request.user)
     try:
-        chat = get_object_or_404(ChatSession, id=chat_id)
         chat_title = chat.title
         chat.delete()
         
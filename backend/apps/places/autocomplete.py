@@ -0,0 +1,218 @@
+import bisect
+import heapq
+import threading
+import unicodedata
+
+from . import versioning
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Сколько префиксов помнить: для каждого хранятся MAX_LIMIT лучших мест
+MAX_CACHED_PREFIXES = 10000
+
+
+def normalize(text):
+    """Нижний регистр, без диакритики и лишних пробелов"""
+    text = unicodedata.normalize("NFKD", text or "").casefold()
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split())
+
+
+def _keys(name):
+    """Ключи для названия: с начала каждого слова до конца строки"""
+    words = normalize(name).split(" ")
+    return {" ".join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+class AutocompleteIndex:
+    """
+    Отсортированный массив (ключ, place_id) по названиям мест плюс названия
+    категорий. Поиск префикса — два bisect по массиву; лучшие MAX_LIMIT мест
+    префикса запоминаются, так что следующие запросы не просматривают весь
+    диапазон совпадений. Сигналы моделей обновляют индекс и запомненные
+    префиксы точечно; изменения из других процессов замечаются по счётчикам
+    версий и ведут к полной перестройке.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._versions = None
+        self._entries = []  # [(key, place_id)], отсортирован
+        self._places = {}  # id -> (rating, slug, name, category_id, keys)
+        self._categories = {}  # id -> (key, icon)
+        self._category_top = {}  # category_id -> [place_id] по рейтингу
+        self._prefix_top = {}  # префикс -> [place_id] по рейтингу
+
+    def _current_versions(self):
+        state = versioning.get_state(["places", "categories"])
+        return state["places"][0], state["categories"][0]
+
+    def _rebuild(self, versions):
+        from .models import Category, Place
+
+        self._categories = {
+            pk: (normalize(name), icon)
+            for pk, name, icon in Category.objects.values_list("id", "name", "icon")
+        }
+        self._places = {}
+        entries = []
+        rows = Place.objects.order_by().values_list(
+            "id", "rating", "slug", "name", "category_id"
+        )
+        for pk, rating, slug, name, category_id in rows.iterator(chunk_size=5000):
+            keys = _keys(name)
+            self._places[pk] = (float(rating or 0), slug, name, category_id, keys)
+            entries.extend((key, pk) for key in keys)
+        entries.sort()
+        self._entries = entries
+        self._category_top = {}
+        self._prefix_top = {}
+        self._versions = versions
+
+    def _ensure_fresh(self):
+        versions = self._current_versions()
+        if versions != self._versions:
+            self._rebuild(versions)
+
+    def _sync_version(self, name):
+        """После собственного bump версии: стали ли мы ровно на шаг впереди"""
+        if self._versions is None:
+            return
+        places, categories = self._versions
+        current = versioning.get_version(name)
+        expected = (places if name == "places" else categories) + 1
+        if current != expected:
+            # Были изменения в других процессах — перестроимся при запросе
+            self._versions = None
+        elif name == "places":
+            self._versions = (current, categories)
+        else:
+            self._versions = (places, current)
+
+    def _score(self, pk):
+        return self._places[pk][0], -pk
+
+    def _remove(self, pk):
+        """Удаляет место из массива; возвращает его прежние ключи"""
+        old = self._places.pop(pk, None)
+        if old is None:
+            return set()
+        for key in old[4]:
+            i = bisect.bisect_left(self._entries, (key, pk))
+            if i < len(self._entries) and self._entries[i] == (key, pk):
+                del self._entries[i]
+        self._category_top.pop(old[3], None)
+        return old[4]
+
+    def _patch_prefix_top(self, pk, old_keys, new_keys):
+        """Правит запомненные префиксы, затронутые старыми и новыми ключами места"""
+        prefixes = {
+            key[:i] for key in old_keys | new_keys for i in range(1, len(key) + 1)
+        }
+        for prefix in prefixes:
+            top = self._prefix_top.get(prefix)
+            if top is None:
+                continue
+            was_full = len(top) >= MAX_LIMIT
+            was_in = pk in top
+            if was_in:
+                top.remove(pk)
+            if any(key.startswith(prefix) for key in new_keys):
+                top.append(pk)
+                top.sort(key=self._score, reverse=True)
+                del top[MAX_LIMIT:]
+            # Место ушло из полного списка или опустилось в его конец: лучше
+            # него может оказаться место, которого в списке нет
+            if was_in and was_full and (pk not in top or top[-1] == pk):
+                del self._prefix_top[prefix]
+
+    def place_saved(self, place):
+        with self._lock:
+            if self._versions is None:
+                return
+            old_keys = self._remove(place.pk)
+            keys = _keys(place.name)
+            self._places[place.pk] = (
+                float(place.rating or 0),
+                place.slug,
+                place.name,
+                place.category_id,
+                keys,
+            )
+            for key in keys:
+                bisect.insort(self._entries, (key, place.pk))
+            self._category_top.pop(place.category_id, None)
+            self._patch_prefix_top(place.pk, old_keys, keys)
+            self._sync_version("places")
+
+    def place_deleted(self, pk):
+        with self._lock:
+            if self._versions is None:
+                return
+            self._patch_prefix_top(pk, self._remove(pk), set())
+            self._sync_version("places")
+
+    def category_saved(self, category):
+        with self._lock:
+            if self._versions is None:
+                return
+            self._categories[category.pk] = (normalize(category.name), category.icon)
+            self._sync_version("categories")
+
+    def category_deleted(self, pk):
+        with self._lock:
+            if self._versions is None:
+                return
+            self._categories.pop(pk, None)
+            self._category_top.pop(pk, None)
+            self._sync_version("categories")
+
+    def _top_of_category(self, category_id, limit):
+        top = self._category_top.get(category_id)
+        if top is None or len(top) < limit:
+            top = heapq.nlargest(
+                MAX_LIMIT,
+                (pk for pk, meta in self._places.items() if meta[3] == category_id),
+                key=self._score,
+            )
+            self._category_top[category_id] = top
+        return top[:limit]
+
+    def _top_of_prefix(self, prefix):
+        top = self._prefix_top.get(prefix)
+        if top is None:
+            lo = bisect.bisect_left(self._entries, (prefix,))
+            hi = bisect.bisect_left(self._entries, (prefix + "\uffff",))
+            top = heapq.nlargest(
+                MAX_LIMIT, {pk for _, pk in self._entries[lo:hi]}, key=self._score
+            )
+            if len(self._prefix_top) >= MAX_CACHED_PREFIXES:
+                self._prefix_top = {}
+            self._prefix_top[prefix] = top
+        return top
+
+    def _search(self, prefix, limit):
+        candidates = set(self._top_of_prefix(prefix)[:limit])
+        for category_id, (key, _) in self._categories.items():
+            if key.startswith(prefix):
+                candidates.update(self._top_of_category(category_id, limit))
+        return heapq.nlargest(limit, candidates, key=self._score)
+
+    def suggest(self, prefix, limit=DEFAULT_LIMIT):
+        """Лучшие по рейтингу места, чьё название или категория начинается с prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            self._ensure_fresh()
+            found = self._search(prefix, limit)
+
+            result = []
+            for pk in found:
+                _, slug, name, category_id, _ = self._places[pk]
+                icon = self._categories.get(category_id, (None, ""))[1]
+                result.append({"id": pk, "slug": slug, "name": name, "category_icon": icon})
+            return result
+
+
+index = AutocompleteIndex()
@@ -0,0 +1,230 @@
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+# Пирамида кластеров: на уровне zoom карта делится на 2**(zoom + CELL_SHIFT)
+# ячеек по каждой оси (4x4 ячейки по 64 px на тайл 256 px).
+MIN_ZOOM = 0
+MAX_ZOOM = 16
+CELL_SHIFT = 2
+MAX_MERCATOR_LAT = 85.05112878
+# Сколько ячеек можно запросить за раз: 64x64 ячейки — 16x16 тайлов,
+# больше любого экрана. Для большей области нужен меньший zoom.
+MAX_CELLS = 64 * 64
+
+
+def cells_per_axis(zoom):
+    return 1 << (zoom + CELL_SHIFT)
+
+
+def _mercator(lat, lon):
+    """Нормированные координаты Web Mercator в [0, 1)"""
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    x = (lon + 180.0) / 360.0
+    phi = math.radians(lat)
+    y = (1.0 - math.log(math.tan(phi) + 1.0 / math.cos(phi)) / math.pi) / 2.0
+    return min(max(x, 0.0), 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+
+def cell_for(lat, lon, zoom=MAX_ZOOM):
+    x, y = _mercator(lat, lon)
+    n = cells_per_axis(zoom)
+    return int(x * n), int(y * n)
+
+
+def _contribution(lat, lon):
+    """Ячейки всех уровней пирамиды, в которые попадает точка"""
+    x, y = cell_for(lat, lon)
+    return {
+        (zoom, x >> (MAX_ZOOM - zoom), y >> (MAX_ZOOM - zoom))
+        for zoom in range(MIN_ZOOM, MAX_ZOOM + 1)
+    }
+
+
+FIELDS = ("latitude", "longitude", "category_id")
+
+
+def _values(place, loaded=False):
+    values = place.loaded_values if loaded else {
+        name: getattr(place, name) for name in FIELDS
+    }
+    lat, lon = values.get("latitude"), values.get("longitude")
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon), values.get("category_id")
+
+
+def _apply(delta_places, sign):
+    """Добавляет (sign=+1) или вычитает (sign=-1) места из всех уровней"""
+    from .models import PlaceCluster
+
+    keys = set()
+    for lat, lon, _ in delta_places:
+        keys |= _contribution(lat, lon)
+    if not keys:
+        return
+
+    condition = Q()
+    for zoom, x, y in keys:
+        condition |= Q(zoom=zoom, cell_x=x, cell_y=y)
+    clusters = {
+        (c.zoom, c.cell_x, c.cell_y): c for c in PlaceCluster.objects.filter(condition)
+    }
+    existing = set(clusters)
+
+    for lat, lon, category_id in delta_places:
+        category = str(category_id or 0)
+        for key in _contribution(lat, lon):
+            cluster = clusters.get(key)
+            if cluster is None:
+                cluster = clusters[key] = PlaceCluster(
+                    zoom=key[0], cell_x=key[1], cell_y=key[2], categories={}
+                )
+            cluster.count += sign
+            cluster.lat_sum += sign * lat
+            cluster.lon_sum += sign * lon
+            cluster.categories[category] = cluster.categories.get(category, 0) + sign
+            if cluster.categories[category] <= 0:
+                del cluster.categories[category]
+
+    PlaceCluster.objects.bulk_create(
+        [c for key, c in clusters.items() if key not in existing and c.count > 0]
+    )
+    PlaceCluster.objects.bulk_update(
+        [c for key, c in clusters.items() if key in existing and c.count > 0],
+        ["count", "lat_sum", "lon_sum", "categories"],
+    )
+    empty = [c.pk for key, c in clusters.items() if key in existing and c.count <= 0]
+    if empty:
+        PlaceCluster.objects.filter(pk__in=empty).delete()
+
+
+def _saved_values(place):
+    """
+    Значения до сохранения. Поле, которое так и осталось отложенным
+    (.only()/.defer()), не менялось — его берём из текущего объекта.
+    """
+    loaded = place.loaded_values
+    values = {
+        name: loaded[name] if name in loaded else getattr(place, name)
+        for name in FIELDS
+    }
+    lat, lon = values.get("latitude"), values.get("longitude")
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon), values.get("category_id")
+
+
+def place_saved(place, created, update_fields=None):
+    if update_fields is not None and not {
+        "latitude", "longitude", "category", "category_id"
+    } & set(update_fields):
+        return
+    old = None if created else _saved_values(place)
+    new = _values(place)
+    if old == new:
+        return
+    with transaction.atomic():
+        if old is not None:
+            _apply([old], -1)
+        if new is not None:
+            _apply([new], +1)
+
+
+# Сколько точек обновлять одним _apply: каждая даёт MAX_ZOOM + 1 условий
+# в WHERE, а SQLite ограничивает глубину выражения
+APPLY_CHUNK = 25
+
+
+def apply_changes(removed, added):
+    """Вычитает точки removed и добавляет added: [(lat, lon, category_id)]"""
+    with transaction.atomic():
+        for points, sign in ((removed, -1), (added, +1)):
+            for start in range(0, len(points), APPLY_CHUNK):
+                _apply(points[start : start + APPLY_CHUNK], sign)
+
+
+def place_deleted(place):
+    old = _values(place, loaded=True) or _values(place)
+    if old is not None:
+        with transaction.atomic():
+            _apply([old], -1)
+
+
+def rebuild(Place=None, PlaceCluster=None, batch_size=5000):
+    """
+    Полная перестройка: агрегаты считаются на максимальном уровне и
+    сворачиваются вверх (ячейка уровня z-1 = (x // 2, y // 2)).
+    """
+    if Place is None or PlaceCluster is None:
+        from .models import Place, PlaceCluster
+
+    level = defaultdict(lambda: [0, 0.0, 0.0, Counter()])
+    rows = (
+        Place.objects.exclude(latitude=None)
+        .exclude(longitude=None)
+        .order_by()
+        .values_list("latitude", "longitude", "category_id")
+    )
+    for lat, lon, category_id in rows.iterator(chunk_size=batch_size):
+        lat, lon = float(lat), float(lon)
+        cell = level[cell_for(lat, lon)]
+        cell[0] += 1
+        cell[1] += lat
+        cell[2] += lon
+        cell[3][str(category_id or 0)] += 1
+
+    with transaction.atomic():
+        PlaceCluster.objects.all().delete()
+        total = 0
+        for zoom in range(MAX_ZOOM, MIN_ZOOM - 1, -1):
+            PlaceCluster.objects.bulk_create(
+                (
+                    PlaceCluster(
+                        zoom=zoom,
+                        cell_x=x,
+                        cell_y=y,
+                        count=count,
+                        lat_sum=lat_sum,
+                        lon_sum=lon_sum,
+                        categories=dict(categories),
+                    )
+                    for (x, y), (count, lat_sum, lon_sum, categories) in level.items()
+                ),
+                batch_size=batch_size,
+            )
+            total += len(level)
+            parent = defaultdict(lambda: [0, 0.0, 0.0, Counter()])
+            for (x, y), (count, lat_sum, lon_sum, categories) in level.items():
+                cell = parent[(x >> 1, y >> 1)]
+                cell[0] += count
+                cell[1] += lat_sum
+                cell[2] += lon_sum
+                cell[3].update(categories)
+            level = parent
+    return total
+
+
+def _cell_range(west, south, east, north, zoom):
+    x0, y0 = cell_for(north, west, zoom)
+    x1, y1 = cell_for(south, east, zoom)
+    return x0, y0, x1, y1
+
+
+def cell_count(west, south, east, north, zoom):
+    """Число ячеек уровня zoom, пересекающих прямоугольник"""
+    x0, y0, x1, y1 = _cell_range(west, south, east, north, zoom)
+    return (x1 - x0 + 1) * (y1 - y0 + 1)
+
+
+def clusters_in_bbox(west, south, east, north, zoom):
+    """Кластеры уровня zoom, пересекающие прямоугольник"""
+    from .models import PlaceCluster
+
+    zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+    x0, y0, x1, y1 = _cell_range(west, south, east, north, zoom)
+    return PlaceCluster.objects.filter(
+        zoom=zoom, cell_x__gte=x0, cell_x__lte=x1, cell_y__gte=y0, cell_y__lte=y1
+    ).order_by()
@@ -0,0 +1,81 @@
+import hashlib
+import math
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versioning
+
+
+class ConditionalGetMixin:
+    """
+    ETag и Last-Modified для list/retrieve по счётчикам версий из versioning.
+    Валидаторы считаются одним запросом к таблице версий, поэтому ответ 304
+    отдаётся до выборки queryset и сериализации.
+    """
+
+    # Наборы данных, от которых зависит ответ
+    conditional_versions = ()
+    # Ответ зависит от текущего пользователя: ETag считается отдельно для
+    # каждого, а ответ помечается как private
+    conditional_per_user = False
+
+    def get_validators(self, request):
+        parts = [request.get_full_path()]
+        if self.conditional_per_user:
+            parts.append(str(request.user.pk))
+        state = versioning.get_state(self.conditional_versions)
+        # Сериализаторы этого запроса берут версии отсюда (см. payload_cache)
+        self.data_versions = state
+        parts += [str(state[name][0]) for name in self.conditional_versions]
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        modified = max((state[name][1] for name in self.conditional_versions), default=None)
+        # Last-Modified имеет секундную точность — округляем вверх
+        return quote_etag(digest), None if modified is None else math.ceil(modified)
+
+    def _not_modified(self, request, etag, modified):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if etag in etags:
+                return True
+            # "*" совпадает только с существующим ресурсом: для объекта
+            # нужна выборка, отсутствующий объект даст 404
+            return "*" in etags and self._exists()
+        if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since"))
+        return (
+            modified is not None
+            and if_modified_since is not None
+            and modified <= if_modified_since
+        )
+
+    def _exists(self):
+        if self.action == "retrieve":
+            self.get_object()
+        return True
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag, modified = self.get_validators(request)
+        if self._not_modified(request, etag, modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response["ETag"] = etag
+        if modified is not None:
+            response["Last-Modified"] = http_date(modified)
+        if self.conditional_per_user:
+            response["Cache-Control"] = "private, no-cache"
+            patch_vary_headers(response, ["Authorization"])
+        else:
+            response["Cache-Control"] = "no-cache"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
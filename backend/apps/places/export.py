@@ -0,0 +1,97 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Выгрузка каталога в NDJSON: одна JSON-запись на строку, поле "type" —
+# category, place или tour. Записи читаются .iterator(chunk_size) и сразу
+# отдаются генератором, поэтому память не зависит от размера каталога.
+CHUNK_SIZE = 2000
+BLOCK_SIZE = 64 * 1024  # байт на один yield
+
+CATEGORY_FIELDS = ("id", "name", "slug", "icon")
+PLACE_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "description",
+    "category_id",
+    "address",
+    "latitude",
+    "longitude",
+    "image",
+    "rating",
+    "price_range",
+    "is_hidden_gems",
+    "created_at",
+    "updated_at",
+)
+TOUR_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "description",
+    "image",
+    "price",
+    "duration",
+    "created_at",
+    "updated_at",
+)
+
+
+def _rows(qs, record_type, fields, chunk_size):
+    for row in qs.order_by("id").values(*fields).iterator(chunk_size=chunk_size):
+        yield {"type": record_type, **row}
+
+
+def _tours(chunk_size):
+    from apps.tours.models import Tour
+
+    # Слияние двух упорядоченных по tour_id потоков вместо prefetch:
+    # в памяти только текущий тур
+    links = (
+        Tour.places.through.objects.order_by("tour_id", "place_id")
+        .values_list("tour_id", "place_id")
+        .iterator(chunk_size=chunk_size)
+    )
+    link = next(links, None)
+    for row in _rows(Tour.objects.all(), "tour", TOUR_FIELDS, chunk_size):
+        while link is not None and link[0] < row["id"]:
+            link = next(links, None)
+        place_ids = []
+        while link is not None and link[0] == row["id"]:
+            place_ids.append(link[1])
+            link = next(links, None)
+        row["place_ids"] = place_ids
+        yield row
+
+
+def iter_records(chunk_size=CHUNK_SIZE):
+    from .models import Category, Place
+
+    yield from _rows(Category.objects.all(), "category", CATEGORY_FIELDS, chunk_size)
+    yield from _rows(Place.objects.all(), "place", PLACE_FIELDS, chunk_size)
+    yield from _tours(chunk_size)
+
+
+def iter_ndjson(chunk_size=CHUNK_SIZE, compress=False):
+    """Байтовые блоки NDJSON (при compress=True — поток gzip)"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    block = []
+    size = 0
+    for record in iter_records(chunk_size):
+        line = (encoder.encode(record) + "\n").encode()
+        block.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            data = b"".join(block)
+            block, size = [], 0
+            data = gzip.compress(data) if gzip else data
+            if data:
+                yield data
+    data = b"".join(block)
+    if gzip:
+        data = gzip.compress(data) + gzip.flush()
+    if data:
+        yield data
@@ -0,0 +1,39 @@
+from collections import defaultdict
+
+from django.db.models import Count
+from django.db.models.functions import Floor
+
+
+def compute_facets(qs):
+    """
+    Количество мест по категории, ценовому диапазону, корзине рейтинга
+    (целая часть) и флагу is_hidden_gems при текущих фильтрах qs.
+    Один запрос GROUP BY по всем четырём измерениям, суммы — в Python.
+    """
+    rows = (
+        qs.order_by()
+        .values("category__slug", "price_range", "is_hidden_gems")
+        .annotate(rating_bucket=Floor("rating"), count=Count("id"))
+    )
+    facets = {
+        "category": defaultdict(int),
+        "price_range": defaultdict(int),
+        "rating": defaultdict(int),
+        "is_hidden_gems": defaultdict(int),
+    }
+    for row in rows:
+        count = row["count"]
+        bucket = row["rating_bucket"]
+        facets["category"][row["category__slug"]] += count
+        facets["price_range"][row["price_range"]] += count
+        facets["rating"][None if bucket is None else int(bucket)] += count
+        facets["is_hidden_gems"][row["is_hidden_gems"]] += count
+    return {
+        name: [
+            {"value": value, "count": count}
+            for value, count in sorted(
+                counts.items(), key=lambda item: (-item[1], str(item[0]))
+            )
+        ]
+        for name, counts in facets.items()
+    }
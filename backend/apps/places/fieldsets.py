@@ -0,0 +1,123 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _split(value):
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Сериализатор с выборочными полями: fields=[...] оставляет только
+    перечисленные поля. Связи из expandable_fields, не указанные в expand,
+    отдаются первичными ключами вместо вложенных объектов.
+    """
+
+    # {имя поля: many} — связи, которые раскрываются только через ?expand=
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse = fields is not None
+        if not self.sparse:
+            return
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+        for name, many in self.expandable_fields.items():
+            if name in self.fields and name not in expand:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    many=many, read_only=True
+                )
+
+    @classmethod
+    def readable_fields(cls):
+        """Имена полей, которые можно перечислить в ?fields="""
+        return [name for name, field in cls().fields.items() if not field.write_only]
+
+    @classmethod
+    def restrict_queryset(cls, qs, fields, expand):
+        """Загружает только колонки, нужные выбранным полям"""
+        model = cls.Meta.model
+        model_fields = {f.name: f for f in model._meta.get_fields()}
+        columns = {"id"}
+        if "created_at" in model_fields:
+            # Ключ курсорной пагинации
+            columns.add("created_at")
+        # Исходные select_related/prefetch_related сохраняются только для
+        # раскрытых связей; остальные связи не загружаются вовсе
+        keep_select = keep_prefetch = False
+        id_prefetch = []
+
+        for name in fields:
+            declared = cls._declared_fields.get(name)
+            if declared is not None and declared.source not in (None, "*"):
+                # Поле сериализатора с другим именем колонки (source=...)
+                name = declared.source.split(".")[0]
+            field = model_fields.get(name)
+            if field is None or name not in cls.expandable_fields:
+                if field is not None and field.concrete and not field.many_to_many:
+                    columns.add(name)
+                continue
+            if cls.expandable_fields[name]:
+                if name in expand:
+                    keep_prefetch = True
+                else:
+                    id_prefetch.append(
+                        Prefetch(name, queryset=field.related_model.objects.only("id"))
+                    )
+            else:
+                columns.add(name)
+                if name in expand:
+                    keep_select = True
+                    nested = cls._declared_fields[name]
+                    columns.update(f"{name}__{column}" for column in nested.Meta.fields)
+
+        if not keep_select:
+            qs = qs.select_related(None)
+        if not keep_prefetch:
+            qs = qs.prefetch_related(None)
+        if id_prefetch:
+            qs = qs.prefetch_related(*id_prefetch)
+        return qs.only(*columns)
+
+
+class SparseFieldsetsMixin:
+    """
+    ?fields=a,b,c и ?expand=category для чтения во viewset:
+    лишние поля не сериализуются, лишние колонки не загружаются из БД.
+    """
+
+    def get_sparse_fieldset(self):
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return None, ()
+        if not hasattr(self, "_sparse_fieldset"):
+            fields = _split(self.request.query_params.get("fields"))
+            expand = tuple(_split(self.request.query_params.get("expand")))
+            if fields:
+                allowed = self.get_serializer_class().readable_fields()
+                unknown = [name for name in fields if name not in allowed]
+                if unknown:
+                    raise ValidationError(
+                        {
+                            "detail": f"Unknown fields: {', '.join(unknown)}. "
+                            f"Allowed: {', '.join(allowed)}"
+                        }
+                    )
+            self._sparse_fieldset = (fields or None), expand
+        return self._sparse_fieldset
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        fields, expand = self.get_sparse_fieldset()
+        if fields is not None:
+            qs = self.get_serializer_class().restrict_queryset(qs, fields, expand)
+        return qs
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_sparse_fieldset()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+            kwargs.setdefault("expand", expand)
+        return super().get_serializer(*args, **kwargs)
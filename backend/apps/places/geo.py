@@ -0,0 +1,95 @@
+import math
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Шаг сетки пространственного индекса в градусах (~5.5 км по широте)
+GRID_STEP = 0.05
+GRID_ROWS = int(round(180 / GRID_STEP))
+GRID_COLS = int(round(360 / GRID_STEP))
+
+# Если радиус покрывает больше строк сетки, достаточно индекса по широте
+MAX_GRID_ROWS = 64
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Расстояние по большому кругу между двумя точками в километрах"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _grid_row(lat):
+    return min(GRID_ROWS - 1, max(0, int(math.floor((lat + 90) / GRID_STEP))))
+
+
+def _grid_col(lon):
+    return min(GRID_COLS - 1, max(0, int(math.floor((lon + 180) / GRID_STEP))))
+
+
+def grid_cell(lat, lon):
+    """Номер ячейки сетки для координат (построчная нумерация)"""
+    if lat is None or lon is None:
+        return None
+    return _grid_row(float(lat)) * GRID_COLS + _grid_col(float(lon))
+
+
+def bounding_box(lat, lon, radius_km):
+    """Прямоугольник (min_lat, max_lat, min_lon, max_lon), описанный вокруг круга"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # Долготный размах берём по самой удалённой от экватора широте
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(widest))))
+    if dlon >= 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - dlon, lon + dlon
+
+
+def grid_filter(lat, lon, radius_km):
+    """Q-фильтр кандидатов по ячейкам сетки для круга радиуса radius_km"""
+    return bbox_filter(*bounding_box(lat, lon, radius_km))
+
+
+def bbox_filter(min_lat, max_lat, min_lon, max_lon):
+    """
+    Q-фильтр кандидатов по ячейкам сетки: по одному диапазону grid_cell
+    на каждую строку, пересекающую прямоугольник.
+    """
+    row0, row1 = _grid_row(min_lat), _grid_row(max_lat)
+    if row1 - row0 + 1 > MAX_GRID_ROWS:
+        return Q(latitude__gte=min_lat, latitude__lte=max_lat)
+
+    # Прямоугольник может пересекать антимеридиан
+    spans = []
+    if min_lon < -180.0:
+        spans += [(_grid_col(min_lon + 360), GRID_COLS - 1), (0, _grid_col(max_lon))]
+    elif max_lon > 180.0:
+        spans += [(_grid_col(min_lon), GRID_COLS - 1), (0, _grid_col(max_lon - 360))]
+    else:
+        spans.append((_grid_col(min_lon), _grid_col(max_lon)))
+
+    condition = Q()
+    for row in range(row0, row1 + 1):
+        base = row * GRID_COLS
+        for col0, col1 in spans:
+            condition |= Q(grid_cell__gte=base + col0, grid_cell__lte=base + col1)
+    return condition
+
+
+def distance_expression(lat, lon):
+    """Выражение БД с точным расстоянием (гаверсинус) от точки до места, км"""
+    phi = math.radians(lat)
+    dphi = Radians(F("latitude"), output_field=FloatField()) - phi
+    dlmb = Radians(F("longitude"), output_field=FloatField()) - math.radians(lon)
+    a = Power(Sin(dphi / 2), 2) + math.cos(phi) * Cos(
+        Radians(F("latitude"), output_field=FloatField())
+    ) * Power(Sin(dlmb / 2), 2)
+    # Least защищает asin от погрешности округления чуть выше 1
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), 1.0), output_field=FloatField())
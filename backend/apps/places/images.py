@@ -0,0 +1,221 @@
+import base64
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import ExifTags, Image, ImageOps
+
+from . import versioning
+
+logger = logging.getLogger(__name__)
+
+# Производные изображения мест и туров: уменьшенные копии нескольких ширин
+# в WebP и JPEG под MEDIA_ROOT/derivatives/<путь оригинала без расширения>/.
+# Описание хранится в поле image_variants модели:
+#   {"source": имя оригинала, "width": ..., "height": ...,
+#    "sizes": {"320": {"webp": имя файла, "jpeg": имя файла}, ...}}
+# В image_placeholder — крошечное размытое превью (LQIP) в виде data URI,
+# которое клиент показывает, пока грузится изображение.
+DERIVATIVES_DIR = "derivatives"
+PIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+# Отправляется после записи результатов обработки: sender — модель, pk
+variants_saved = Signal()
+PLACEHOLDER_SIZE = 16  # px по большей стороне, ~150-300 байт в base64
+PLACEHOLDER_QUALITY = 40
+
+
+def _config(name, default):
+    return getattr(settings, "IMAGE_PIPELINE", {}).get(name, default)
+
+
+def derivative_name(source, width, fmt):
+    path = PurePosixPath(source)
+    return str(PurePosixPath(DERIVATIVES_DIR, path.parent, path.stem, f"{width}.{fmt}"))
+
+
+def target_widths(width):
+    """Ширины производных не больше оригинала, по убыванию"""
+    widths = sorted((w for w in _config("WIDTHS", (320, 640, 1280)) if w < width), reverse=True)
+    return widths or [width]
+
+
+def _open(source, storage, draft_size=None):
+    """(изображение, ширина и высота оригинала с учётом EXIF, ширины копий)"""
+    with storage.open(source, "rb") as f:
+        image = Image.open(f)
+        width, height = image.size
+        if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+            width, height = height, width
+        widths = target_widths(width)
+        # JPEG декодируется сразу в уменьшенном масштабе (в разы быстрее)
+        draft_size = draft_size or widths[0]
+        image.draft("RGB", (draft_size, draft_size))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image, width, height, widths
+
+
+def _save(storage, name, data):
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(data))
+
+
+def make_placeholder(image):
+    """data URI крошечной WebP-копии изображения"""
+    small = image.convert("RGB")
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BOX)
+    buffer = BytesIO()
+    small.save(buffer, "WEBP", quality=PLACEHOLDER_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def generate_placeholder(source, storage=default_storage):
+    image, *_ = _open(source, storage, draft_size=PLACEHOLDER_SIZE)
+    return make_placeholder(image)
+
+
+def generate_variants(source, storage=default_storage):
+    """
+    Создаёт производные изображения source.
+    Возвращает (описание для image_variants, image_placeholder).
+    """
+    image, width, height, widths = _open(source, storage)
+    quality = _config("QUALITY", 80)
+    sizes = {}
+    # От большей ширины к меньшей: каждая копия уменьшается из предыдущей
+    for target in widths:
+        image = image.resize(
+            (target, max(1, round(image.height * target / image.width))),
+            Image.Resampling.LANCZOS,
+        )
+        sizes[str(target)] = {}
+        for fmt in _config("FORMATS", ("webp", "jpeg")):
+            out = image.convert("RGB") if fmt == "jpeg" else image
+            buffer = BytesIO()
+            out.save(buffer, PIL_FORMATS[fmt], quality=quality)
+            sizes[str(target)][fmt] = _save(
+                storage, derivative_name(source, target, fmt), buffer.getvalue()
+            )
+    # Превью — из самой маленькой копии, это почти бесплатно
+    variants = {"source": source, "width": width, "height": height, "sizes": sizes}
+    return variants, make_placeholder(image)
+
+
+def delete_variants(variants, storage=default_storage):
+    for formats in (variants or {}).get("sizes", {}).values():
+        for name in formats.values():
+            storage.delete(name)
+
+
+def needs_processing(instance):
+    return (instance.image.name or "") != (instance.image_variants or {}).get("source", "")
+
+
+def needs_placeholder(instance):
+    return bool(instance.image.name) and not instance.image_placeholder
+
+
+def _update(model, pk, source, **values):
+    """
+    Записывает результаты, если оригинал не сменился за время обработки.
+    updated_at обновляется, чтобы сбросить кэш сериализованных ответов.
+    """
+    updated = model.objects.filter(pk=pk, image=source).update(
+        updated_at=timezone.now(), **values
+    )
+    if updated:
+        # Имена наборов версий совпадают с app_label: "places", "tours"
+        versioning.bump(model._meta.app_label)
+        variants_saved.send(sender=model, pk=pk)
+    return bool(updated)
+
+
+def save_variants(model, pk, source, variants, placeholder, old=None):
+    if not _update(
+        model, pk, source, image_variants=variants, image_placeholder=placeholder
+    ):
+        delete_variants(variants)
+        return False
+    if old and old.get("source") != source:
+        delete_variants(old)
+    return True
+
+
+def save_placeholder(model, pk, source, placeholder):
+    return _update(model, pk, source, image_placeholder=placeholder)
+
+
+def process(label, pk, force=False):
+    model = apps.get_model(label)
+    instance = (
+        model.objects.filter(pk=pk)
+        .only("pk", "image", "image_variants", "image_placeholder")
+        .first()
+    )
+    if instance is None:
+        return False
+    source = instance.image.name or ""
+    if force or needs_processing(instance):
+        variants, placeholder = generate_variants(source) if source else ({}, "")
+        return save_variants(
+            model, pk, source, variants, placeholder, instance.image_variants
+        )
+    if needs_placeholder(instance):
+        return save_placeholder(model, pk, source, generate_placeholder(source))
+    return False
+
+
+class ImagePipeline:
+    """
+    Фоновая обработка изображений после коммита транзакции сохранения:
+    ограниченный пул потоков, один объект в очереди не дублируется.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._executor = None
+        self._executor_pid = None
+
+    def schedule(self, instance):
+        key = (instance._meta.label, instance.pk)
+        transaction.on_commit(lambda: self._submit(key))
+
+    def _submit(self, key):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            # После fork воркера потоки пула родителя недоступны
+            if self._executor_pid != os.getpid():
+                self._executor_pid = os.getpid()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=_config("WORKERS", 2), thread_name_prefix="images"
+                )
+            self._executor.submit(self._run, key)
+
+    def _run(self, key):
+        with self._lock:
+            self._pending.discard(key)
+        try:
+            process(*key)
+        except Exception:
+            logger.exception("image processing failed for %s #%s", *key)
+        finally:
+            connection.close()
+
+
+pipeline = ImagePipeline()
@@ -0,0 +1,392 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils.text import slugify
+
+from . import clusters, leaderboards, search, tiles, versioning
+from .geo import grid_cell
+from .models import Category, Place
+
+# Потоковый импорт мест из CSV, GeoJSON и NDJSON. Строки проверяются и
+# записываются пачками: одна вставка bulk_create(update_conflicts=True) по
+# slug на пачку в своей транзакции. Сигналы моделей при этом не
+# срабатывают, поэтому производные данные обновляются один раз в конце:
+# точечно для затронутых мест или, если их больше INCREMENTAL_LIMIT,
+# полной перестройкой.
+
+# Отправляется после импорта: sender — Place, ids — id созданных/обновлённых мест
+places_imported = Signal()
+
+CHUNK_SIZE = 5000
+INCREMENTAL_LIMIT = 1000
+MAX_ERRORS = 50  # сколько ошибок хранить для отчёта
+READ_BLOCK = 1 << 16
+FORMATS = ("csv", "geojson", "ndjson")
+
+# Колонки, которые импорт может записать (кроме slug, ключа upsert)
+IMPORT_FIELDS = (
+    "name",
+    "description",
+    "category_id",
+    "address",
+    "latitude",
+    "longitude",
+    "image",
+    "rating",
+    "price_range",
+    "is_hidden_gems",
+)
+
+
+class InvalidRecord(ValueError):
+    """Запись, которую не удалось прочитать; читатель отдаёт её вместо строки"""
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.invalid = 0
+        self.errors = []  # [(номер строки, текст ошибки)]
+        self.seconds = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def error(self, line, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+# --- Чтение файлов --------------------------------------------------------
+
+
+def detect_format(path):
+    suffix = Path(path).suffix.lower().lstrip(".")
+    if suffix in ("json", "geojson"):
+        return "geojson"
+    if suffix in ("jsonl", "ndjson", "geojsonl", "geojsons"):
+        return "ndjson"
+    if suffix in ("csv", "tsv"):
+        return "csv"
+    raise ValueError(f"cannot detect format of {path}, pass it explicitly")
+
+
+def _feature_row(feature):
+    """Feature GeoJSON (Point) -> плоская строка"""
+    row = dict(feature.get("properties") or {})
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") == "Point":
+        lon, lat = geometry["coordinates"][:2]
+        row.setdefault("latitude", lat)
+        row.setdefault("longitude", lon)
+    return row
+
+
+def read_csv(f):
+    # Номер строки файла с учётом заголовка
+    for line, row in enumerate(csv.DictReader(f), 2):
+        yield line, row
+
+
+def read_ndjson(f):
+    """NDJSON: объекты или Feature (GeoJSONSeq) построчно"""
+    for line, text in enumerate(f, 1):
+        text = text.strip().lstrip("\x1e")  # RS-разделитель GeoJSONSeq
+        if not text:
+            continue
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError as exc:
+            # Одна испорченная строка не прерывает импорт
+            yield line, InvalidRecord(f"invalid JSON: {exc.msg}")
+            continue
+        if not isinstance(record, dict):
+            yield line, InvalidRecord("record must be a JSON object")
+            continue
+        if record.get("type") == "Feature":
+            record = _feature_row(record)
+        elif record.get("type") not in (None, "place"):
+            # Записи категорий/туров из export_catalogue пропускаются
+            continue
+        yield line, record
+
+
+def read_geojson(f):
+    """
+    FeatureCollection без загрузки файла в память: элементы массива
+    "features" декодируются по одному по мере чтения.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def more():
+        nonlocal buffer, eof
+        block = f.read(READ_BLOCK)
+        eof = not block
+        buffer += block
+
+    position = -1
+    while position < 0:
+        if eof:
+            return
+        more()
+        position = buffer.find('"features"')
+    position = buffer.find("[", position)
+    while position < 0 and not eof:
+        more()
+        position = buffer.find("[", buffer.find('"features"'))
+    position += 1
+    number = 0
+    while True:
+        # Пропускаем пробелы и запятые между элементами
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            more()
+        if position >= len(buffer) or buffer[position] == "]":
+            return
+        try:
+            feature, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more()
+            continue
+        number += 1
+        yield number, _feature_row(feature)
+        buffer, position = buffer[end:], 0
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson, "geojson": read_geojson}
+
+
+def read_rows(path, fmt=None):
+    fmt = fmt or detect_format(path)
+    with open(path, encoding="utf-8", newline="" if fmt == "csv" else None) as f:
+        yield from READERS[fmt](f)
+
+
+# --- Проверка строк -------------------------------------------------------
+
+
+def _decimal(value, name, lo, hi, places):
+    if value in (None, ""):
+        return None
+    try:
+        number = Decimal(str(value))
+        if not number.is_finite():
+            raise InvalidOperation
+        number = number.quantize(Decimal(1).scaleb(-places))
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+    if not lo <= number <= hi:
+        raise ValueError(f"{name} out of range")
+    return number
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes", "y")
+
+
+class PlaceImporter:
+    """
+    importer = PlaceImporter(); stats = importer.run(rows)
+    rows — итератор (номер строки, dict); категория задаётся slug или
+    названием в поле category (или id в category_id).
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, create_categories=False, dry_run=False):
+        self.chunk_size = chunk_size
+        self.create_categories = create_categories
+        self.dry_run = dry_run
+        self.stats = ImportStats()
+        self.touched_ids = []
+        self.touched_categories = set()
+        # id -> (latitude, longitude, category_id) обновлённых мест до импорта;
+        # не собирается, когда мест больше INCREMENTAL_LIMIT
+        self.previous = {}
+        self.incremental = True
+        # Категории загружаются один раз на весь импорт
+        self.categories = {}
+        for pk, slug, name in Category.objects.values_list("id", "slug", "name"):
+            self.categories[slug] = pk
+            self.categories[name.lower()] = pk
+        self.category_ids = set(self.categories.values())
+        self.new_categories = []  # названия категорий, созданных импортом
+
+    def _category(self, row):
+        if row.get("category_id") not in (None, ""):
+            pk = int(row["category_id"])
+            if pk not in self.category_ids:
+                raise ValueError(f"unknown category_id {pk}")
+            return pk
+        value = str(row.get("category") or "").strip()
+        if not value:
+            return None
+        pk = self.categories.get(value) or self.categories.get(value.lower())
+        if pk is None:
+            if not self.create_categories:
+                raise ValueError(f"unknown category {value!r}")
+            slug = slugify(value) or value
+            if self.dry_run:
+                # Пробный прогон ничего не пишет: временный отрицательный id
+                pk = -(len(self.new_categories) + 1)
+            else:
+                pk = Category.objects.create(name=value, slug=slug).pk
+            self.new_categories.append(value)
+            self.categories[slug] = self.categories[value.lower()] = pk
+            self.category_ids.add(pk)
+        return pk
+
+    def clean(self, row):
+        """Строка файла -> поля Place; ValueError для некорректных"""
+        if isinstance(row, InvalidRecord):
+            raise row
+        name = str(row.get("name") or "").strip()
+        if not name:
+            raise ValueError("name is required")
+        if len(name) > 255:
+            raise ValueError("name is longer than 255 characters")
+        slug = slugify(row.get("slug") or name)
+        if not slug:
+            raise ValueError("slug is empty")
+        latitude = _decimal(row.get("latitude"), "latitude", -90, 90, 6)
+        longitude = _decimal(row.get("longitude"), "longitude", -180, 180, 6)
+        return {
+            "slug": slug[:255],
+            "name": name,
+            "description": str(row.get("description") or ""),
+            "category_id": self._category(row),
+            "address": str(row.get("address") or "")[:500],
+            "latitude": latitude,
+            "longitude": longitude,
+            "image": str(row.get("image") or ""),
+            "rating": _decimal(row.get("rating"), "rating", 0, 5, 1),
+            "price_range": str(row.get("price_range") or "")[:8],
+            "is_hidden_gems": _bool(row.get("is_hidden_gems")),
+        }
+
+    def run(self, rows):
+        start = time.perf_counter()
+        batch = {}
+        for line, row in rows:
+            self.stats.rows += 1
+            try:
+                values = self.clean(row)
+            except (ValueError, TypeError, KeyError) as exc:
+                self.stats.error(line, str(exc))
+                continue
+            # Повтор slug в пачке — побеждает последняя строка
+            batch[values["slug"]] = values
+            if len(batch) >= self.chunk_size:
+                self._flush(batch)
+                batch = {}
+        if batch:
+            self._flush(batch)
+        if not self.dry_run and self.touched_ids:
+            self.finish()
+        self.stats.seconds = time.perf_counter() - start
+        return self.stats
+
+    def _flush(self, batch):
+        slugs = list(batch)
+        existing = {}
+        for slug, pk, lat, lon, category_id in Place.objects.filter(
+            slug__in=slugs
+        ).values_list("slug", "id", "latitude", "longitude", "category_id"):
+            existing[slug] = category_id
+            if self.incremental and not self.dry_run:
+                # Slug, повторённый в следующей пачке, уже перезаписан
+                self.previous.setdefault(pk, (lat, lon, category_id))
+        self.stats.created += len(slugs) - len(existing)
+        self.stats.updated += len(existing)
+        if self.dry_run:
+            return
+        places = [
+            Place(grid_cell=grid_cell(values["latitude"], values["longitude"]), **values)
+            for values in batch.values()
+        ]
+        with transaction.atomic():
+            saved = Place.objects.bulk_create(
+                places,
+                update_conflicts=True,
+                unique_fields=["slug"],
+                update_fields=[*IMPORT_FIELDS, "grid_cell", "updated_at"],
+            )
+        if saved and saved[0].pk is not None:
+            self.touched_ids += [place.pk for place in saved]
+        else:
+            # БД не вернула id — дочитываем по slug
+            self.touched_ids += list(
+                Place.objects.filter(slug__in=slugs).values_list("id", flat=True)
+            )
+        self.touched_categories |= {v["category_id"] for v in batch.values()}
+        self.touched_categories |= set(existing.values())
+        if self.incremental and len(self.touched_ids) > INCREMENTAL_LIMIT:
+            self.incremental = False
+            self.previous = {}
+
+    def finish(self):
+        if self.incremental:
+            update_derived(self.touched_ids, self.previous, self.touched_categories)
+        else:
+            rebuild_derived(self.touched_categories)
+        places_imported.send(sender=Place, ids=self.touched_ids)
+
+
+def _point(lat, lon, category_id):
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon), category_id
+
+
+def update_derived(place_ids, previous, category_ids):
+    """
+    Точечное обновление производных данных для мест place_ids, записанных
+    в обход save(); previous — их значения до записи (для новых мест нет)
+    """
+    rows = Place.objects.filter(pk__in=place_ids).values_list(
+        "id", "latitude", "longitude", "category_id"
+    )
+    current = {pk: _point(lat, lon, category_id) for pk, lat, lon, category_id in rows}
+    old = {pk: _point(*values) for pk, values in previous.items()}
+    removed = [old[pk] for pk in current if old.get(pk) and old[pk] != current[pk]]
+    added = [new for pk, new in current.items() if new and old.get(pk) != new]
+    # В тайле есть категория и флаги места, поэтому сбрасываются тайлы
+    # всех затронутых мест, а не только перемещённых
+    points = {
+        point[:2] for point in (*old.values(), *current.values()) if point is not None
+    }
+
+    search.index_places(list(current))
+    clusters.apply_changes(removed, added)
+    leaderboards.refresh(category_ids)
+    transaction.on_commit(lambda: tiles.invalidate_points(points))
+    versioning.bump("places")
+
+
+def rebuild_derived(category_ids):
+    """
+    Перестройка производных данных, которые обычно ведут сигналы, после
+    массовой записи мест в обход save()
+    """
+    if search.is_available():
+        search.rebuild_index()
+    clusters.rebuild()
+    leaderboards.refresh(category_ids)
+    tiles.clear()
+    versioning.bump("places")
@@ -0,0 +1,70 @@
+from django.db import transaction
+
+# Материализованные топы мест по категориям для главной ленты.
+# Пересчитываются только категории, затронутые изменением места.
+BOARD_SIZE = 10
+TOP_RATED = "top_rated"
+HIDDEN_GEMS = "hidden_gems"
+BOARDS = {
+    TOP_RATED: {},
+    HIDDEN_GEMS: {"is_hidden_gems": True},
+}
+WATCHED_FIELDS = ("rating", "category_id", "is_hidden_gems")
+
+
+def _models(Place=None, LeaderboardEntry=None):
+    if Place is None or LeaderboardEntry is None:
+        from .models import LeaderboardEntry, Place
+    return Place, LeaderboardEntry
+
+
+def refresh(category_ids, Place=None, LeaderboardEntry=None):
+    """Пересобирает все топы указанных категорий"""
+    Place, LeaderboardEntry = _models(Place, LeaderboardEntry)
+    category_ids = {pk for pk in category_ids if pk is not None}
+    if not category_ids:
+        return 0
+    entries = []
+    for category_id in category_ids:
+        for board, filters in BOARDS.items():
+            top = (
+                Place.objects.filter(category_id=category_id, rating__isnull=False, **filters)
+                .order_by("-rating", "-id")
+                .values_list("id", flat=True)[:BOARD_SIZE]
+            )
+            entries += [
+                LeaderboardEntry(
+                    board=board, category_id=category_id, place_id=place_id, rank=rank
+                )
+                for rank, place_id in enumerate(top, 1)
+            ]
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(category_id__in=category_ids).delete()
+        LeaderboardEntry.objects.bulk_create(entries)
+    return len(entries)
+
+
+def rebuild(Place=None, LeaderboardEntry=None):
+    Place, LeaderboardEntry = _models(Place, LeaderboardEntry)
+    category_ids = set(
+        Place.objects.exclude(category=None)
+        .order_by()
+        .values_list("category_id", flat=True)
+        .distinct()
+    )
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        return refresh(category_ids, Place, LeaderboardEntry)
+
+
+def place_saved(place, created):
+    old = place.loaded_values
+    if not created and all(
+        old.get(name) == getattr(place, name) for name in WATCHED_FIELDS
+    ):
+        return
+    refresh({old.get("category_id"), place.category_id})
+
+
+def place_deleted(place):
+    refresh({place.loaded_values.get("category_id", place.category_id)})
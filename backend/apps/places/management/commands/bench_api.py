@@ -0,0 +1,137 @@
+import io
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from apps.guide.models import ChatSession
+from apps.places.models import Category, Place
+from apps.tours.models import Tour
+from core import benchmarks
+
+# Быстрый хэшер: PBKDF2 занимает сотни миллисекунд и скрыл бы регрессии
+# в коде входа/регистрации. Второй хэшер проверяет уже созданные пароли.
+FAST_HASHERS = [
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark API endpoints in process (latency percentiles, queries, memory) "
+        "and compare against a stored baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(benchmarks.SCENARIOS),
+            help="Run only these scenarios (repeatable)",
+        )
+        parser.add_argument("--places", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--tours", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write results as JSON to this file")
+        parser.add_argument("--baseline", help="Fail on regressions against this JSON file")
+        parser.add_argument(
+            "--save-baseline", help="Write results as the new baseline to this file"
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=benchmarks.DEFAULT_THRESHOLD
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = benchmarks.load_baseline(options["baseline"])
+            except benchmarks.BenchmarkError as exc:
+                raise CommandError(str(exc))
+
+        try:
+            # Все данные бенчмарка откатываются в конце
+            with transaction.atomic(), override_settings(PASSWORD_HASHERS=FAST_HASHERS):
+                results = self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+        except benchmarks.BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        for key in ("output", "save_baseline"):
+            if options[key]:
+                with open(options[key], "w") as f:
+                    json.dump(results, f, indent=2)
+                    f.write("\n")
+        if baseline is None:
+            return
+        regressions = benchmarks.compare(results, baseline, options["threshold"])
+        for name, metric, before, after in regressions:
+            self.stderr.write(self.style.ERROR(f"{name}: {metric} {before} -> {after}"))
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+        self.stdout.write(self.style.SUCCESS("✅ No regressions against the baseline"))
+
+    def _dataset(self, options):
+        if not Place.objects.filter(slug__startswith="lt-").exists():
+            quiet = io.StringIO()
+            if not Category.objects.exists():
+                call_command("create_data", stdout=quiet)
+            # Один процесс: генерация идёт внутри транзакции бенчмарка
+            call_command(
+                "generate_data",
+                users=options["users"],
+                places=options["places"],
+                tours=options["tours"],
+                seed=options["seed"],
+                workers=1,
+                stdout=quiet,
+            )
+        return {
+            "places": Place.objects.count(),
+            "tours": Tour.objects.count(),
+            "chats": ChatSession.objects.count(),
+        }
+
+    def _run(self, options):
+        dataset = self._dataset(options)
+        ctx = benchmarks.prepare()
+        names = options["scenario"] or list(benchmarks.SCENARIOS)
+        self.stdout.write(
+            f"{'scenario':<26} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+            f"{'queries':>8} {'peak KB':>9}"
+        )
+        scenarios = {}
+        for name in names:
+            result = scenarios[name] = benchmarks.run_scenario(
+                name, ctx, options["iterations"], options["warmup"]
+            )
+            self.stdout.write(
+                f"{name:<26} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['queries']:>8} {result['peak_kb']:>9.1f}"
+            )
+        return {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "dataset": dataset,
+                "iterations": options["iterations"],
+            },
+            "scenarios": scenarios,
+        }
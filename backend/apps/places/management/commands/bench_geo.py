@@ -0,0 +1,107 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.places.geo import distance_expression, grid_cell, grid_filter
+from apps.places.models import Category, Place
+
+# Примерные границы Узбекистана
+LAT_RANGE = (37.2, 45.6)
+LON_RANGE = (56.0, 73.1)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark radius search: grid index + haversine vs. old bounding-box scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10000,100000,1000000",
+            help="Comma separated catalogue sizes",
+        )
+        parser.add_argument("--radius", type=float, default=10.0, help="Radius, km")
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options["sizes"].split(",") if s]
+        self.stdout.write(
+            f"{'places':>10} {'bbox ms':>10} {'grid ms':>10} {'bbox rows':>10} {'exact rows':>10}"
+        )
+        for size in sizes:
+            try:
+                # Все данные бенчмарка откатываются в конце
+                with transaction.atomic():
+                    self._run(size, options)
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _run(self, size, options):
+        rnd = random.Random(options["seed"])
+        category = Category.objects.create(name="__bench_geo__", slug="bench-geo")
+
+        batch = []
+        for i in range(size):
+            lat = round(rnd.uniform(*LAT_RANGE), 6)
+            lon = round(rnd.uniform(*LON_RANGE), 6)
+            batch.append(
+                Place(
+                    name=f"Bench {i}",
+                    slug=f"bench-geo-{i}",
+                    category=category,
+                    latitude=lat,
+                    longitude=lon,
+                    grid_cell=grid_cell(lat, lon),
+                )
+            )
+            if len(batch) == 10000:
+                Place.objects.bulk_create(batch)
+                batch = []
+        Place.objects.bulk_create(batch)
+
+        radius = options["radius"]
+        centers = [
+            (rnd.uniform(*LAT_RANGE), rnd.uniform(*LON_RANGE))
+            for _ in range(options["queries"])
+        ]
+        bbox_times, grid_times = [], []
+        bbox_rows = exact_rows = 0
+        for lat, lon in centers:
+            delta = radius / 111.0
+            start = time.perf_counter()
+            rows = list(
+                Place.objects.filter(
+                    latitude__gte=lat - delta,
+                    latitude__lte=lat + delta,
+                    longitude__gte=lon - delta,
+                    longitude__lte=lon + delta,
+                ).values_list("id", flat=True)
+            )
+            bbox_times.append(time.perf_counter() - start)
+            bbox_rows += len(rows)
+
+            start = time.perf_counter()
+            rows = list(
+                Place.objects.filter(grid_filter(lat, lon, radius))
+                .annotate(distance_km=distance_expression(lat, lon))
+                .filter(distance_km__lte=radius)
+                .order_by("distance_km")
+                .values_list("id", "distance_km")
+            )
+            grid_times.append(time.perf_counter() - start)
+            exact_rows += len(rows)
+
+        self.stdout.write(
+            f"{size:>10} "
+            f"{statistics.median(bbox_times) * 1000:>10.2f} "
+            f"{statistics.median(grid_times) * 1000:>10.2f} "
+            f"{bbox_rows:>10} {exact_rows:>10}"
+        )
@@ -0,0 +1,85 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.places import payload_cache
+from apps.places.models import Category, Place
+from apps.places.serializers import PlaceSerializer
+
+SPARSE_FIELDS = ["id", "name", "latitude", "longitude", "category"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark place serialization throughput: full vs. sparse fieldsets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--places", type=int, default=20000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            # Все данные бенчмарка откатываются в конце
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        rnd = random.Random(options["seed"])
+        categories = [
+            Category.objects.create(name=f"__bench_ser_{i}__", slug=f"bench-ser-{i}")
+            for i in range(7)
+        ]
+        Place.objects.bulk_create(
+            (
+                Place(
+                    name=f"Bench {i}",
+                    slug=f"bench-ser-{i}",
+                    description="Lorem ipsum dolor sit amet " * 8,
+                    address=f"{i} Amir Temur street, Tashkent",
+                    category=rnd.choice(categories),
+                    latitude=round(rnd.uniform(37.2, 45.6), 6),
+                    longitude=round(rnd.uniform(56.0, 73.1), 6),
+                    rating=round(rnd.uniform(3, 5), 1),
+                    price_range="$$",
+                )
+                for i in range(options["places"])
+            ),
+            batch_size=5000,
+        )
+        base = Place.objects.filter(slug__startswith="bench-ser-").order_by("-created_at", "-id")
+        renderer = JSONRenderer()
+
+        def full():
+            return PlaceSerializer(base.select_related("category"), many=True).data
+
+        def sparse():
+            qs = PlaceSerializer.restrict_queryset(base, SPARSE_FIELDS, ())
+            return PlaceSerializer(qs, many=True, fields=SPARSE_FIELDS).data
+
+        def measure(label, build, clear_cache):
+            best = None
+            for _ in range(options["repeat"]):
+                if clear_cache:
+                    payload_cache.get_backend().clear()
+                start = time.perf_counter()
+                body = renderer.render(build())
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            rate = options["places"] / best
+            self.stdout.write(f"{label:>22} {rate:>12,.0f} {len(body):>12,}")
+
+        self.stdout.write(f"{'mode':>22} {'rows/s':>12} {'bytes':>12}")
+        measure("full (cold cache)", full, True)
+        full()  # прогрев кэша
+        measure("full (warm cache)", full, False)
+        measure("sparse " + ",".join(SPARSE_FIELDS[:2]) + ",...", sparse, False)
@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.places import tiles
+from apps.places.geo import grid_cell
+from apps.places.models import Category, Place
+from apps.places.serializers import PlaceSerializer
+
+# Примерные границы Узбекистана
+LAT_RANGE = (37.2, 45.6)
+LON_RANGE = (56.0, 73.1)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark binary map tiles against the PlaceSerializer JSON list"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--places", type=int, default=100000)
+        parser.add_argument("--zoom", type=int, default=10)
+        parser.add_argument("--tiles", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            # Все данные бенчмарка откатываются в конце
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        rnd = random.Random(options["seed"])
+        categories = [
+            Category.objects.create(name=f"__bench_tiles_{i}__", slug=f"bench-tiles-{i}")
+            for i in range(7)
+        ]
+        batch = []
+        for i in range(options["places"]):
+            lat = round(rnd.uniform(*LAT_RANGE), 6)
+            lon = round(rnd.uniform(*LON_RANGE), 6)
+            batch.append(
+                Place(
+                    name=f"Bench {i}",
+                    slug=f"bench-tiles-{i}",
+                    category=rnd.choice(categories),
+                    latitude=lat,
+                    longitude=lon,
+                    grid_cell=grid_cell(lat, lon),
+                    rating=round(rnd.uniform(3, 5), 1),
+                )
+            )
+            if len(batch) == 10000:
+                Place.objects.bulk_create(batch)
+                batch = []
+        Place.objects.bulk_create(batch)
+
+        z = options["zoom"]
+        renderer = JSONRenderer()
+        json_sizes, json_times, tile_sizes, tile_times, counts = [], [], [], [], []
+        for _ in range(options["tiles"]):
+            x, y = tiles.tile_for(rnd.uniform(*LAT_RANGE), rnd.uniform(*LON_RANGE), z)
+            min_lat, max_lat, min_lon, max_lon = tiles.tile_bounds(z, x, y)
+
+            start = time.perf_counter()
+            places = list(
+                Place.objects.select_related("category").filter(
+                    latitude__gt=min_lat,
+                    latitude__lte=max_lat,
+                    longitude__gte=min_lon,
+                    longitude__lt=max_lon,
+                )
+            )
+            body = renderer.render(PlaceSerializer(places, many=True).data)
+            json_times.append(time.perf_counter() - start)
+            json_sizes.append(len(body))
+
+            start = time.perf_counter()
+            data = tiles.encode(tiles.tile_rows(z, x, y))
+            tile_times.append(time.perf_counter() - start)
+            tile_sizes.append(len(data))
+            counts.append(len(places))
+
+        self.stdout.write(
+            f"{options['places']} places, zoom {z}, "
+            f"median {statistics.median(counts):.0f} places per tile"
+        )
+        self.stdout.write(f"{'format':>8} {'bytes':>12} {'encode ms':>10}")
+        self.stdout.write(
+            f"{'json':>8} {statistics.median(json_sizes):>12.0f} "
+            f"{statistics.median(json_times) * 1000:>10.2f}"
+        )
+        self.stdout.write(
+            f"{'tile':>8} {statistics.median(tile_sizes):>12.0f} "
+            f"{statistics.median(tile_times) * 1000:>10.2f}"
+        )
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from apps.places import export
+
+
+class Command(BaseCommand):
+    help = "Stream the place/category/tour catalogue as NDJSON (optionally gzip)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default="-", help="File path, or - for stdout (default)"
+        )
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        blocks = export.iter_ndjson(options["chunk_size"], compress=options["gzip"])
+        if options["output"] == "-":
+            out = sys.stdout.buffer
+            for block in blocks:
+                out.write(block)
+            out.flush()
+            return
+        written = 0
+        with open(options["output"], "wb") as out:
+            for block in blocks:
+                out.write(block)
+                written += len(block)
+        self.stderr.write(
+            self.style.SUCCESS(f"✅ Wrote {written:,} bytes to {options['output']}")
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.places import importer
+
+
+class Command(BaseCommand):
+    help = "Bulk import places from CSV, GeoJSON or NDJSON (upsert by slug)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format", choices=importer.FORMATS, help="Detected from the extension by default"
+        )
+        parser.add_argument("--chunk-size", type=int, default=importer.CHUNK_SIZE)
+        parser.add_argument(
+            "--create-categories",
+            action="store_true",
+            help="Create categories that do not exist yet",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Validate and count without writing"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rows = importer.read_rows(options["path"], options["format"])
+            places = importer.PlaceImporter(
+                chunk_size=options["chunk_size"],
+                create_categories=options["create_categories"],
+                dry_run=options["dry_run"],
+            )
+            stats = places.run(rows)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for line, message in stats.errors:
+            self.stderr.write(self.style.WARNING(f"line {line}: {message}"))
+        if stats.invalid > len(stats.errors):
+            self.stderr.write(f"... and {stats.invalid - len(stats.errors)} more invalid rows")
+        prefix = "Would import" if options["dry_run"] else "✅ Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix} {stats.rows - stats.invalid:,} of {stats.rows:,} rows "
+                f"({stats.created:,} created, {stats.updated:,} updated, "
+                f"{stats.invalid:,} invalid) in {stats.seconds:.2f}s, "
+                f"{stats.rate:,.0f} rows/s"
+            )
+        )
+        if places.new_categories:
+            verb = "Would create" if options["dry_run"] else "Created"
+            self.stdout.write(f"{verb} categories: {', '.join(places.new_categories)}")
+        if stats.created + stats.updated and not options["dry_run"]:
+            self.stdout.write("Run process_images to build image variants for new places")
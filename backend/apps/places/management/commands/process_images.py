@@ -0,0 +1,85 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.places import images
+
+MODELS = {"places": "places.Place", "tours": "tours.Tour"}
+
+
+def _init_worker():
+    # При запуске через spawn дочерний процесс настраивает Django сам
+    django.setup()
+
+
+def _generate(source, placeholder_only):
+    try:
+        if placeholder_only:
+            return (None, images.generate_placeholder(source)), None
+        return images.generate_variants(source), None
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate resized image variants and LQIP placeholders for existing "
+        "place and tour images"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--models", nargs="+", choices=sorted(MODELS), default=sorted(MODELS)
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--force", action="store_true", help="Regenerate up-to-date variants too"
+        )
+
+    def handle(self, *args, **options):
+        for name in options["models"]:
+            model = apps.get_model(MODELS[name])
+            rows = (
+                model.objects.exclude(image="")
+                .exclude(image=None)
+                .order_by("pk")
+                .values_list("pk", "image", "image_variants", "image_placeholder")
+            )
+            todo = []
+            for pk, image, variants, placeholder in rows:
+                if options["force"] or (variants or {}).get("source") != image:
+                    todo.append((pk, image, variants, False))
+                elif not placeholder:
+                    # Копии готовы — нужно только превью
+                    todo.append((pk, image, variants, True))
+            self.stdout.write(f"{name}: {len(todo)} images to process")
+            if todo:
+                self._process(model, todo, options["workers"])
+
+    def _process(self, model, todo, workers):
+        # Соединения с БД не должны наследоваться дочерними процессами
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {
+                pool.submit(_generate, item[1], item[3]): item for item in todo
+            }
+            for future in as_completed(futures):
+                pk, image, old, placeholder_only = futures[future]
+                result, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"  #{pk} {image}: {error}")
+                    continue
+                # Запись в БД — только из основного процесса
+                variants, placeholder = result
+                if placeholder_only:
+                    images.save_placeholder(model, pk, image, placeholder)
+                else:
+                    images.save_variants(model, pk, image, variants, placeholder, old)
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f"✅ Processed {done} images, {failed} failed"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.places import clusters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed map cluster pyramid for places"
+
+    def handle(self, *args, **options):
+        count = clusters.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"✅ Built {count} cluster cells"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.places import leaderboards
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-category place leaderboards (top rated, hidden gems)"
+
+    def handle(self, *args, **options):
+        count = leaderboards.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"✅ Built {count} leaderboard entries"))
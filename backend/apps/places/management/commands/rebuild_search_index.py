@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.places import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for places"
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError("Full-text index requires SQLite FTS5")
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {count} places"))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+def fill_grid_cells(apps, schema_editor):
+    from apps.places.geo import grid_cell
+
+    Place = apps.get_model("places", "Place")
+    places = list(
+        Place.objects.exclude(latitude=None).exclude(longitude=None).only(
+            "id", "latitude", "longitude"
+        )
+    )
+    for place in places:
+        place.grid_cell = grid_cell(place.latitude, place.longitude)
+    Place.objects.bulk_update(places, ["grid_cell"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='description',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='grid_cell',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_grid_cells, migrations.RunPython.noop),
+    ]
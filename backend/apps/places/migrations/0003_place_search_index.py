@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+import apps.places.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    from apps.places import search
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        search.create_index(cursor)
+    search.rebuild_index()
+
+
+def drop_search_index(apps, schema_editor):
+    from apps.places import search
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {search.FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0002_place_description_grid_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaceSearchIndex',
+            fields=[
+                ('place', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='places.place')),
+                ('document', apps.places.search.SearchDocumentField(db_column='places_placesearchindex')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'places_placesearchindex',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
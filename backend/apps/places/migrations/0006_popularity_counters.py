@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_favorite_counts(apps, schema_editor):
+    Place = apps.get_model("places", "Place")
+    Favorite = apps.get_model("places", "Favorite")
+    counts = (
+        Favorite.objects.filter(place=OuterRef("pk"))
+        .order_by()
+        .values("place")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Place.objects.update(favorite_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0005_place_cluster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='favorite_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_favorite_counts, migrations.RunPython.noop),
+    ]
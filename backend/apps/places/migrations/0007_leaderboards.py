@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_leaderboards(apps, schema_editor):
+    from apps.places.leaderboards import rebuild
+
+    rebuild(apps.get_model("places", "Place"), apps.get_model("places", "LeaderboardEntry"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0006_popularity_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('top_rated', 'Лучшие по рейтингу'), ('hidden_gems', 'Скрытые жемчужины')], max_length=16)),
+                ('rank', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'ordering': ['category', 'board', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['category', '-rating', '-id'], name='place_category_rating_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='places.category'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='place',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='places.place'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('category', 'board', 'rank'), name='unique_leaderboard_rank'),
+        ),
+        migrations.RunPython(build_leaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0008_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
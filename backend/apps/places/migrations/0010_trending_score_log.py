@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import F, Value
+from django.db.models.functions import Log, Power
+
+
+# trending_score хранится в логарифмах (см. apps/places/popularity.py)
+def to_log(apps, schema_editor):
+    Place = apps.get_model("places", "Place")
+    Place.objects.filter(trending_score__gt=0).update(
+        trending_score=Log(Value(2.0), F("trending_score"))
+    )
+
+
+def from_log(apps, schema_editor):
+    Place = apps.get_model("places", "Place")
+    Place.objects.exclude(trending_score=0).update(
+        trending_score=Power(Value(2.0), F("trending_score"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0009_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_log, from_log),
+    ]
@@ -3,12 +3,17 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
+from .geo import grid_cell
+from .popularity import PopularityCounters
+from .search import FTS_TABLE, SearchDocumentField
+
 User = get_user_model()
 
 
-class Place(models.Model):
+class Place(PopularityCounters):
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, null=True, blank=True)
+    description = models.TextField(blank=True)
     category = models.ForeignKey(
         "Category", on_delete=models.CASCADE, null=True, related_name="places"
     )
@@ -19,9 +24,15 @@ class Place(models.Model):
     longitude = models.DecimalField(
         max_digits=9, decimal_places=6, null=True, blank=True
     )
+    # Ячейка сетки пространственного индекса, вычисляется из координат в save()
+    grid_cell = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
     image = models.ImageField(
         _("Изображение"), upload_to="zones/", blank=True, null=True
     )
+    # Уменьшенные копии изображения (см. images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Размытое превью для показа до загрузки изображения (data URI)
+    image_placeholder = models.TextField(blank=True, editable=False)
     rating = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
     price_range = models.CharField(
         max_length=8, blank=True, help_text="Напр., '$', '$$'"
@@ -33,10 +44,70 @@ class Place(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Ключ курсорной пагинации (см. pagination.KeysetPagination)
+            models.Index(fields=["-created_at", "-id"], name="place_created_id_idx"),
+            # Пересчёт топов категории (см. leaderboards.py)
+            models.Index(
+                fields=["category", "-rating", "-id"], name="place_category_rating_idx"
+            ),
+        ]
+
+    # Значения из БД, которые сигналы сравнивают с новыми (кластеры и т.п.)
+    TRACKED_FIELDS = ("latitude", "longitude", "category_id", "rating", "is_hidden_gems")
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_values()
+        return instance
+
+    def _remember_loaded_values(self):
+        self._loaded_values = {
+            name: self.__dict__[name] for name in self.TRACKED_FIELDS if name in self.__dict__
+        }
+
+    @property
+    def loaded_values(self):
+        """Отслеживаемые поля в том виде, в каком они были прочитаны/сохранены"""
+        return getattr(self, "_loaded_values", {})
+
+    def _load_missing_loaded_values(self):
+        """
+        Объект из .only()/.defer() помнит не все отслеживаемые поля.
+        Поля, присвоенные после загрузки, дочитываем из БД; отложенные
+        координаты подгружаются при вычислении grid_cell и не менялись.
+        """
+        if self._state.adding or self.pk is None:
+            return
+        loaded = self.__dict__.setdefault("_loaded_values", {})
+        missing = [
+            name for name in self.TRACKED_FIELDS
+            if name not in loaded and name in self.__dict__
+        ]
+        if missing:
+            row = type(self)._base_manager.filter(pk=self.pk).values(*missing).first()
+            if row is not None:
+                loaded.update(row)
+
+    def save(self, *args, **kwargs):
+        self._load_missing_loaded_values()
+        deferred = self.get_deferred_fields()
+        self.grid_cell = grid_cell(self.latitude, self.longitude)
+        for name in ("latitude", "longitude"):
+            if name in deferred:
+                self._loaded_values.setdefault(name, self.__dict__[name])
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            {"latitude", "longitude"} & set(update_fields)
+        ):
+            kwargs["update_fields"] = {*update_fields, "grid_cell"}
+        super().save(*args, **kwargs)
+        self._remember_loaded_values()
+
 
 class Favorite(models.Model):
     user = models.ForeignKey(
@@ -49,11 +120,17 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         related_name="favorites",
     )
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["user", "place"], name="unique_favorite")
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="favorite_user_created_idx"
+            ),
+        ]
         ordering = ["id"]
 
     def __str__(self):
@@ -72,3 +149,87 @@ class Category(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class DataVersion(models.Model):
+    """
+    Счётчик версии набора данных каталога (см. versioning.py). Хранится в
+    БД, чтобы все воркеры видели одно значение, а увеличение было атомарным.
+    """
+
+    name = models.CharField(max_length=32, primary_key=True)
+    version = models.BigIntegerField()
+    # Unix-время последнего изменения
+    modified = models.FloatField()
+
+    def __str__(self):
+        return f"{self.name}={self.version}"
+
+
+class PlaceSearchIndex(models.Model):
+    """Строка полнотекстового индекса FTS5 (см. search.py), только для чтения"""
+
+    place = models.OneToOneField(
+        Place,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="search_index",
+    )
+    document = SearchDocumentField(db_column=FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
+class PlaceCluster(models.Model):
+    """
+    Предрасчитанный кластер мест: ячейка сетки Web Mercator на уровне zoom
+    (см. clusters.py). Обновляется сигналами Place.
+    """
+
+    zoom = models.PositiveSmallIntegerField()
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+    lat_sum = models.FloatField(default=0)
+    lon_sum = models.FloatField(default=0)
+    # {category_id: количество мест}
+    categories = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["zoom", "cell_x", "cell_y"], name="unique_place_cluster_cell"
+            )
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Позиция места в материализованном топе категории (см. leaderboards.py).
+    Обновляется сигналами Place.
+    """
+
+    BOARD_CHOICES = [
+        ("top_rated", _("Лучшие по рейтингу")),
+        ("hidden_gems", _("Скрытые жемчужины")),
+    ]
+
+    board = models.CharField(max_length=16, choices=BOARD_CHOICES)
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="leaderboard_entries"
+    )
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["category", "board", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["category", "board", "rank"], name="unique_leaderboard_rank"
+            )
+        ]
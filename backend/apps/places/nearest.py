@@ -0,0 +1,188 @@
+import heapq
+import threading
+
+import numpy as np
+
+from . import versioning
+from .geo import EARTH_RADIUS_KM
+
+LEAF_SIZE = 32
+MAX_TREES = 64  # деревьев по комбинациям фильтров в одном снимке
+UNKNOWN = object()  # категория, которой нет в БД
+
+
+def _to_unit_vectors(lat, lon):
+    """Широта/долгота в градусах -> точки на единичной сфере (n, 3)"""
+    phi = np.radians(lat)
+    lmb = np.radians(lon)
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lmb), cos_phi * np.sin(lmb), np.sin(phi)))
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Векторизованный гаверсинус от точки до массивов координат, км"""
+    phi = np.radians(lat)
+    phis = np.radians(lats)
+    a = (
+        np.sin((phis - phi) / 2) ** 2
+        + np.cos(phi) * np.cos(phis) * np.sin(np.radians(lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+class KDTree:
+    """
+    KD-дерево по точкам на единичной сфере. Хордовое расстояние монотонно
+    с расстоянием по большому кругу, поэтому порядок соседей совпадает.
+    """
+
+    def __init__(self, points):
+        self.points = points
+        self.index = np.arange(len(points))
+        # Узел: (lo, hi, box_min, box_max, left, right); left/right = -1 у листа
+        self.nodes = []
+        if len(points):
+            self._build(0, len(points))
+
+    def _build(self, lo, hi):
+        idx = self.index[lo:hi]
+        pts = self.points[idx]
+        box_min, box_max = pts.min(axis=0), pts.max(axis=0)
+        node_id = len(self.nodes)
+        # Границы храним кортежами: для 3 измерений чистый Python быстрее numpy
+        self.nodes.append([lo, hi, tuple(box_min.tolist()), tuple(box_max.tolist()), -1, -1])
+        if hi - lo <= LEAF_SIZE:
+            return node_id
+
+        dim = int(np.argmax(box_max - box_min))
+        mid = (hi - lo) // 2
+        order = np.argpartition(pts[:, dim], mid)
+        self.index[lo:hi] = idx[order]
+        self.nodes[node_id][4] = self._build(lo, lo + mid)
+        self.nodes[node_id][5] = self._build(lo + mid, hi)
+        return node_id
+
+    def query(self, point, k):
+        """Позиции k ближайших точек (по возрастанию хордового расстояния)"""
+        if not self.nodes or k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        px, py, pz = point.tolist()
+        best = []  # max-куча (-dist2, pos)
+        queue = [(0.0, 0)]
+        while queue:
+            box_dist2, node_id = heapq.heappop(queue)
+            if len(best) == k and box_dist2 > -best[0][0]:
+                break
+            lo, hi, _, _, left, right = self.nodes[node_id]
+            if left == -1:
+                positions = self.index[lo:hi]
+                dist2 = ((self.points[positions] - point) ** 2).sum(axis=1)
+                for d, pos in zip(dist2.tolist(), positions.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, pos))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, pos))
+                continue
+            for child in (left, right):
+                (x0, y0, z0), (x1, y1, z1) = self.nodes[child][2], self.nodes[child][3]
+                dx = x0 - px if px < x0 else (px - x1 if px > x1 else 0.0)
+                dy = y0 - py if py < y0 else (py - y1 if py > y1 else 0.0)
+                dz = z0 - pz if pz < z0 else (pz - z1 if pz > z1 else 0.0)
+                heapq.heappush(queue, (dx * dx + dy * dy + dz * dz, child))
+
+        return np.array([pos for _, pos in sorted(best, reverse=True)], dtype=np.int64)
+
+
+class _Snapshot:
+    """Координаты всех мест и деревья по комбинациям фильтров"""
+
+    def __init__(self, version):
+        from .models import Category, Place
+
+        self.version = version
+        rows = list(
+            Place.objects.exclude(latitude=None)
+            .exclude(longitude=None)
+            .order_by()
+            .values_list("id", "latitude", "longitude", "category_id", "is_hidden_gems")
+        )
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.lat = np.array([float(r[1]) for r in rows], dtype=np.float64)
+        self.lon = np.array([float(r[2]) for r in rows], dtype=np.float64)
+        self.category = np.array([r[3] or 0 for r in rows], dtype=np.int64)
+        self.hidden = np.array([r[4] for r in rows], dtype=bool)
+        self.points = _to_unit_vectors(self.lat, self.lon)
+        self.category_slugs = dict(Category.objects.values_list("slug", "id"))
+        self.category_ids = set(self.category_slugs.values())
+        self.trees = {}
+        self.lock = threading.Lock()
+
+    def resolve_category(self, category):
+        """id существующей категории по slug или id, иначе UNKNOWN"""
+        if category in self.category_slugs:
+            return self.category_slugs[category]
+        try:
+            category_id = int(category)
+        except ValueError:
+            return UNKNOWN
+        return category_id if category_id in self.category_ids else UNKNOWN
+
+    def _build_tree(self, category_id, hidden):
+        mask = np.ones(len(self.ids), dtype=bool)
+        if category_id is not None:
+            mask &= self.category == category_id
+        if hidden is not None:
+            mask &= self.hidden == hidden
+        subset = np.flatnonzero(mask)
+        return subset, KDTree(self.points[subset])
+
+    def tree(self, category_id, hidden):
+        key = (category_id, hidden)
+        if key not in self.trees:
+            with self.lock:
+                if key not in self.trees:
+                    if len(self.trees) >= MAX_TREES:
+                        # Кэш полон — дерево строится только для этого запроса
+                        return self._build_tree(category_id, hidden)
+                    self.trees[key] = self._build_tree(category_id, hidden)
+        return self.trees[key]
+
+
+class NearestEngine:
+    """
+    Поиск k ближайших мест в памяти процесса. Дерево перестраивается
+    лениво, когда сигналы Place увеличили версию "places".
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        version = versioning.get_version("places")
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = self._snapshot = _Snapshot(version)
+        return snapshot
+
+    def nearest(self, lat, lon, k, category=None, hidden=None):
+        """Список (place_id, distance_km) по возрастанию расстояния"""
+        snapshot = self._current()
+        category_id = None if category is None else snapshot.resolve_category(category)
+        if category_id is UNKNOWN:
+            # Неизвестная категория не создаёт дерево в кэше
+            return []
+        subset, tree = snapshot.tree(category_id, hidden)
+
+        point = _to_unit_vectors(np.array([lat]), np.array([lon]))[0]
+        positions = subset[tree.query(point, k)]
+        distances = haversine_km(lat, lon, snapshot.lat[positions], snapshot.lon[positions])
+        order = np.argsort(distances, kind="stable")
+        return list(zip(snapshot.ids[positions][order].tolist(), distances[order].tolist()))
+
+
+engine = NearestEngine()
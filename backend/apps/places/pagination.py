@@ -1 +1,153 @@
+import base64
+import json
+from datetime import datetime
 
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная пагинация по ключу (created_at, id), от новых к старым.
+    Следующая страница — условие "строго после последней строки" по индексу
+    (created_at, id), поэтому глубокие страницы стоят как первая, а COUNT(*)
+    не выполняется. Если у queryset своя сортировка (релевантность поиска,
+    расстояние), курсор хранит смещение внутри этой выдачи.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if not queryset.query.order_by:
+            queryset = queryset.order_by(*self.ordering)
+        keyset = tuple(queryset.query.order_by) == self.ordering
+        if cursor is not None and keyset == ("o" in cursor):
+            # Курсор от выдачи с другой сортировкой
+            raise NotFound(self.invalid_cursor_message)
+        if keyset:
+            return self._paginate_keyset(queryset, cursor)
+        return self._paginate_offset(queryset, cursor)
+
+    def _paginate_keyset(self, queryset, cursor):
+        reverse = bool(cursor and cursor.get("r"))
+        if cursor:
+            # Ведущее условие по created_at даёт поиск диапазона по индексу
+            created_at = datetime.fromisoformat(cursor["c"])
+            pk = cursor["i"]
+            if reverse:
+                position = Q(created_at__gte=created_at) & (
+                    Q(created_at__gt=created_at) | Q(id__gt=pk)
+                )
+                queryset = queryset.filter(position).order_by("created_at", "id")
+            else:
+                position = Q(created_at__lte=created_at) & (
+                    Q(created_at__lt=created_at) | Q(id__lt=pk)
+                )
+                queryset = queryset.filter(position)
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_cursor = self.previous_cursor = None
+        if rows:
+            first, last = rows[0], rows[-1]
+            if has_more or reverse:
+                self.next_cursor = {"c": last.created_at.isoformat(), "i": last.pk}
+            if cursor and (has_more or not reverse):
+                self.previous_cursor = {
+                    "c": first.created_at.isoformat(),
+                    "i": first.pk,
+                    "r": 1,
+                }
+        return rows
+
+    def _paginate_offset(self, queryset, cursor):
+        offset = cursor.get("o", 0) if cursor else 0
+        rows = list(queryset[offset : offset + self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.next_cursor = {"o": offset + self.page_size} if has_more else None
+        self.previous_cursor = (
+            {"o": max(0, offset - self.page_size)} if offset > 0 else None
+        )
+        return rows[: self.page_size]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            if not isinstance(cursor, dict):
+                raise ValueError
+            # Значения приводятся к типам, с которыми работают _paginate_*
+            if "o" in cursor:
+                cursor = {"o": int(cursor["o"])}
+                if cursor["o"] < 0:
+                    raise ValueError
+            else:
+                datetime.fromisoformat(cursor["c"])
+                cursor = {
+                    "c": cursor["c"],
+                    "i": int(cursor["i"]),
+                    "r": bool(cursor.get("r")),
+                }
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, cursor):
+        if cursor is None:
+            return None
+        encoded = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        return self.encode_cursor(self.next_cursor)
+
+    def get_previous_link(self):
+        if self.previous_cursor == {"o": 0}:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import versioning
+
+# Кэш готовых словарей PlaceSerializer. Запись хранит штамп
+# (updated_at места, версия категорий, хост запроса) — несовпадение штампа
+# считается промахом. Сохранение/удаление места удаляет его запись,
+# изменение категории увеличивает версию "categories".
+
+DEFAULTS = {
+    # "locmem" — LRU в памяти процесса; "django" — общий бэкенд CACHES[ALIAS]
+    # (FileBasedCache / DatabaseCache), чтобы воркеры делили записи
+    "BACKEND": "locmem",
+    "ALIAS": "place_payloads",
+    "MAX_ENTRIES": 10000,
+}
+
+
+class LocMemLRUBackend:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def set_many(self, mapping):
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """Обёртка над кэшем Django; размер ограничивает его OPTIONS["MAX_ENTRIES"]"""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def set_many(self, mapping):
+        self.cache.set_many(mapping, None)
+
+    def delete_many(self, keys):
+        self.cache.delete_many(keys)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = {**DEFAULTS, **getattr(settings, "PLACE_PAYLOAD_CACHE", {})}
+                if options["BACKEND"] == "django":
+                    _backend = DjangoCacheBackend(options["ALIAS"])
+                else:
+                    _backend = LocMemLRUBackend(options["MAX_ENTRIES"])
+    return _backend
+
+
+def _key(pk):
+    return f"place-payload:{pk}"
+
+
+def _stamp(instance, categories_version, host):
+    updated_at = instance.updated_at.isoformat() if instance.updated_at else None
+    return updated_at, categories_version, host
+
+
+def _categories_version(serializer):
+    known = getattr(serializer.context.get("view"), "data_versions", {})
+    if "categories" in known:
+        return known["categories"][0]
+    return versioning.get_version("categories")
+
+
+def represent_many(serializer, instances):
+    """
+    Словари для instances: из кэша, а промахи — через
+    serializer.build_representation с последующей записью в кэш.
+    Поля serializer.volatile_fields (зависят от запроса) не кэшируются.
+    """
+    instances = list(instances)
+    if not instances:
+        return []
+    backend = get_backend()
+    categories_version = _categories_version(serializer)
+    request = serializer.context.get("request")
+    host = request.get_host() if request is not None else None
+
+    cached = backend.get_many([_key(obj.pk) for obj in instances])
+    result, misses = [], {}
+    for obj in instances:
+        stamp = _stamp(obj, categories_version, host)
+        entry = cached.get(_key(obj.pk))
+        if entry is not None and entry[0] == stamp:
+            data = dict(entry[1])
+            data.update(serializer.volatile_representation(obj))
+        else:
+            data = serializer.build_representation(obj)
+            misses[_key(obj.pk)] = (
+                stamp,
+                {k: v for k, v in data.items() if k not in serializer.volatile_fields},
+            )
+        result.append(data)
+    if misses:
+        backend.set_many(misses)
+    return result
+
+
+def invalidate(pk):
+    get_backend().delete_many([_key(pk)])
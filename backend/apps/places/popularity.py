@@ -0,0 +1,304 @@
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Greatest, Least, Log, Power
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import versioning
+
+logger = logging.getLogger(__name__)
+
+# Счётчики популярности с отложенной записью. Просмотры и добавления в
+# избранное копятся в памяти процесса и сбрасываются в БД пачкой UPDATE
+# раз в FLUSH_INTERVAL секунд или при FLUSH_SIZE объектов в буфере —
+# при падении процесса теряется не больше одного интервала.
+#
+# trending_score — log2 суммы весов событий, умноженных на 2 ** (t / HALF_LIFE),
+# где t отсчитывается от EPOCH. Такой счёт только растёт, а порядок по нему
+# совпадает с порядком экспоненциально затухающей популярности, поэтому
+# топ читается обычным индексом по trending_score. В логарифмах счёт растёт
+# на 52 в год и не переполняется; 0 — нет событий (вклад 2 ** -t пренебрежим).
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+HALF_LIFE = 7 * 24 * 3600  # неделя
+VIEW_WEIGHT = 1.0
+FAVORITE_WEIGHT = 5.0
+UPDATE_BATCH = 500  # ограничение SQLite на число параметров запроса
+
+
+COUNTER_FIELDS = ("view_count", "favorite_count", "trending_score")
+
+
+class PopularityCounters(models.Model):
+    """Поля счётчиков; пишутся только через PopularityBuffer.flush()"""
+
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    favorite_count = models.IntegerField(default=0, editable=False)
+    trending_score = models.FloatField(default=0, editable=False, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """
+        Сохранение уже существующего объекта без update_fields не пишет
+        счётчики (их значения в объекте могли устареть) и отложенные поля
+        .only()/.defer(). Это UPDATE: если строку уже удалили, Django
+        поднимет DatabaseError, а не вставит объект заново.
+        """
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+def _config(name, default):
+    return getattr(settings, "POPULARITY", {}).get(name, default)
+
+
+NO_SCORE = float("-inf")
+
+
+def _age(now=None):
+    return ((now or time.time()) - EPOCH) / HALF_LIFE
+
+
+def log_weight(weight, now=None):
+    """Вклад события веса weight в момент now (в логарифмах)"""
+    return math.log2(weight) + _age(now) if weight > 0 else NO_SCORE
+
+
+def log_add(a, b):
+    """log2(2 ** a + 2 ** b) без переполнения"""
+    if a < b:
+        a, b = b, a
+    if b == NO_SCORE:
+        return a
+    return a + math.log2(1.0 + 2.0 ** (b - a))
+
+
+def decayed(score, now=None):
+    """Популярность с затуханием в момент now по trending_score"""
+    return 2.0 ** (score - _age(now))
+
+
+def _empty_entry():
+    return [0, 0, NO_SCORE]
+
+
+class PopularityBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (app_label.Model, поле, значение) -> [просмотры, избранное, прирост счёта]
+        self._pending = defaultdict(_empty_entry)
+        self._worker = None
+        self._worker_pid = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def record_view(self, model, value, field="pk"):
+        """
+        Просмотр объекта; field — уникальное поле, по которому он найден
+        (slug позволяет засчитать просмотр без запроса к БД, в т.ч. на 304)
+        """
+        self._record(model, field, value, views=1, weight=VIEW_WEIGHT)
+
+    def record_favorite(self, model, value, delta=1, field="pk"):
+        # Удаление из избранного уменьшает счётчик, но не «тренд»
+        weight = FAVORITE_WEIGHT if delta > 0 else 0.0
+        self._record(model, field, value, favorites=delta, weight=weight)
+
+    def _record(self, model, field, value, views=0, favorites=0, weight=0.0):
+        if field == "pk" and isinstance(value, str) and value.isdigit():
+            value = int(value)  # pk из URL
+        key = (model._meta.label, field, value)
+        # Событие из откатившейся транзакции не засчитывается
+        transaction.on_commit(lambda: self._add(key, views, favorites, weight))
+
+    def _add(self, key, views, favorites, weight):
+        with self._lock:
+            entry = self._pending[key]
+            entry[0] += views
+            entry[1] += favorites
+            entry[2] = log_add(entry[2], log_weight(weight))
+            full = len(self._pending) >= _config("FLUSH_SIZE", 1000)
+        self._ensure_worker()
+        if full:
+            self.flush()
+
+    def _ensure_worker(self):
+        interval = _config("FLUSH_INTERVAL", 10)
+        # После fork воркера поток родителя в дочернем процессе не работает
+        if self._worker_pid == os.getpid() or not interval:
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._worker_pid = os.getpid()
+                self._worker = threading.Thread(
+                    target=self._run, args=(interval,), name="popularity-flush", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Записывает накопленные приращения; возвращает число объектов"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(_empty_entry)
+        if not pending:
+            return 0
+        groups = defaultdict(list)
+        for (label, field, value), entry in pending.items():
+            groups[(label, field)].append((value, *entry))
+        try:
+            for (label, field), rows in groups.items():
+                model = apps.get_model(label)
+                for start in range(0, len(rows), UPDATE_BATCH):
+                    _update(model, field, rows[start : start + UPDATE_BATCH])
+        except Exception:
+            logger.exception("popularity flush failed, keeping %d entries", len(pending))
+            self._restore(pending)
+            return 0
+        if any(entry[1] for entry in pending.values()):
+            # favorite_count отдаётся в ответах API — их ETag должен смениться
+            versioning.bump("favorites")
+        return len(pending)
+
+    def _restore(self, pending):
+        with self._lock:
+            for key, (views, favorites, score) in pending.items():
+                entry = self._pending[key]
+                entry[0] += views
+                entry[1] += favorites
+                entry[2] = log_add(entry[2], score)
+
+    def discard(self):
+        with self._lock:
+            self._pending.clear()
+
+
+def _case(field, rows, index, output_field):
+    return Case(
+        *(When(**{field: row[0]}, then=Value(row[index])) for row in rows if row[index]),
+        default=Value(0),
+        output_field=output_field,
+    )
+
+
+def _log_add_expression(field, rows):
+    """trending_score = log2(2 ** trending_score + 2 ** прирост) в SQL"""
+    scored = [row for row in rows if row[3] != NO_SCORE]
+    if not scored:
+        return F("trending_score")
+    increment = Case(
+        *(When(**{field: row[0]}, then=Value(row[3])) for row in scored),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    high = Greatest(F("trending_score"), increment)
+    low = Least(F("trending_score"), increment)
+    return Case(
+        When(
+            **{f"{field}__in": [row[0] for row in scored]},
+            then=high + Log(Value(2.0), Value(1.0) + Power(Value(2.0), low - high)),
+        ),
+        default=F("trending_score"),
+        output_field=FloatField(),
+    )
+
+
+def _update(model, field, rows):
+    """Один UPDATE ... SET x = x + CASE id WHEN ... END на пачку объектов"""
+    model.objects.filter(**{f"{field}__in": [row[0] for row in rows]}).update(
+        view_count=F("view_count") + _case(field, rows, 1, IntegerField()),
+        favorite_count=F("favorite_count") + _case(field, rows, 2, IntegerField()),
+        trending_score=_log_add_expression(field, rows),
+    )
+
+
+def trending(qs, limit):
+    """
+    [(объект, счётчики)] qs по убыванию затухающей популярности.
+    Счётчики читаются аннотациями — qs может быть ограничен через .only()
+    """
+    now = time.time()
+    qs = qs.annotate(
+        popularity_views=F("view_count"),
+        popularity_favorites=F("favorite_count"),
+        popularity_score=F("trending_score"),
+    ).order_by("-trending_score", "-view_count", "-id")
+    return [
+        (
+            item,
+            {
+                "view_count": item.popularity_views,
+                "favorite_count": item.popularity_favorites,
+                "trending": round(decayed(item.popularity_score, now), 4),
+            },
+        )
+        for item in qs[:limit]
+    ]
+
+
+class PopularityMixin:
+    """
+    Для viewset: засчитывает просмотры retrieve (включая 304) и добавляет
+    GET .../trending/?limit= — популярное с затуханием, с фильтрами списка.
+    Ставится перед ConditionalGetMixin.
+    """
+
+    trending_limit = 20
+    trending_max_limit = 100
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            buffer.record_view(self.queryset.model, kwargs[lookup], field=self.lookup_field)
+        return response
+
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.trending_limit))
+        except ValueError:
+            raise ValidationError({"detail": "limit must be an integer"})
+        limit = max(1, min(limit, self.trending_max_limit))
+        found = trending(self.filter_queryset(self.get_queryset()), limit)
+        data = self.get_serializer([item for item, _ in found], many=True).data
+        for row, (_, counters) in zip(data, found):
+            row.update(counters)
+        return Response(data)
+
+
+buffer = PopularityBuffer()
+atexit.register(buffer.flush)
@@ -0,0 +1,128 @@
+import re
+
+from django.db import connection, models
+from django.db.models import Lookup, Q
+
+# Полнотекстовый индекс мест: виртуальная таблица SQLite FTS5, rowid = Place.id.
+# Синхронизируется сигналами Place/Category, перестраивается командой
+# rebuild_search_index.
+FTS_TABLE = "places_placesearchindex"
+
+# Веса bm25 для колонок name, description, address, category
+BM25_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытая колонка FTS5 с именем таблицы — цель оператора MATCH"""
+
+
+@SearchDocumentField.register_lookup
+class FullTextMatch(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+def is_available():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(text):
+    """Пользовательский ввод -> запрос FTS5: все слова, каждое как префикс"""
+    tokens = _TOKEN_RE.findall(text)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_places(qs, text):
+    """Фильтрует qs по тексту и сортирует по релевантности bm25, затем по рейтингу"""
+    if not is_available():
+        return qs.filter(
+            Q(name__icontains=text)
+            | Q(description__icontains=text)
+            | Q(address__icontains=text)
+            | Q(category__name__icontains=text)
+        )
+    match = build_match_query(text)
+    if not match:
+        return qs.none()
+    return qs.filter(search_index__document__match=match).order_by(
+        "search_index__rank", "-rating", "-id"
+    )
+
+
+def create_index(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, description, address, category, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    cursor.execute(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', %s)",
+        [f"bm25({weights})"],
+    )
+
+
+_INSERT_SELECT = (
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description, address, category) "
+    "SELECT p.id, p.name, p.description, p.address, COALESCE(c.name, '') "
+    "FROM places_place p LEFT JOIN places_category c ON c.id = p.category_id"
+)
+
+
+def rebuild_index():
+    """Полностью перестраивает индекс одним INSERT ... SELECT"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(_INSERT_SELECT)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def index_place(place):
+    if not is_available():
+        return
+    category = place.category.name if place.category_id else ""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [place.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description, address, category) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [place.pk, place.name, place.description, place.address, category],
+        )
+
+
+def index_places(place_ids):
+    """Переиндексирует места place_ids: один DELETE и один INSERT ... SELECT"""
+    if not is_available() or not place_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(place_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", list(place_ids)
+        )
+        cursor.execute(f"{_INSERT_SELECT} WHERE p.id IN ({placeholders})", list(place_ids))
+
+
+def remove_place(place_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [place_id])
+
+
+def reindex_category(category):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {FTS_TABLE} SET category = %s WHERE rowid IN "
+            "(SELECT id FROM places_place WHERE category_id = %s)",
+            [category.name, category.pk],
+        )
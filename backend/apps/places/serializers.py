@@ -1,15 +1,52 @@
 from dataclasses import field
+from django.core.files.storage import default_storage
+from django.db import models
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from . import payload_cache
+from .fieldsets import SparseFieldsetSerializerMixin
 from .models import Favorite, Place, Category
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class SrcsetField(serializers.Field):
+    """
+    image_variants -> {"webp": "url 320w, url 640w", "jpeg": ...}
+    для <source srcset> и <img srcset>
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "image_variants")
+        super().__init__(read_only=True, **kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get("request")
+        srcset = {}
+        for width, formats in sorted(
+            (variants or {}).get("sizes", {}).items(), key=lambda item: int(item[0])
+        ):
+            for fmt, name in formats.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                srcset.setdefault(fmt, []).append(f"{url} {width}w")
+        return {fmt: ", ".join(items) for fmt, items in srcset.items()}
+
+
+class CategorySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name", "slug", "icon"]
 
 
-class PlaceSerializer(serializers.ModelSerializer):
+class PlaceListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        if self.child.sparse:
+            return super().to_representation(data)
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return payload_cache.represent_many(self.child, iterable)
+
+
+class PlaceSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # При чтении — вложенный сериализатор категории.
     # При создании/обновлении можно передавать category_id.
     category = CategorySerializer(read_only=True)
@@ -19,6 +56,14 @@ class PlaceSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False,
     )
+    # Заполняется только при гео-запросе (?lat&lon&radius)
+    distance_km = serializers.FloatField(read_only=True)
+    # Аннотации PlaceViewSet; вне его поля отсутствуют в ответе
+    is_favorited = serializers.BooleanField(read_only=True)
+    # Денормализованный счётчик (см. popularity.py): отстаёт от таблицы
+    # Favorite не больше чем на интервал сброса буфера
+    favorites_count = serializers.IntegerField(source="favorite_count", read_only=True)
+    srcset = SrcsetField()
 
     class Meta:
         model = Place
@@ -32,23 +77,45 @@ class PlaceSerializer(serializers.ModelSerializer):
             "address",
             "latitude",
             "longitude",
-            "images",
+            "image",
+            "srcset",
+            "image_placeholder",
             "rating",
             "price_range",
-            "is_hidden_gem",
+            "is_hidden_gems",
+            "distance_km",
+            "is_favorited",
+            "favorites_count",
             "created_at",
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
+        list_serializer_class = PlaceListSerializer
+
+    expandable_fields = {"category": False}
+    # Поля, зависящие от запроса: не попадают в кэш payload_cache
+    volatile_fields = ("distance_km", "is_favorited", "favorites_count")
+
+    def to_representation(self, instance):
+        if self.sparse:
+            # Экземпляр загружен через .only() — кэш полных словарей не подходит
+            return self.build_representation(instance)
+        return payload_cache.represent_many(self, [instance])[0]
 
-    def validate_images(self, value):
-        # Простая валидация: images должен быть списком строк (URL-ов)
-        if value is None:
-            return []
-        if not isinstance(value, list):
-            raise serializers.ValidationError("images must be a list of URLs")
-        # Можно добавить проверку каждого URL-а
-        return value
+    def build_representation(self, instance):
+        """Сериализация без кэша"""
+        return super().to_representation(instance)
+
+    def volatile_representation(self, instance):
+        data = {}
+        for name in self.volatile_fields:
+            field = self.fields[name]
+            try:
+                value = field.get_attribute(instance)
+            except SkipField:
+                continue
+            data[name] = None if value is None else field.to_representation(value)
+        return data
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -70,5 +137,22 @@ class FavoriteSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        user = self.context["request"].user
-        return Favorite.objects.create(user=user, **validated_data)
+        # Пользователя может передать и view через serializer.save(user=...)
+        validated_data.setdefault("user", self.context["request"].user)
+        return Favorite.objects.create(**validated_data)
+
+
+class FavoriteBulkSerializer(serializers.Serializer):
+    """Список id мест для пакетного добавления/удаления избранного"""
+
+    MAX_IDS = 500
+
+    place_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS,
+    )
+
+    def validate_place_ids(self, value):
+        # Дубликаты убираются с сохранением порядка
+        return list(dict.fromkeys(value))
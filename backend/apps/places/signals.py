@@ -0,0 +1,125 @@
+from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from . import clusters, images, leaderboards, payload_cache, search, tiles, versioning
+from .popularity import buffer as popularity
+from .autocomplete import index as autocomplete_index
+from .models import Category, Favorite, Place
+
+
+@receiver([post_save, post_delete], sender=Place)
+def place_changed(sender, instance, **kwargs):
+    versioning.bump("places")
+    payload_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    versioning.bump("categories")
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    versioning.bump("favorites")
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        popularity.record_favorite(Place, instance.place_id)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_removed(sender, instance, **kwargs):
+    popularity.record_favorite(Place, instance.place_id, delta=-1)
+
+
+@receiver(post_save, sender=Place)
+def index_place(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_place(instance)
+
+
+@receiver(post_delete, sender=Place)
+def unindex_place(sender, instance, **kwargs):
+    search.remove_place(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        search.reindex_category(instance)
+
+
+# Индекс подсказок живёт в памяти процесса: правим его только после
+# фиксации транзакции, иначе откат оставит в нём несуществующие данные
+
+
+@receiver(post_save, sender=Place)
+def autocomplete_place_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete_index.place_saved(instance))
+
+
+@receiver(post_delete, sender=Place)
+def autocomplete_place_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete_index.place_deleted(pk))
+
+
+@receiver(post_save, sender=Category)
+def autocomplete_category_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete_index.category_saved(instance))
+
+
+@receiver(post_delete, sender=Category)
+def autocomplete_category_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete_index.category_deleted(pk))
+
+
+@receiver(post_save, sender=Place)
+def cluster_place_saved(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    if not raw:
+        clusters.place_saved(instance, created, update_fields)
+
+
+@receiver(post_delete, sender=Place)
+def cluster_place_deleted(sender, instance, **kwargs):
+    clusters.place_deleted(instance)
+
+
+@receiver(post_save, sender=Place)
+def leaderboard_place_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        leaderboards.place_saved(instance, created)
+
+
+@receiver(post_delete, sender=Place)
+def leaderboard_place_deleted(sender, instance, **kwargs):
+    leaderboards.place_deleted(instance)
+
+
+@receiver([post_save, post_delete], sender=Place)
+def invalidate_tiles(sender, instance, raw=False, **kwargs):
+    # Точки запоминаем сейчас, а файлы удаляем после фиксации: тайл,
+    # собранный из незафиксированных данных, иначе остался бы в кэше
+    if not raw:
+        points = tiles.changed_points(instance)
+        transaction.on_commit(lambda: tiles.invalidate_points(points))
+
+
+@receiver(post_save, sender=Place)
+def process_place_image(sender, instance, raw=False, **kwargs):
+    if not raw and (
+        images.needs_processing(instance) or images.needs_placeholder(instance)
+    ):
+        images.pipeline.schedule(instance)
+
+
+@receiver(post_delete, sender=Place)
+def delete_place_image_variants(sender, instance, **kwargs):
+    variants = instance.image_variants
+    transaction.on_commit(lambda: images.delete_variants(variants))
@@ -0,0 +1,1298 @@
+import base64
+import gzip
+import io
+import json
+import os
+import random
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.tours.models import Tour
+
+from . import (
+    autocomplete,
+    clusters,
+    images,
+    importer,
+    leaderboards,
+    nearest,
+    payload_cache,
+    tiles,
+    versioning,
+)
+from . import popularity as popularity_module
+from . import search
+from .leaderboards import BOARDS as LEADERBOARDS
+from .geo import bounding_box, haversine_km
+from .models import (
+    Category,
+    DataVersion,
+    Favorite,
+    LeaderboardEntry,
+    Place,
+    PlaceCluster,
+    PlaceSearchIndex,
+)
+from .popularity import buffer as popularity
+from .serializers import FavoriteBulkSerializer, PlaceSerializer
+
+
+class RadiusSearchTests(TestCase):
+    url = "/api/places/places/"
+    center = (41.3111, 69.2797)
+
+    def setUp(self):
+        lat, lon = self.center
+        for slug, dlat, dlon in (
+            ("east", 0.0, 0.1),  # ~8.4 км
+            ("north", 0.05, 0.0),  # ~5.6 км
+            # ~12.2 км: внутри описанного прямоугольника, но вне круга
+            ("corner", 0.08, 0.1),
+            ("far", 1.0, 1.0),
+        ):
+            Place.objects.create(
+                name=slug.title(), slug=slug, latitude=lat + dlat, longitude=lon + dlon
+            )
+
+    def search(self, **params):
+        lat, lon = self.center
+        return self.client.get(self.url, {"lat": lat, "lon": lon, **params})
+
+    def test_exact_distance_excludes_bounding_box_corners(self):
+        corner = Place.objects.get(slug="corner")
+        min_lat, max_lat, min_lon, max_lon = bounding_box(*self.center, 10)
+        self.assertTrue(min_lat <= corner.latitude <= max_lat)
+        self.assertTrue(min_lon <= corner.longitude <= max_lon)
+
+        response = self.search(radius=10)
+        self.assertEqual(response.status_code, 200)
+        slugs = [place["slug"] for place in response.json()["results"]]
+        self.assertEqual(slugs, ["north", "east"])
+
+    def test_distance_km(self):
+        results = self.search(radius=15).json()["results"]
+        self.assertEqual([place["slug"] for place in results], ["north", "east", "corner"])
+        for place in results:
+            expected = haversine_km(
+                *self.center, float(place["latitude"]), float(place["longitude"])
+            )
+            self.assertAlmostEqual(place["distance_km"], expected, places=3)
+
+    def test_without_radius_distance_is_absent(self):
+        results = self.client.get(self.url).json()["results"]
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(place.get("distance_km") is None for place in results))
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"radius": "ten"},
+            {"radius": 0},
+            {"radius": -5},
+            {"lat": 91, "radius": 10},
+            {"lon": -181, "radius": 10},
+            {"lat": "north", "radius": 10},
+        ):
+            response = self.search(**params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class SearchTests(TestCase):
+    url = "/api/places/places/"
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Museums", slug="museums")
+        self.by_description = Place.objects.create(
+            name="Old Town Walk",
+            slug="old-town-walk",
+            description="Passes the fortress walls",
+            rating="4.9",
+        )
+        self.by_name = Place.objects.create(
+            name="Ark Fortress", slug="ark-fortress", rating="4.0"
+        )
+        self.by_category = Place.objects.create(
+            name="Registan", slug="registan", category=self.category
+        )
+
+    def slugs(self, text):
+        found = search.search_places(Place.objects.all(), text)
+        return list(found.values_list("slug", flat=True))
+
+    def test_prefix_match(self):
+        self.assertEqual(self.slugs("regist"), ["registan"])
+        self.assertEqual(self.slugs("ark fort"), ["ark-fortress"])
+        self.assertEqual(self.slugs("!!"), [])
+
+    def test_name_outranks_description(self):
+        # Рейтинг описания выше, но bm25 учитывает вес колонки name
+        self.assertEqual(self.slugs("fortress"), ["ark-fortress", "old-town-walk"])
+        response = self.client.get(self.url, {"q": "fortress"})
+        slugs = [place["slug"] for place in response.json()["results"]]
+        self.assertEqual(slugs, ["ark-fortress", "old-town-walk"])
+
+    def test_place_changes_are_indexed(self):
+        self.by_name.name = "Citadel"
+        self.by_name.save()
+        self.assertEqual(self.slugs("ark"), [])
+        self.assertEqual(self.slugs("citadel"), ["ark-fortress"])
+
+        self.by_name.delete()
+        self.assertEqual(self.slugs("citadel"), [])
+        self.assertFalse(PlaceSearchIndex.objects.filter(pk=self.by_name.pk).exists())
+
+    def test_category_rename_is_indexed(self):
+        self.assertEqual(self.slugs("museums"), ["registan"])
+        self.category.name = "Galleries"
+        self.category.save()
+        self.assertEqual(self.slugs("museums"), [])
+        self.assertEqual(self.slugs("galleries"), ["registan"])
+
+    def test_rebuild_command(self):
+        search.remove_place(self.by_name.pk)
+        self.assertEqual(self.slugs("ark"), [])
+        out = io.StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 3 places", out.getvalue())
+        self.assertEqual(self.slugs("ark"), ["ark-fortress"])
+
+
+class PayloadCacheTests(TestCase):
+    def setUp(self):
+        payload_cache._backend = None
+        self.addCleanup(setattr, payload_cache, "_backend", None)
+        self.category = Category.objects.create(name="History", slug="history")
+        for slug in ("ark", "minaret"):
+            Place.objects.create(name=slug.title(), slug=slug, category=self.category)
+
+    def serialize(self):
+        with mock.patch.object(
+            PlaceSerializer,
+            "build_representation",
+            autospec=True,
+            side_effect=PlaceSerializer.build_representation,
+        ) as build:
+            data = PlaceSerializer(Place.objects.order_by("id"), many=True).data
+        return data, build.call_count
+
+    def test_second_serialization_is_cached(self):
+        first, built = self.serialize()
+        self.assertEqual(built, 2)
+        second, built = self.serialize()
+        self.assertEqual(built, 0)
+        self.assertEqual(second, first)
+
+    def test_place_save_invalidates_entry(self):
+        self.serialize()
+        place = Place.objects.get(slug="ark")
+        place.name = "Ark Fortress"
+        place.save()
+        key = payload_cache._key(place.pk)
+        self.assertEqual(payload_cache.get_backend().get_many([key]), {})
+        data, built = self.serialize()
+        self.assertEqual(built, 1)
+        self.assertEqual(data[0]["name"], "Ark Fortress")
+
+    def test_category_change_invalidates_entries(self):
+        self.serialize()
+        self.category.name = "Heritage"
+        self.category.save()
+        data, built = self.serialize()
+        self.assertEqual(built, 2)
+        self.assertEqual(data[0]["category"]["name"], "Heritage")
+
+    def test_lru_eviction(self):
+        backend = payload_cache.LocMemLRUBackend(max_entries=2)
+        backend.set_many({"a": 1, "b": 2})
+        backend.get_many(["a"])  # "a" становится самой свежей записью
+        backend.set_many({"c": 3})
+        self.assertEqual(backend.get_many(["a", "b", "c"]), {"a": 1, "c": 3})
+
+    @override_settings(
+        PLACE_PAYLOAD_CACHE={"BACKEND": "django", "ALIAS": "place_payloads"},
+        CACHES={
+            **settings.CACHES,
+            "place_payloads": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        },
+    )
+    def test_django_cache_backend(self):
+        payload_cache._backend = None
+        self.assertIsInstance(payload_cache.get_backend(), payload_cache.DjangoCacheBackend)
+        first, built = self.serialize()
+        self.assertEqual(built, 2)
+        second, built = self.serialize()
+        self.assertEqual(built, 0)
+        self.assertEqual(second, first)
+
+
+class SparseFieldsetTests(TestCase):
+    url = "/api/places/places/"
+
+    def setUp(self):
+        self.category = Category.objects.create(name="History", slug="history", icon="🏛️")
+        for slug in ("ark", "minaret"):
+            Place.objects.create(
+                name=slug.title(),
+                slug=slug,
+                category=self.category,
+                description="A very long description " * 50,
+            )
+
+    def place_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        sql = [
+            query["sql"]
+            for query in queries.captured_queries
+            if 'FROM "places_place"' in query["sql"]
+        ]
+        return response.json()["results"], sql
+
+    def test_fields(self):
+        results, sql = self.place_queries({"fields": "name,slug"})
+        self.assertEqual(
+            sorted(results, key=lambda place: place["slug"]),
+            [{"name": "Ark", "slug": "ark"}, {"name": "Minaret", "slug": "minaret"}],
+        )
+        # Ненужные колонки не читаются из БД
+        self.assertTrue(sql)
+        self.assertTrue(all('"places_place"."description"' not in query for query in sql))
+        self.assertTrue(all('"places_category"' not in query for query in sql))
+
+    def test_expand(self):
+        results, _ = self.place_queries({"fields": "name,category"})
+        self.assertEqual(results[0]["category"], self.category.pk)
+
+        results, sql = self.place_queries({"fields": "name,category", "expand": "category"})
+        self.assertEqual(
+            results[0]["category"],
+            {"id": self.category.pk, "name": "History", "slug": "history", "icon": "🏛️"},
+        )
+        # Категория приходит JOIN-ом, а не отдельным запросом на место
+        self.assertFalse(
+            any(query.startswith('SELECT "places_category"') for query in sql)
+        )
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(self.url, {"fields": "name,bogus"})
+        self.assertEqual(response.status_code, 400)
+        detail = response.json()["detail"]
+        self.assertIn("bogus", detail)
+        self.assertIn("slug", detail)
+        # Поля только для записи в ответе не бывает
+        response = self.client.get(self.url, {"fields": "category_id"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_categories_fields(self):
+        response = self.client.get("/api/places/categories/", {"fields": "slug"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{"slug": "history"}])
+
+
+class ConditionalGetTests(TestCase):
+    url = "/api/places/places/"
+
+    def setUp(self):
+        self.category = Category.objects.create(name="History", slug="history")
+        self.place = Place.objects.create(
+            name="Ark Fortress", slug="ark-fortress", category=self.category
+        )
+
+    def test_second_request_is_not_modified_without_serialization(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("ETag", first)
+        self.assertIn("Last-Modified", first)
+
+        with mock.patch.object(
+            PlaceSerializer, "to_representation", autospec=True
+        ) as to_representation, self.assertNumQueries(1):
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.content, b"")
+        to_representation.assert_not_called()
+
+    def test_if_modified_since(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(second.status_code, 304)
+
+    def test_change_invalidates_etag(self):
+        first = self.client.get(self.url)
+        self.place.name = "Ark"
+        self.place.save()
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_category_change_invalidates_place_etag(self):
+        first = self.client.get(f"{self.url}{self.place.slug}/")
+        self.category.icon = "🏛️"
+        self.category.save()
+        second = self.client.get(
+            f"{self.url}{self.place.slug}/", HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(second.status_code, 200)
+
+    def test_if_none_match_star(self):
+        response = self.client.get(f"{self.url}{self.place.slug}/", HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(f"{self.url}missing/", HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 404)
+
+    def test_version_is_bumped_atomically_in_the_database(self):
+        etag = self.client.get(self.url)["ETag"]
+        # Изменение из другого процесса видно через общую таблицу
+        DataVersion.objects.filter(name="places").update(version=F("version") + 1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        version = versioning.get_version("places")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(versioning.bump("places"), version + 1)
+        update = queries.captured_queries[0]["sql"]
+        self.assertIn('"version" = ("places_dataversion"."version" + 1)', update)
+
+
+class ClusterTests(TestCase):
+    url = "/api/places/clusters/"
+
+    def setUp(self):
+        self.category = Category.objects.create(name="History", slug="history")
+        self.place = Place.objects.create(
+            name="Ark Fortress",
+            slug="ark-fortress",
+            category=self.category,
+            latitude=39.7781,
+            longitude=64.4111,
+        )
+
+    def pyramid(self):
+        return sorted(
+            (
+                c.zoom,
+                c.cell_x,
+                c.cell_y,
+                c.count,
+                round(c.lat_sum, 6),
+                round(c.lon_sum, 6),
+                sorted(c.categories.items()),
+            )
+            for c in PlaceCluster.objects.all()
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = self.pyramid()
+        clusters.rebuild()
+        self.assertEqual(incremental, self.pyramid())
+
+    def test_save_of_deferred_place_matches_rebuild(self):
+        other = Category.objects.create(name="Food", slug="food")
+
+        place = Place.objects.only("id", "name").get(pk=self.place.pk)
+        place.latitude = 41.3111
+        place.longitude = 69.2797
+        place.save()
+        self.assertMatchesRebuild()
+
+        place = Place.objects.defer("latitude", "longitude").get(pk=self.place.pk)
+        place.category = other
+        place.save()
+        self.assertMatchesRebuild()
+
+        place = Place.objects.only("id", "name").get(pk=self.place.pk)
+        place.name = "Ark"
+        place.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(PlaceCluster.objects.filter(zoom=0).get().count, 1)
+
+    def test_update_fields_without_coordinates_skip_clusters(self):
+        place = Place.objects.only("id", "name").get(pk=self.place.pk)
+        place.name = "Ark"
+        with mock.patch.object(clusters, "_apply") as apply:
+            place.save(update_fields=["name"])
+        apply.assert_not_called()
+
+    def test_clusters_in_bbox(self):
+        response = self.client.get(self.url, {"bbox": "64,39,65,40", "zoom": 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["count"], 1)
+        self.assertEqual(response.json()[0]["category"], "history")
+
+    def test_whole_world_at_high_zoom_is_rejected(self):
+        response = self.client.get(self.url, {"bbox": "-180,-90,180,90", "zoom": 16})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {"bbox": "-180,-90,180,90", "zoom": 3})
+        self.assertEqual(response.status_code, 200)
+
+    def test_zoom_out_of_range(self):
+        for zoom in (-1, 99):
+            response = self.client.get(self.url, {"bbox": "64,39,65,40", "zoom": zoom})
+            self.assertEqual(response.status_code, 400)
+
+
+class TileTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_override = override_settings(PLACE_TILE_CACHE_DIR=directory.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.place = Place.objects.create(
+            name="Ark Fortress", slug="ark-fortress", latitude=39.7781, longitude=64.4111
+        )
+        self.z = 12
+        self.x, self.y = tiles.tile_for(39.7781, 64.4111, self.z)
+
+    def url(self, z, x, y):
+        return f"/api/places/tiles/{z}/{x}/{y}.bin"
+
+    def test_tile_is_cached(self):
+        response = self.client.get(self.url(self.z, self.x, self.y))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content[4:8], (1).to_bytes(4, "little"))
+        self.assertTrue(tiles._path(self.z, self.x, self.y).exists())
+        with self.assertNumQueries(0):
+            self.assertEqual(tiles.get_tile(self.z, self.x, self.y), response.content)
+
+    def test_empty_tile_is_not_written(self):
+        response = self.client.get(self.url(self.z, 0, 0))
+        self.assertEqual(response.content, tiles.EMPTY)
+        self.assertEqual(list(tiles.cache_dir().iterdir()), [])
+
+    def test_tile_removed_while_reading_is_regenerated(self):
+        data = tiles.get_tile(self.z, self.x, self.y)
+        with mock.patch.object(
+            tiles.Path, "read_bytes", autospec=True, side_effect=FileNotFoundError
+        ):
+            self.assertEqual(tiles.get_tile(self.z, self.x, self.y), data)
+        tiles.clear()
+        self.assertEqual(tiles.get_tile(self.z, self.x, self.y), data)
+
+    def test_save_refreshes_generated_tile(self):
+        before = tiles.get_tile(self.z, self.x, self.y)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.place.is_hidden_gems = True
+            self.place.save()
+        # До фиксации транзакции тайл ещё не удалён
+        self.assertTrue(tiles._path(self.z, self.x, self.y).exists())
+        for callback in callbacks:
+            callback()
+        after = tiles.get_tile(self.z, self.x, self.y)
+        self.assertNotEqual(after, before)
+        self.assertEqual(after[-1], 1)
+
+    def test_moved_place_leaves_old_tile(self):
+        tiles.get_tile(self.z, self.x, self.y)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.place.latitude = 41.3111
+            self.place.longitude = 69.2797
+            self.place.save()
+        self.assertEqual(tiles.get_tile(self.z, self.x, self.y), tiles.EMPTY)
+        x, y = tiles.tile_for(41.3111, 69.2797, self.z)
+        self.assertEqual(tiles.get_tile(self.z, x, y)[4:8], (1).to_bytes(4, "little"))
+
+    def test_prune_keeps_newest_files(self):
+        for y in range(5):
+            path = tiles._path(self.z, 0, y)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(tiles.EMPTY)
+            os.utime(path, (y, y))
+        self.assertEqual(tiles.prune(limit=2), 3)
+        remaining = sorted(p.name for p in tiles.cache_dir().glob("*/*/*.bin"))
+        self.assertEqual(remaining, ["3.bin", "4.bin"])
+
+
+class CursorTests(TestCase):
+    url = "/api/places/places/"
+
+    def setUp(self):
+        category = Category.objects.create(name="History", slug="history")
+        for i in range(3):
+            Place.objects.create(name=f"Museum {i}", slug=f"museum-{i}", category=category)
+
+    def cursor(self, data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+    def test_string_offset_is_normalised(self):
+        response = self.client.get(
+            self.url, {"search": "museum", "page_size": 1, "cursor": self.cursor({"o": "1"})}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_cursor_kind_mismatch_is_not_found(self):
+        offset = self.cursor({"o": 1})
+        self.assertEqual(self.client.get(self.url, {"cursor": offset}).status_code, 404)
+        keyset = self.cursor({"c": "2024-01-01T00:00:00+00:00", "i": "5"})
+        response = self.client.get(self.url, {"search": "museum", "cursor": keyset})
+        self.assertEqual(response.status_code, 404)
+
+    def test_malformed_cursor_is_not_found(self):
+        for cursor in (self.cursor([1]), self.cursor({"o": -1}), self.cursor({"c": "x", "i": 1})):
+            self.assertEqual(self.client.get(self.url, {"cursor": cursor}).status_code, 404)
+
+
+class FacetTests(TestCase):
+    url = "/api/places/places/"
+
+    def setUp(self):
+        history = Category.objects.create(name="History", slug="history")
+        nature = Category.objects.create(name="Nature", slug="nature")
+        for slug, category, price, rating, hidden in (
+            ("ark", history, "$", "4.5", False),
+            ("minaret", history, "$$", "4.8", True),
+            ("bazaar", history, "$", "3.9", False),
+            ("lake", nature, "$$$", "4.2", True),
+            ("canyon", nature, "$", None, False),
+        ):
+            Place.objects.create(
+                name=slug.title(),
+                slug=slug,
+                category=category,
+                price_range=price,
+                rating=rating,
+                is_hidden_gems=hidden,
+            )
+
+    def facets(self, **params):
+        response = self.client.get(self.url, {"facets": "true", **params})
+        self.assertEqual(response.status_code, 200)
+        return {
+            name: {item["value"]: item["count"] for item in values}
+            for name, values in response.json()["facets"].items()
+        }
+
+    def slugs(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {place["slug"] for place in response.json()["results"]}
+
+    def test_facet_counts(self):
+        facets = self.facets()
+        self.assertEqual(facets["category"], {"history": 3, "nature": 2})
+        self.assertEqual(facets["price_range"], {"$": 3, "$$": 1, "$$$": 1})
+        self.assertEqual(facets["rating"], {4: 3, 3: 1, None: 1})
+        self.assertEqual(facets["is_hidden_gems"], {True: 2, False: 3})
+
+    def test_filters(self):
+        self.assertEqual(self.slugs(price_range="$$,$$$"), {"minaret", "lake"})
+        self.assertEqual(self.slugs(is_hidden_gems="true"), {"minaret", "lake"})
+        self.assertEqual(self.slugs(is_hidden_gems="false"), {"ark", "bazaar", "canyon"})
+        self.assertEqual(self.slugs(min_rating="4.5"), {"ark", "minaret"})
+        self.assertEqual(
+            self.slugs(category="history", price_range="$", min_rating="4"), {"ark"}
+        )
+
+    def test_invalid_min_rating(self):
+        response = self.client.get(self.url, {"min_rating": "high"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_facets_follow_filters(self):
+        facets = self.facets(category="history", is_hidden_gems="false")
+        self.assertEqual(facets["category"], {"history": 2})
+        self.assertEqual(facets["price_range"], {"$": 2})
+        self.assertEqual(facets["rating"], {4: 1, 3: 1})
+        self.assertEqual(facets["is_hidden_gems"], {False: 2})
+
+    def test_facets_use_one_query(self):
+        self.client.get(self.url)  # прогрев кэша категорий
+        # Версии для ETag и сама страница
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {"page_size": 1})
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {"page_size": 1, "facets": "true"})
+
+
+class FavoriteAnnotationTests(TestCase):
+    url = "/api/places/places/"
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="traveller", email="traveller@example.com", password="secret"
+        )
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="secret"
+        )
+        category = Category.objects.create(name="History", slug="history")
+        self.places = [
+            Place.objects.create(name=f"Place {i}", slug=f"place-{i}", category=category)
+            for i in range(30)
+        ]
+        popularity.discard()
+        with self.captureOnCommitCallbacks(execute=True):
+            for place in self.places[::2]:
+                Favorite.objects.create(user=self.user, place=place)
+            for place in self.places[::3]:
+                Favorite.objects.create(user=other, place=place)
+        popularity.flush()
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_constant_queries_regardless_of_page_size(self):
+        for page_size in (2, 30):
+            # Версии для ETag, затем места, категории и is_favorited — одним SELECT
+            with self.assertNumQueries(2):
+                response = self.api.get(self.url, {"page_size": page_size})
+            self.assertEqual(len(response.data["results"]), page_size)
+        for item in response.data["results"]:
+            index = int(item["slug"].split("-")[1])
+            self.assertEqual(item["is_favorited"], index % 2 == 0)
+            expected = (index % 2 == 0) + (index % 3 == 0)
+            self.assertEqual(item["favorites_count"], expected)
+
+    def test_etag_is_per_user(self):
+        mine = self.api.get(self.url)
+        anonymous = self.client.get(self.url)
+        self.assertNotEqual(mine["ETag"], anonymous["ETag"])
+        self.assertIn("private", mine["Cache-Control"])
+        self.assertFalse(any(item["is_favorited"] for item in anonymous.data["results"]))
+
+    def test_favorite_change_invalidates_etag(self):
+        first = self.api.get(self.url)
+        self.api.post(
+            "/api/places/favorites/bulk-add/",
+            {"place_ids": [self.places[1].pk]},
+            format="json",
+        )
+        second = self.api.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+
+    def test_counter_flush_invalidates_etag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.filter(place=self.places[0]).delete()
+        params = {"page_size": 30}
+        first = self.api.get(self.url, params)
+        popularity.flush()
+        second = self.api.get(self.url, params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        place = next(p for p in second.data["results"] if p["id"] == self.places[0].pk)
+        self.assertEqual(place["favorites_count"], 0)
+
+    def test_favorites_count_reads_the_column(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get(
+                self.url, {"fields": "id,favorites_count", "page_size": 30}
+            )
+        self.assertFalse(
+            any('"places_favorite"' in query["sql"] for query in queries.captured_queries)
+        )
+        for item in response.data["results"]:
+            index = next(i for i, place in enumerate(self.places) if place.pk == item["id"])
+            self.assertEqual(item["favorites_count"], (index % 2 == 0) + (index % 3 == 0))
+
+
+class BulkFavoriteTests(TestCase):
+    add_url = "/api/places/favorites/bulk-add/"
+    remove_url = "/api/places/favorites/bulk-remove/"
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="traveller", email="traveller@example.com", password="x"
+        )
+        self.other = User.objects.create_user(
+            username="other", email="other@example.com", password="x"
+        )
+        self.places = [
+            Place.objects.create(name=f"Place {i}", slug=f"place-{i}") for i in range(3)
+        ]
+        self.ids = [place.pk for place in self.places]
+        popularity.discard()
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.other, place=self.places[0])
+        popularity.flush()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, url, ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"place_ids": ids}, format="json")
+        popularity.flush()
+        return response
+
+    def statuses(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [item["status"] for item in response.json()["results"]]
+
+    def favorite_counts(self):
+        return [place.favorite_count for place in Place.objects.order_by("id")]
+
+    def test_add_is_idempotent(self):
+        missing = max(self.ids) + 100
+        response = self.post(self.add_url, [self.ids[0], self.ids[1], self.ids[1], missing])
+        self.assertEqual(self.statuses(response), ["added", "added", "not_found"])
+
+        response = self.post(self.add_url, self.ids[:2])
+        self.assertEqual(self.statuses(response), ["exists", "exists"])
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 2)
+        # Избранное другого пользователя учтено отдельно
+        self.assertEqual(self.favorite_counts(), [2, 1, 0])
+
+    def test_remove_touches_only_own_favorites(self):
+        self.post(self.add_url, self.ids[1:])
+        response = self.post(self.remove_url, self.ids)
+        self.assertEqual(self.statuses(response), ["not_found", "removed", "removed"])
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+        self.assertTrue(Favorite.objects.filter(user=self.other).exists())
+        self.assertEqual(self.favorite_counts(), [1, 0, 0])
+
+    def test_id_limit(self):
+        limit = FavoriteBulkSerializer.MAX_IDS
+        response = self.post(self.add_url, list(range(1, limit + 2)))
+        self.assertEqual(response.status_code, 400)
+        response = self.post(self.add_url, list(range(1, limit + 1)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), limit)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.post(self.add_url, self.ids).status_code, 401)
+        self.assertEqual(self.post(self.remove_url, self.ids).status_code, 401)
+
+
+class PopularityTests(TestCase):
+    def setUp(self):
+        self.place = Place.objects.create(name="Ark Fortress", slug="ark-fortress")
+        popularity.discard()
+
+    def test_log_score_does_not_overflow(self):
+        now = datetime(2100, 1, 1, tzinfo=timezone.utc).timestamp()
+        score = popularity_module.log_add(
+            popularity_module.log_weight(2, now), popularity_module.log_weight(3, now)
+        )
+        self.assertAlmostEqual(popularity_module.decayed(score, now), 5.0)
+        week_later = now + popularity_module.HALF_LIFE
+        self.assertAlmostEqual(popularity_module.decayed(score, week_later), 2.5)
+
+    def test_flush_adds_scores_in_log_space(self):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                popularity.record_view(Place, self.place.pk)
+                popularity.record_favorite(Place, self.place.pk)
+            popularity.flush()
+        self.place.refresh_from_db()
+        self.assertEqual(self.place.view_count, 2)
+        self.assertEqual(self.place.favorite_count, 2)
+        expected = 2 * (popularity_module.VIEW_WEIGHT + popularity_module.FAVORITE_WEIGHT)
+        self.assertAlmostEqual(
+            popularity_module.decayed(self.place.trending_score), expected, places=3
+        )
+
+    def test_save_keeps_counters(self):
+        place = Place.objects.get(pk=self.place.pk)
+        Place.objects.filter(pk=place.pk).update(view_count=7, trending_score=3.0)
+        place.name = "Ark"
+        place.save()
+        self.place.refresh_from_db()
+        self.assertEqual((self.place.name, self.place.view_count), ("Ark", 7))
+        self.assertEqual(self.place.trending_score, 3.0)
+
+    def test_save_skips_deferred_fields(self):
+        place = Place.objects.only("id", "name").get(pk=self.place.pk)
+        Place.objects.filter(pk=place.pk).update(slug="ark")
+        place.name = "Ark"
+        place.save()
+        self.place.refresh_from_db()
+        self.assertEqual((self.place.name, self.place.slug), ("Ark", "ark"))
+
+    def test_save_of_deleted_row_raises(self):
+        place = Place.objects.get(pk=self.place.pk)
+        Place.objects.filter(pk=place.pk).delete()
+        with self.assertRaises(DatabaseError):
+            place.save()
+
+
+class LeaderboardTests(TestCase):
+    url = "/api/places/leaderboards/"
+
+    def setUp(self):
+        self.history = Category.objects.create(name="History", slug="history")
+        self.nature = Category.objects.create(name="Nature", slug="nature")
+        self.ark = Place.objects.create(
+            name="Ark", slug="ark", category=self.history, rating="4.5"
+        )
+        self.minaret = Place.objects.create(
+            name="Minaret",
+            slug="minaret",
+            category=self.history,
+            rating="4.8",
+            is_hidden_gems=True,
+        )
+        Place.objects.create(name="Unrated", slug="unrated", category=self.history)
+
+    def boards(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return {
+            block["category"]["slug"]: {
+                board: [place["slug"] for place in block[board]] for board in LEADERBOARDS
+            }
+            for block in response.json()
+        }
+
+    def test_boards_follow_place_changes(self):
+        self.assertEqual(
+            self.boards(),
+            {"history": {"top_rated": ["minaret", "ark"], "hidden_gems": ["minaret"]}},
+        )
+
+        self.ark.rating = "4.9"
+        self.ark.save()
+        self.assertEqual(self.boards()["history"]["top_rated"], ["ark", "minaret"])
+
+        # Переезд в другую категорию пересчитывает обе
+        self.minaret.category = self.nature
+        self.minaret.save()
+        boards = self.boards()
+        self.assertEqual(boards["history"], {"top_rated": ["ark"], "hidden_gems": []})
+        self.assertEqual(
+            boards["nature"], {"top_rated": ["minaret"], "hidden_gems": ["minaret"]}
+        )
+
+        self.minaret.delete()
+        self.assertNotIn("nature", self.boards())
+
+    def test_board_size(self):
+        for i in range(leaderboards.BOARD_SIZE + 2):
+            Place.objects.create(
+                name=f"Museum {i}", slug=f"museum-{i}", category=self.history, rating="3.0"
+            )
+        top = self.boards()["history"]["top_rated"]
+        self.assertEqual(len(top), leaderboards.BOARD_SIZE)
+        self.assertEqual(top[:2], ["minaret", "ark"])
+
+    def test_rebuild_command(self):
+        LeaderboardEntry.objects.all().delete()
+        call_command("rebuild_leaderboards", stdout=io.StringIO())
+        self.assertEqual(self.boards()["history"]["top_rated"], ["minaret", "ark"])
+
+
+class ImagePipelineTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.place = Place.objects.create(
+            name="Ark Fortress", slug="ark-fortress", image=self.image_file(800, 600)
+        )
+
+    def image_file(self, width, height, name="ark.jpg"):
+        buffer = io.BytesIO()
+        Image.new("RGB", (width, height), (200, 120, 40)).save(buffer, "JPEG")
+        return ContentFile(buffer.getvalue(), name=name)
+
+    def test_variants_are_written_with_update(self):
+        before = Place.objects.get(pk=self.place.pk).updated_at
+        version = versioning.get_version("places")
+        with mock.patch.object(Place, "save") as save, mock.patch.object(
+            images.variants_saved, "send"
+        ) as sent:
+            self.assertTrue(images.process("places.Place", self.place.pk))
+        save.assert_not_called()
+        sent.assert_called_once_with(sender=Place, pk=self.place.pk)
+
+        place = Place.objects.get(pk=self.place.pk)
+        variants = place.image_variants
+        self.assertEqual(variants["source"], place.image.name)
+        self.assertEqual((variants["width"], variants["height"]), (800, 600))
+        self.assertEqual(sorted(variants["sizes"], key=int), ["320", "640"])
+        for formats in variants["sizes"].values():
+            for name in formats.values():
+                self.assertTrue(default_storage.exists(name))
+        self.assertGreater(place.updated_at, before)
+        self.assertNotEqual(versioning.get_version("places"), version)
+        # Повторная обработка не нужна
+        self.assertFalse(images.process("places.Place", self.place.pk))
+
+    def test_placeholder(self):
+        images.process("places.Place", self.place.pk)
+        placeholder = Place.objects.get(pk=self.place.pk).image_placeholder
+        prefix = "data:image/webp;base64,"
+        self.assertTrue(placeholder.startswith(prefix))
+        self.assertLess(len(placeholder), 1000)
+        small = Image.open(io.BytesIO(base64.b64decode(placeholder[len(prefix) :])))
+        self.assertEqual(small.size, (images.PLACEHOLDER_SIZE, 12))
+
+        response = self.client.get(f"/api/places/places/{self.place.slug}/")
+        self.assertEqual(response.json()["image_placeholder"], placeholder)
+
+    def test_missing_placeholder_is_generated_alone(self):
+        images.process("places.Place", self.place.pk)
+        Place.objects.filter(pk=self.place.pk).update(image_placeholder="")
+        variants = Place.objects.get(pk=self.place.pk).image_variants
+
+        with mock.patch.object(images, "generate_variants") as generate_variants:
+            self.assertTrue(images.process("places.Place", self.place.pk))
+        generate_variants.assert_not_called()
+        place = Place.objects.get(pk=self.place.pk)
+        self.assertTrue(place.image_placeholder.startswith("data:image/webp;base64,"))
+        self.assertEqual(place.image_variants, variants)
+
+    def test_result_for_replaced_image_is_discarded(self):
+        source = self.place.image.name
+        variants, placeholder = images.generate_variants(source)
+        Place.objects.filter(pk=self.place.pk).update(image="places/other.jpg")
+
+        saved = images.save_variants(Place, self.place.pk, source, variants, placeholder)
+        self.assertFalse(saved)
+        self.assertEqual(Place.objects.get(pk=self.place.pk).image_variants, {})
+        for formats in variants["sizes"].values():
+            for name in formats.values():
+                self.assertFalse(default_storage.exists(name))
+
+
+class ExportTests(TestCase):
+    url = "/api/places/export/"
+
+    def setUp(self):
+        category = Category.objects.create(name="History", slug="history")
+        self.place = Place.objects.create(
+            name="Ark Fortress", slug="ark-fortress", category=category, rating="4.5"
+        )
+        self.tour = Tour.objects.create(name="Old City", slug="old-city")
+        self.tour.places.add(self.place)
+        self.client = APIClient()
+        User = get_user_model()
+        self.staff = User.objects.create_user(
+            username="staff", email="staff@example.com", password="x", is_staff=True
+        )
+        self.user = User.objects.create_user(
+            username="user", email="user@example.com", password="x"
+        )
+
+    def records(self, content):
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_ndjson(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = self.records(b"".join(response.streaming_content))
+        self.assertEqual([r["type"] for r in records], ["category", "place", "tour"])
+        self.assertEqual(records[1]["slug"], "ark-fortress")
+        self.assertEqual(records[1]["rating"], "4.5")
+        self.assertEqual(records[2]["place_ids"], [self.place.pk])
+
+    def test_gzip(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(self.url, {"gzip": "true"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn(".ndjson.gz", response["Content-Disposition"])
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(self.records(content)), 3)
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.museums = Category.objects.create(name="Museums", slug="museums", icon="🏛️")
+        for slug, name, rating, category in (
+            ("ark", "Ark Fortress", "4.5", None),
+            ("fortress-walls", "Fortress Walls", "4.8", None),
+            ("arkhangelsk", "Arkhangelsk Cafe", "3.0", None),
+            ("history", "History Hall", "4.0", self.museums),
+            ("crafts", "Crafts Hall", "4.6", self.museums),
+        ):
+            Place.objects.create(name=name, slug=slug, rating=rating, category=category)
+        self.index = autocomplete.AutocompleteIndex()
+        patcher = mock.patch("apps.places.signals.autocomplete_index", self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def slugs(self, prefix, limit=autocomplete.DEFAULT_LIMIT, index=None):
+        return [s["slug"] for s in (index or self.index).suggest(prefix, limit)]
+
+    def test_prefix_match_in_rating_order(self):
+        self.assertEqual(self.slugs("ark"), ["ark", "arkhangelsk"])
+        self.assertEqual(self.slugs("Ark F"), ["ark"])
+        self.assertEqual(self.slugs("ark", limit=1), ["ark"])
+        self.assertEqual(self.slugs("zzz"), [])
+
+    def test_match_at_later_word(self):
+        self.assertEqual(self.slugs("fort"), ["fortress-walls", "ark"])
+        self.assertEqual(self.slugs("hall"), ["crafts", "history"])
+
+    def test_category_name_match(self):
+        suggestions = self.index.suggest("muse")
+        self.assertEqual([s["slug"] for s in suggestions], ["crafts", "history"])
+        self.assertEqual(suggestions[0]["category_icon"], "🏛️")
+
+    def test_cached_prefix_follows_changes(self):
+        for i in range(autocomplete.MAX_LIMIT + 5):
+            Place.objects.create(name=f"Garden {i}", slug=f"garden-{i}", rating=i / 10)
+        self.assertEqual(self.slugs("gar", limit=3), ["garden-24", "garden-23", "garden-22"])
+        prefixes = ("g", "gar", "garden", "garden 1", "m")
+        for prefix in prefixes:
+            self.slugs(prefix)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            place = Place.objects.get(slug="garden-24")
+            place.rating = 0
+            place.save()
+            Place.objects.get(slug="garden-23").delete()
+            Place.objects.create(name="Gardenia", slug="gardenia", rating="1.5")
+            place = Place.objects.get(slug="garden-3")
+            place.name = "Museum Garden"
+            place.save()
+
+        fresh = autocomplete.AutocompleteIndex()
+        for prefix in prefixes:
+            self.assertEqual(
+                self.slugs(prefix, autocomplete.MAX_LIMIT),
+                self.slugs(prefix, autocomplete.MAX_LIMIT, index=fresh),
+                prefix,
+            )
+        self.assertEqual(self.slugs("gar", limit=3), ["garden-22", "garden-21", "garden-20"])
+
+    def test_rolled_back_save_leaves_no_suggestion(self):
+        self.assertEqual(self.slugs("navoi"), [])
+        Place.objects.create(name="Navoi Park", slug="navoi-park")
+        self.assertEqual(len(self.index.suggest("navoi")), 1)
+        try:
+            with transaction.atomic():
+                Place.objects.create(name="Navoi Theater", slug="navoi-theater")
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        self.assertEqual(self.slugs("navoi"), ["navoi-park"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Place.objects.create(name="Navoi Bazaar", slug="navoi-bazaar")
+        self.assertEqual(len(self.index.suggest("navoi")), 2)
+
+
+class NearestTests(TestCase):
+    def create_places(self):
+        rng = random.Random(7)
+        self.parks = Category.objects.create(name="Parks", slug="parks")
+        self.museums = Category.objects.create(name="Museums", slug="museums")
+        Place.objects.bulk_create(
+            Place(
+                name=f"Place {i}",
+                slug=f"place-{i}",
+                category=rng.choice([self.parks, self.museums, None]),
+                latitude=round(rng.uniform(37.0, 45.0), 6),
+                longitude=round(rng.uniform(56.0, 73.0), 6),
+                is_hidden_gems=rng.random() < 0.3,
+            )
+            for i in range(400)
+        )
+
+    def brute_force(self, lat, lon, k, category=None, hidden=None):
+        places = Place.objects.all()
+        if category is not None:
+            places = places.filter(category=category)
+        if hidden is not None:
+            places = places.filter(is_hidden_gems=hidden)
+        distances = sorted(
+            (haversine_km(lat, lon, float(p.latitude), float(p.longitude)), p.pk)
+            for p in places
+        )
+        return [(pk, distance) for distance, pk in distances[:k]]
+
+    def test_matches_brute_force(self):
+        self.create_places()
+        engine = nearest.NearestEngine()
+        for lat, lon in ((41.3111, 69.2797), (39.7781, 64.4111), (50.0, 50.0)):
+            for k in (1, 10, 100):
+                for category, hidden in (
+                    (None, None),
+                    (self.parks, None),
+                    (self.museums, True),
+                    (None, False),
+                ):
+                    found = engine.nearest(
+                        lat,
+                        lon,
+                        k,
+                        category=None if category is None else category.slug,
+                        hidden=hidden,
+                    )
+                    expected = self.brute_force(lat, lon, k, category, hidden)
+                    self.assertEqual([pk for pk, _ in found], [pk for pk, _ in expected])
+                    for (_, distance), (_, exact) in zip(found, expected):
+                        self.assertAlmostEqual(distance, exact, places=6)
+
+    def test_endpoint(self):
+        self.create_places()
+        response = self.client.get(
+            "/api/places/places/nearest/",
+            {"lat": 41.3111, "lon": 69.2797, "k": 5, "category": self.parks.pk},
+        )
+        self.assertEqual(response.status_code, 200)
+        expected = self.brute_force(41.3111, 69.2797, 5, self.parks)
+        self.assertEqual([place["id"] for place in response.json()], [pk for pk, _ in expected])
+        self.assertAlmostEqual(response.json()[0]["distance_km"], expected[0][1], places=6)
+
+    def test_unknown_category_is_not_cached(self):
+        category = Category.objects.create(name="Parks", slug="parks")
+        place = Place.objects.create(
+            name="Park", slug="park", category=category, latitude=41.3, longitude=69.2
+        )
+        engine = nearest.NearestEngine()
+        self.assertEqual(engine.nearest(41.3, 69.2, 5, category="parks")[0][0], place.pk)
+        for unknown in ("999", "missing"):
+            self.assertEqual(engine.nearest(41.3, 69.2, 5, category=unknown), [])
+        self.assertEqual(set(engine._current().trees), {(category.pk, None)})
+
+
+class PlaceImporterTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Sports", slug="sports")
+
+    def test_csv_upsert_by_slug(self):
+        Place.objects.create(name="Old", slug="stadium", category=self.category)
+        data = io.StringIO(
+            "name,slug,category,latitude,longitude,rating\n"
+            "Stadium,stadium,sports,41.3,69.2,4.5\n"
+            "Pool,,Sports,41.4,69.3,\n"
+            "Broken,,sports,95,69.3,\n"
+            "Nowhere,,unknown,41,69,\n"
+        )
+        stats = importer.PlaceImporter(chunk_size=1).run(importer.read_csv(data))
+        self.assertEqual((stats.rows, stats.created, stats.updated, stats.invalid), (4, 1, 1, 2))
+        self.assertEqual([line for line, _ in stats.errors], [4, 5])
+        stadium = Place.objects.get(slug="stadium")
+        self.assertEqual(stadium.name, "Stadium")
+        self.assertIsNotNone(stadium.grid_cell)
+        self.assertTrue(Place.objects.filter(slug="pool", category=self.category).exists())
+
+    def import_csv(self, text, **kwargs):
+        return importer.PlaceImporter(**kwargs).run(importer.read_csv(io.StringIO(text)))
+
+    def test_small_import_updates_derived_data_in_place(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(PLACE_TILE_CACHE_DIR=directory.name):
+            Place.objects.create(
+                name="Old Stadium",
+                slug="stadium",
+                category=self.category,
+                latitude=41.3,
+                longitude=69.2,
+            )
+            z = 12
+            x, y = tiles.tile_for(41.3, 69.2, z)
+            tiles.get_tile(z, x, y)
+
+            with mock.patch.object(clusters, "rebuild") as rebuild, mock.patch.object(
+                search, "rebuild_index"
+            ) as rebuild_index, self.captureOnCommitCallbacks(execute=True):
+                self.import_csv(
+                    "name,slug,category,latitude,longitude,rating\n"
+                    "Arena,stadium,sports,41.4,69.3,4.5\n"
+                    "Pool,pool,sports,41.3,69.2,4.9\n"
+                    "Track,track,sports,,,\n"
+                )
+            rebuild.assert_not_called()
+            rebuild_index.assert_not_called()
+
+            found = search.search_places(Place.objects.all(), "arena")
+            self.assertEqual(list(found.values_list("slug", flat=True)), ["stadium"])
+            self.assertFalse(search.search_places(Place.objects.all(), "old").exists())
+            self.assertEqual(
+                list(
+                    LeaderboardEntry.objects.filter(board="top_rated")
+                    .order_by("rank")
+                    .values_list("place__slug", flat=True)
+                ),
+                ["pool", "stadium"],
+            )
+            # Старый тайл стадиона сброшен, в нём теперь только бассейн
+            self.assertEqual(tiles.get_tile(z, x, y)[4:8], (1).to_bytes(4, "little"))
+
+        incremental = sorted(
+            PlaceCluster.objects.values_list("zoom", "cell_x", "cell_y", "count", "categories")
+        )
+        clusters.rebuild()
+        self.assertEqual(
+            incremental,
+            sorted(
+                PlaceCluster.objects.values_list(
+                    "zoom", "cell_x", "cell_y", "count", "categories"
+                )
+            ),
+        )
+
+    def test_large_import_rebuilds(self):
+        rows = "".join(f"Spot {i},sports,41.{i},69.2\n" for i in range(5))
+        with mock.patch.object(importer, "INCREMENTAL_LIMIT", 3), mock.patch.object(
+            clusters, "apply_changes"
+        ) as apply_changes, mock.patch.object(clusters, "rebuild") as rebuild:
+            stats = self.import_csv("name,category,latitude,longitude\n" + rows, chunk_size=2)
+        self.assertEqual(stats.created, 5)
+        rebuild.assert_called_once()
+        apply_changes.assert_not_called()
+
+    def test_non_finite_numbers_are_invalid(self):
+        data = io.StringIO(
+            "name,category,latitude,longitude,rating\n"
+            "Nan,sports,NaN,69.2,\n"
+            "Inf,sports,41.3,Infinity,\n"
+            "Rated,sports,41.3,69.2,nan\n"
+            "Fine,sports,41.3,69.2,4\n"
+        )
+        stats = importer.PlaceImporter().run(importer.read_csv(data))
+        self.assertEqual((stats.invalid, stats.created), (3, 1))
+        self.assertEqual([message for _, message in stats.errors][0], "latitude must be a number")
+
+    def test_dry_run_does_not_create_categories(self):
+        data = io.StringIO("name,category\nDome,Arena\nRink,arena\nPool,Water\n")
+        places = importer.PlaceImporter(create_categories=True, dry_run=True)
+        stats = places.run(importer.read_csv(data))
+        self.assertEqual((stats.created, stats.invalid), (3, 0))
+        self.assertEqual(places.new_categories, ["Arena", "Water"])
+        self.assertEqual(list(Category.objects.values_list("slug", flat=True)), ["sports"])
+        self.assertFalse(Place.objects.exists())
+
+    def test_bad_ndjson_line_is_skipped(self):
+        data = io.StringIO(
+            '{"name": "Dome", "category": "sports"}\n'
+            '{"name": "Broken", \n'
+            "[1, 2]\n"
+            '{"name": "Rink", "category": "sports"}\n'
+        )
+        stats = importer.PlaceImporter().run(importer.read_ndjson(data))
+        self.assertEqual((stats.rows, stats.created, stats.invalid), (4, 2, 2))
+        self.assertEqual([line for line, _ in stats.errors], [2, 3])
+        self.assertTrue(stats.errors[0][1].startswith("invalid JSON"))
+
+    def test_geojson_feature_collection(self):
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [69.2 + i / 100, 41.3]},
+                "properties": {"name": f"Spot {i}", "category": "sports"},
+            }
+            for i in range(3)
+        ]
+        data = io.StringIO(json.dumps({"type": "FeatureCollection", "features": features}))
+        # Маленький блок чтения — объекты разрезаются между блоками
+        with mock.patch.object(importer, "READ_BLOCK", 16):
+            rows = list(importer.read_geojson(data))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual((rows[2][1]["latitude"], rows[2][1]["longitude"]), (41.3, 69.22))
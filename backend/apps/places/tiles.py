@@ -0,0 +1,189 @@
+import math
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from .geo import bbox_filter
+
+# Компактный тайл мест для карты (little-endian):
+#   заголовок  b"WZT1", uint32 count
+#   float32[count] latitude, float32[count] longitude,
+#   uint32[count] place id, uint16[count] category id (0 — без категории),
+#   uint8[count] флаги (бит 0 — is_hidden_gems)
+# Непустые тайлы кэшируются на диске и удаляются при изменении мест внутри
+# них. Пустые тайлы не сохраняются: их почти бесконечно много, и запросы
+# по всему миру заполнили бы диск одинаковыми файлами.
+MAGIC = b"WZT1"
+MIN_TILE_ZOOM = 8  # мельче — используйте /clusters/
+MAX_TILE_ZOOM = 18
+CONTENT_TYPE = "application/vnd.wayzen.tile"
+# Кэш прореживается после каждых PRUNE_EVERY записей
+PRUNE_EVERY = 100
+
+_writes = 0
+
+
+def cache_dir():
+    return Path(getattr(settings, "PLACE_TILE_CACHE_DIR", settings.BASE_DIR / "cache" / "tiles"))
+
+
+def max_files():
+    """Предел числа файлов в кэше; старые (по времени записи) удаляются"""
+    return getattr(settings, "PLACE_TILE_CACHE_MAX_FILES", 20000)
+
+
+def tile_bounds(z, x, y):
+    """(min_lat, max_lat, min_lon, max_lon) тайла z/x/y"""
+    n = 1 << z
+    min_lon = x / n * 360.0 - 180.0
+    max_lon = (x + 1) / n * 360.0 - 180.0
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def tile_for(lat, lon, z):
+    n = 1 << z
+    lat = max(-85.05112878, min(85.05112878, lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    phi = math.radians(lat)
+    y = int((1.0 - math.log(math.tan(phi) + 1.0 / math.cos(phi)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def encode(rows):
+    """rows: [(id, latitude, longitude, category_id, is_hidden_gems)] -> bytes"""
+    count = len(rows)
+    if count:
+        ids, lats, lons, categories, hidden = zip(*rows)
+    else:
+        ids = lats = lons = categories = hidden = ()
+    return b"".join(
+        (
+            MAGIC,
+            struct.pack("<I", count),
+            np.asarray(lats, dtype="<f4").tobytes(),
+            np.asarray(lons, dtype="<f4").tobytes(),
+            np.asarray(ids, dtype="<u4").tobytes(),
+            np.asarray([c or 0 for c in categories], dtype="<u2").tobytes(),
+            np.asarray(hidden, dtype="u1").tobytes(),
+        )
+    )
+
+
+EMPTY = encode([])
+
+
+def tile_rows(z, x, y):
+    from .models import Place
+
+    min_lat, max_lat, min_lon, max_lon = tile_bounds(z, x, y)
+    # Границы полуоткрытые, чтобы точка на стыке попадала ровно в один тайл
+    return list(
+        Place.objects.filter(bbox_filter(min_lat, max_lat, min_lon, max_lon))
+        .filter(
+            latitude__gt=min_lat,
+            latitude__lte=max_lat,
+            longitude__gte=min_lon,
+            longitude__lt=max_lon,
+        )
+        .order_by()
+        .values_list("id", "latitude", "longitude", "category_id", "is_hidden_gems")
+    )
+
+
+def _path(z, x, y):
+    return cache_dir() / str(z) / str(x) / f"{y}.bin"
+
+
+def get_tile(z, x, y):
+    """Содержимое тайла; непустой тайл генерируется один раз и кэшируется"""
+    path = _path(z, x, y)
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        # Нет в кэше или файл только что удалили invalidate_point/clear
+        pass
+    rows = tile_rows(z, x, y)
+    if not rows:
+        return EMPTY
+    data = encode(rows)
+    try:
+        _write(path, data)
+    except OSError:
+        # Запись в кэш необязательна: каталог мог удалить clear()
+        pass
+    return data
+
+
+def _write(path, data):
+    global _writes
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Атомарная запись: параллельный запрос не увидит недописанный файл
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    _writes += 1
+    if _writes % PRUNE_EVERY == 0:
+        prune()
+
+
+def prune(limit=None):
+    """Оставляет в кэше не больше limit (по умолчанию max_files()) тайлов"""
+    limit = max_files() if limit is None else limit
+    files = []
+    for path in cache_dir().glob("*/*/*.bin"):
+        try:
+            files.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            pass
+    if len(files) <= limit:
+        return 0
+    files.sort()
+    removed = 0
+    for _, path in files[: len(files) - limit]:
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def clear():
+    """Удаляет все кэшированные тайлы"""
+    shutil.rmtree(cache_dir(), ignore_errors=True)
+
+
+def invalidate_point(lat, lon):
+    """Удаляет кэшированные тайлы всех уровней, содержащие точку"""
+    for z in range(MIN_TILE_ZOOM, MAX_TILE_ZOOM + 1):
+        x, y = tile_for(lat, lon, z)
+        try:
+            _path(z, x, y).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def changed_points(place):
+    """Старая и новая точка места: тайлы обеих нужно удалить"""
+    points = {
+        (place.loaded_values.get("latitude"), place.loaded_values.get("longitude")),
+        (place.latitude, place.longitude),
+    }
+    return [
+        (float(lat), float(lon))
+        for lat, lon in points
+        if lat is not None and lon is not None
+    ]
+
+
+def invalidate_points(points):
+    for lat, lon in points:
+        invalidate_point(lat, lon)
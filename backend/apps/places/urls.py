@@ -1,4 +1,14 @@
-from .views import PlaceViewSet, CategoryViewSet, FavoriteViewSet
+from django.urls import path
+from .views import (
+    PlaceViewSet,
+    CategoryViewSet,
+    FavoriteViewSet,
+    autocomplete,
+    clusters,
+    export,
+    leaderboards,
+    tile,
+)
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -7,4 +17,10 @@ router.register(r"categories", CategoryViewSet, basename="category")
 router.register(r"favorites", FavoriteViewSet, basename="favorite")
 
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("autocomplete/", autocomplete, name="place-autocomplete"),
+    path("clusters/", clusters, name="place-clusters"),
+    path("leaderboards/", leaderboards, name="place-leaderboards"),
+    path("export/", export, name="catalogue-export"),
+    path("tiles/<int:z>/<int:x>/<int:y>.bin", tile, name="place-tile"),
+] + router.urls
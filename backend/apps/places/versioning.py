@@ -0,0 +1,63 @@
+import time
+
+from django.db.models import F
+
+# Счётчики версий данных каталога. Сигналы моделей увеличивают их при
+# изменениях, а индексы в памяти процесса и HTTP-валидаторы (ETag,
+# Last-Modified) сверяются с ними вместо выборки самих данных.
+# Счётчики хранятся в таблице DataVersion: она общая для всех воркеров, а
+# UPDATE version = version + 1 атомарен — одновременные изменения в разных
+# процессах не теряются.
+
+
+def get_state(names):
+    """{name: (version, modified)} для наборов данных names одним запросом"""
+    from .models import DataVersion
+
+    names = list(names)
+    rows = {
+        name: (version, modified)
+        for name, version, modified in DataVersion.objects.filter(
+            name__in=names
+        ).values_list("name", "version", "modified")
+    }
+    missing = [name for name in names if name not in rows]
+    if missing:
+        # Новый счётчик стартует со значения времени, чтобы не повторить
+        # номер версии, выданный клиентам до пересоздания таблицы
+        now = time.time()
+        DataVersion.objects.bulk_create(
+            [
+                DataVersion(name=name, version=int(now * 1000), modified=now)
+                for name in missing
+            ],
+            ignore_conflicts=True,
+        )
+        rows.update(
+            (name, (version, modified))
+            for name, version, modified in DataVersion.objects.filter(
+                name__in=missing
+            ).values_list("name", "version", "modified")
+        )
+    return rows
+
+
+def get_version(name):
+    """Текущая версия набора данных name"""
+    return get_state([name])[name][0]
+
+
+def last_modified(name):
+    """Unix-время последнего изменения набора данных name"""
+    return get_state([name])[name][1]
+
+
+def bump(name):
+    """Увеличивает версию набора данных name и возвращает новое значение"""
+    from .models import DataVersion
+
+    versions = DataVersion.objects.filter(name=name)
+    if not versions.update(version=F("version") + 1, modified=time.time()):
+        get_state([name])
+        versions.update(version=F("version") + 1, modified=time.time())
+    return versions.values_list("version", flat=True).get()
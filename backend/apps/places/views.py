@@ -1,21 +1,75 @@
 from .models import Place
 from rest_framework import viewsets, permissions, generics
-from rest_framework.decorators import api_view, permission_classes
-from .models import Place, Category, Favorite
-from .serializers import PlaceSerializer, CategorySerializer, FavoriteSerializer
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+from .models import Place, Category, Favorite, LeaderboardEntry
+from .serializers import (
+    PlaceSerializer,
+    CategorySerializer,
+    FavoriteSerializer,
+    FavoriteBulkSerializer,
+)
 from django.contrib.auth import authenticate
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q, Value
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from .clusters import MAX_CELLS, MAX_ZOOM, MIN_ZOOM, cell_count, clusters_in_bbox
+from .conditional import ConditionalGetMixin
+from .facets import compute_facets
+from .fieldsets import SparseFieldsetsMixin
+from .geo import distance_expression, grid_filter
+from .leaderboards import BOARDS as LEADERBOARDS
+from . import versioning
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, index as autocomplete_index
+from .nearest import engine as nearest_engine
+from .pagination import KeysetPagination
+from .popularity import PopularityMixin, buffer as popularity
+from .search import search_places
+from . import export as catalogue_export, tiles
+
+NEAREST_MAX_K = 100
+
+
+def _parse_bool(value):
+    if value is None:
+        return None
+    return value.lower() in ("1", "true", "yes")
 
 
 # Create your views here.
-class PlaceViewSet(viewsets.ModelViewSet):
-    queryset = Place.objects.select_related("category").all().order_by("-created_at")
+class PlaceViewSet(
+    PopularityMixin, ConditionalGetMixin, SparseFieldsetsMixin, viewsets.ModelViewSet
+):
+    queryset = (
+        Place.objects.select_related("category").all().order_by("-created_at", "-id")
+    )
     serializer_class = PlaceSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
     lookup_field = "slug"
+    conditional_versions = ("places", "categories", "favorites")
+    # is_favorited зависит от пользователя
+    conditional_per_user = True
+
+    def annotate_favorites(self, qs):
+        """
+        is_favorited — подзапросом EXISTS в том же SELECT, без запросов на
+        каждую строку. favorites_count читается из колонки favorite_count.
+        """
+        fields, _ = self.get_sparse_fieldset()
+        if fields is None or "is_favorited" in fields:
+            user = self.request.user
+            if user.is_authenticated:
+                favorited = Exists(
+                    Favorite.objects.filter(user=user, place=OuterRef("pk"))
+                )
+            else:
+                favorited = Value(False)
+            qs = qs.annotate(is_favorited=favorited)
+        return qs
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = self.annotate_favorites(super().get_queryset())
         request = self.request
         q = request.query_params.get("q") or request.query_params.get("search")
         category = request.query_params.get("category")
@@ -23,51 +77,308 @@ class PlaceViewSet(viewsets.ModelViewSet):
         lon = request.query_params.get("lon")
         radius_km = request.query_params.get("radius")  # радиус в км
 
-        # Поиск по имени, описанию, адресу или категории
+        # Полнотекстовый поиск по имени, описанию, адресу и категории
         if q:
-            qs = qs.filter(
-                Q(name__icontains=q)
-                | Q(description__icontains=q)
-                | Q(address__icontains=q)
-                | Q(category__name__icontains=q)
-            )
+            qs = search_places(qs, q)
 
         # Фильтр по категории (slug или id)
         if category:
-            qs = qs.filter(Q(category__slug=category) | Q(category__id=category))
+            condition = Q(category__slug=category)
+            if category.isdigit():
+                condition |= Q(category__id=category)
+            qs = qs.filter(condition)
 
-        # Простейшая гео-фильтрация (bounding box)
-        try:
-            if lat and lon and radius_km:
+        # Фильтры чипов на экране мест
+        price_range = request.query_params.get("price_range")
+        if price_range:
+            qs = qs.filter(price_range__in=price_range.split(","))
+        hidden = _parse_bool(request.query_params.get("is_hidden_gems"))
+        if hidden is not None:
+            qs = qs.filter(is_hidden_gems=hidden)
+        min_rating = request.query_params.get("min_rating")
+        if min_rating:
+            try:
+                qs = qs.filter(rating__gte=float(min_rating))
+            except ValueError:
+                raise ValidationError({"detail": "min_rating must be a number"})
+
+        # Гео-фильтрация: кандидаты по ячейкам сетки, затем точный гаверсинус
+        if lat and lon and radius_km:
+            try:
                 lat = float(lat)
                 lon = float(lon)
                 r = float(radius_km)
-                delta = r / 111.0  # приближённо: 1° ≈ 111 км
-                qs = qs.filter(
-                    latitude__gte=lat - delta,
-                    latitude__lte=lat + delta,
-                    longitude__gte=lon - delta,
-                    longitude__lte=lon + delta,
-                )
-        except Exception:
-            pass
+            except ValueError:
+                raise ValidationError({"detail": "lat, lon and radius must be numbers"})
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180 and r > 0):
+                raise ValidationError({"detail": "lat, lon or radius out of range"})
+            qs = (
+                qs.filter(grid_filter(lat, lon, r))
+                .annotate(distance_km=distance_expression(lat, lon))
+                .filter(distance_km__lte=r)
+                .order_by("distance_km", "id")
+            )
 
         return qs
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # ?facets=true — счётчики фильтров для текущей выборки
+        if response.status_code == 200 and _parse_bool(request.query_params.get("facets")):
+            facets = compute_facets(self.filter_queryset(self.get_queryset()))
+            if isinstance(response.data, dict):
+                response.data["facets"] = facets
+            else:
+                response.data = {"results": response.data, "facets": facets}
+        return response
+
+    @action(detail=False, methods=["get"])
+    def nearest(self, request):
+        """
+        k ближайших мест к точке: ?lat&lon&k[&category][&is_hidden_gems].
+        Ранжирование в памяти процесса, из БД читаются только k найденных мест.
+        """
+        params = request.query_params
+        try:
+            lat = float(params["lat"])
+            lon = float(params["lon"])
+            k = int(params.get("k", 10))
+        except (KeyError, ValueError):
+            raise ValidationError({"detail": "lat and lon are required numbers, k an integer"})
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180) or k < 1:
+            raise ValidationError({"detail": "lat, lon or k out of range"})
+
+        found = nearest_engine.nearest(
+            lat,
+            lon,
+            min(k, NEAREST_MAX_K),
+            category=params.get("category"),
+            hidden=_parse_bool(params.get("is_hidden_gems")),
+        )
+        places = self.annotate_favorites(Place.objects.select_related("category")).in_bulk(
+            [place_id for place_id, _ in found]
+        )
+        result = []
+        for place_id, distance in found:
+            place = places.get(place_id)
+            if place is not None:
+                place.distance_km = distance
+                result.append(place)
+        return Response(self.get_serializer(result, many=True).data)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def autocomplete(request):
+    """
+    Подсказки для строки поиска: ?prefix=&limit=.
+    Отдаёт только id, slug, name и иконку категории из индекса в памяти.
+    """
+    try:
+        limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValidationError({"detail": "limit must be an integer"})
+    limit = max(1, min(limit, MAX_LIMIT))
+    prefix = request.query_params.get("prefix", "")
+    return Response(autocomplete_index.suggest(prefix, limit))
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def clusters(request):
+    """
+    Кластеры мест для карты: ?bbox=west,south,east,north&zoom=.
+    Читает готовые ячейки пирамиды одного уровня по индексу.
+    """
+    try:
+        west, south, east, north = (
+            float(v) for v in request.query_params["bbox"].split(",")
+        )
+        zoom = int(request.query_params["zoom"])
+    except (KeyError, ValueError):
+        raise ValidationError(
+            {"detail": "bbox=west,south,east,north and integer zoom are required"}
+        )
+    if not (-180 <= west <= east <= 180 and -90 <= south <= north <= 90):
+        raise ValidationError({"detail": "bbox out of range"})
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        raise ValidationError({"detail": f"zoom must be between {MIN_ZOOM} and {MAX_ZOOM}"})
+    # Ответ ограничен числом ячеек, а не мест: большая область — меньший zoom
+    if cell_count(west, south, east, north, zoom) > MAX_CELLS:
+        raise ValidationError({"detail": "bbox is too large for this zoom"})
 
-class CategoryViewSet(viewsets.ModelViewSet):
+    slugs = _category_slugs()
+    result = []
+    for cluster in clusters_in_bbox(west, south, east, north, zoom):
+        dominant = max(cluster.categories.items(), key=lambda item: item[1])[0]
+        result.append(
+            {
+                "count": cluster.count,
+                "latitude": cluster.lat_sum / cluster.count,
+                "longitude": cluster.lon_sum / cluster.count,
+                "category": slugs.get(int(dominant)),
+            }
+        )
+    return Response(result)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def leaderboards(request):
+    """
+    Топы для главной ленты сразу по всем категориям:
+    [{category, top_rated: [...], hidden_gems: [...]}]. Один запрос к готовой
+    таблице LeaderboardEntry.
+    """
+    entries = list(
+        LeaderboardEntry.objects.select_related("category", "place__category").order_by(
+            "category__name", "category_id", "board", "rank"
+        )
+    )
+    places = PlaceSerializer([entry.place for entry in entries], many=True).data
+    result = {}
+    for entry, place in zip(entries, places):
+        block = result.get(entry.category_id)
+        if block is None:
+            block = result[entry.category_id] = {
+                "category": CategorySerializer(entry.category).data,
+                **{board: [] for board in LEADERBOARDS},
+            }
+        block[entry.board].append(place)
+    return Response(list(result.values()))
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def export(request):
+    """
+    Потоковая выгрузка всего каталога (категории, места, туры) в NDJSON.
+    ?gzip=true — сжатый файл .ndjson.gz. Только для staff.
+    """
+    compress = bool(_parse_bool(request.query_params.get("gzip")))
+    response = StreamingHttpResponse(
+        catalogue_export.iter_ndjson(compress=compress),
+        content_type="application/gzip" if compress else "application/x-ndjson",
+    )
+    filename = "wayzen-catalogue.ndjson" + (".gz" if compress else "")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def tile(request, z, x, y):
+    """
+    Места тайла z/x/y в компактном бинарном формате (см. tiles.py).
+    Непустой тайл генерируется один раз и затем читается с диска.
+    """
+    if not (tiles.MIN_TILE_ZOOM <= z <= tiles.MAX_TILE_ZOOM):
+        raise ValidationError(
+            {"detail": f"zoom must be {tiles.MIN_TILE_ZOOM}..{tiles.MAX_TILE_ZOOM}, use clusters/ below"}
+        )
+    if not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+        raise ValidationError({"detail": "tile out of range"})
+    response = HttpResponse(tiles.get_tile(z, x, y), content_type=tiles.CONTENT_TYPE)
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+_category_slug_cache = {}
+
+
+def _category_slugs():
+    """id -> slug категорий, перечитывается при смене версии categories"""
+    version = versioning.get_version("categories")
+    if _category_slug_cache.get("version") != version:
+        _category_slug_cache["slugs"] = dict(Category.objects.values_list("id", "slug"))
+        _category_slug_cache["version"] = version
+    return _category_slug_cache["slugs"]
+
+
+class CategoryViewSet(ConditionalGetMixin, SparseFieldsetsMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = "slug"
+    conditional_versions = ("categories",)
 
 
 class FavoriteViewSet(viewsets.ModelViewSet):
     serializer_class = FavoriteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        return (
+            Favorite.objects.filter(user=self.request.user)
+            .select_related("place")
+            .order_by("-created_at", "-id")
+        )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    def _bulk_place_ids(self, request):
+        serializer = FavoriteBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["place_ids"]
+
+    @action(detail=False, methods=["post"], url_path="bulk-add")
+    def bulk_add(self, request):
+        """
+        POST {"place_ids": [...]} — добавляет места в избранное.
+        Статус по каждому id: added, exists или not_found.
+        """
+        ids = self._bulk_place_ids(request)
+        user = request.user
+        # Один запрос: какие места существуют и какие уже в избранном
+        found = dict(
+            Place.objects.filter(id__in=ids)
+            .annotate(
+                favorited=Exists(
+                    Favorite.objects.filter(user=user, place=OuterRef("pk"))
+                )
+            )
+            .order_by()
+            .values_list("id", "favorited")
+        )
+        # Одна вставка; гонку с параллельным запросом гасит unique_favorite
+        Favorite.objects.bulk_create(
+            [
+                Favorite(user=user, place_id=pk)
+                for pk in ids
+                if pk in found and not found[pk]
+            ],
+            ignore_conflicts=True,
+        )
+        # bulk_create не отправляет сигналы
+        added = [pk for pk in ids if pk in found and not found[pk]]
+        if added:
+            versioning.bump("favorites")
+        for pk in added:
+            popularity.record_favorite(Place, pk)
+        results = [
+            {
+                "place_id": pk,
+                "status": "not_found" if pk not in found else "exists" if found[pk] else "added",
+            }
+            for pk in ids
+        ]
+        return Response({"results": results})
+
+    @action(detail=False, methods=["post"], url_path="bulk-remove")
+    def bulk_remove(self, request):
+        """
+        POST {"place_ids": [...]} — убирает места из избранного.
+        Статус по каждому id: removed или not_found.
+        """
+        ids = self._bulk_place_ids(request)
+        favorites = Favorite.objects.filter(user=request.user, place_id__in=ids)
+        removed = set(favorites.values_list("place_id", flat=True))
+        if removed:
+            favorites.filter(place_id__in=removed).delete()
+        results = [
+            {"place_id": pk, "status": "removed" if pk in removed else "not_found"}
+            for pk in ids
+        ]
+        return Response({"results": results})
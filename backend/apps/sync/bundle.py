@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Max
+
+from apps.places import export
+from apps.places.models import Category, Place
+from apps.tours.models import Tour
+
+from .models import ChangeLogEntry
+
+# Офлайн-пакет каталога: несжатый tar из
+#   manifest.json                 — список частей с sha256 и числом записей
+#   chunks/<kind>-<bucket>.json.gz — записи с id в [bucket * CHUNK_ROWS, ...)
+#   thumbs/<kind>/<id>.webp        — самая маленькая копия изображения
+# Отпечаток части — id последней записи журнала изменений среди её объектов,
+# поэтому неизменённые части берутся из кэша на диске без запросов к таблицам.
+# Имя пакета содержит хэш манифеста; пакет неизменяем и кэшируется навсегда.
+FORMAT = 1
+CHUNK_ROWS = 1000
+KEEP_BUNDLES = 2
+
+KINDS = {
+    ChangeLogEntry.CATEGORY: (Category, export.CATEGORY_FIELDS),
+    ChangeLogEntry.PLACE: (Place, export.PLACE_FIELDS + ("image_placeholder",)),
+    ChangeLogEntry.TOUR: (Tour, export.TOUR_FIELDS + ("image_placeholder",)),
+}
+
+
+def bundle_dir():
+    return Path(
+        getattr(settings, "OFFLINE_BUNDLE_DIR", settings.BASE_DIR / "cache" / "bundle")
+    )
+
+
+def _fingerprints():
+    """{(kind, bucket): id последней записи журнала} — один запрос"""
+    rows = (
+        ChangeLogEntry.objects.order_by()
+        .annotate(bucket=F("object_id") / CHUNK_ROWS)
+        .values("kind", "bucket")
+        .annotate(last=Max("id"))
+        .values_list("kind", "bucket", "last")
+    )
+    return {(kind, bucket): last for kind, bucket, last in rows}
+
+
+def _thumbnail(variants):
+    sizes = (variants or {}).get("sizes") or {}
+    if not sizes:
+        return None
+    return sizes[min(sizes, key=int)].get("webp")
+
+
+def _chunk_records(kind, bucket):
+    model, fields = KINDS[kind]
+    lo, hi = bucket * CHUNK_ROWS, (bucket + 1) * CHUNK_ROWS
+    columns = fields + (("image_variants",) if "image" in fields else ())
+    records = list(
+        model.objects.filter(id__gte=lo, id__lt=hi).order_by("id").values(*columns)
+    )
+    thumbnails = {}
+    for record in records:
+        if "image_variants" in record:
+            name = _thumbnail(record.pop("image_variants"))
+            if name:
+                path = f"thumbs/{kind}/{record['id']}.webp"
+                thumbnails[path] = name
+                record["thumbnail"] = path
+    if kind == ChangeLogEntry.TOUR:
+        place_ids = {record["id"]: [] for record in records}
+        links = (
+            Tour.places.through.objects.filter(tour_id__gte=lo, tour_id__lt=hi)
+            .order_by("tour_id", "place_id")
+            .values_list("tour_id", "place_id")
+        )
+        for tour_id, place_id in links:
+            place_ids[tour_id].append(place_id)
+        for record in records:
+            record["place_ids"] = place_ids[record["id"]]
+    return records, thumbnails
+
+
+def _build_chunk(kind, bucket, fingerprint):
+    """Часть из кэша или заново: (путь к .json.gz, метаданные)"""
+    cache = bundle_dir() / "chunks"
+    cache.mkdir(parents=True, exist_ok=True)
+    path = cache / f"{kind}-{bucket}-{fingerprint}.json.gz"
+    meta_path = path.with_suffix(".meta")
+    if path.exists() and meta_path.exists():
+        return path, json.loads(meta_path.read_text())
+
+    records, thumbnails = _chunk_records(kind, bucket)
+    payload = json.dumps(records, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":"))
+    # mtime=0 — одинаковые данные дают одинаковые байты и хэш
+    data = gzip.compress(payload.encode(), mtime=0)
+    meta = {
+        "name": f"chunks/{kind}-{bucket}.json.gz",
+        "kind": kind,
+        "count": len(records),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "thumbnails": thumbnails,
+    }
+    for stale in cache.glob(f"{kind}-{bucket}-*"):
+        stale.unlink(missing_ok=True)
+    _write_atomic(path, data)
+    _write_atomic(meta_path, json.dumps(meta).encode())
+    return path, meta
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _add(tar, name, fileobj, size):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = 0
+    tar.addfile(info, fileobj)
+
+
+def build():
+    """
+    Собирает пакет (если каталог изменился) и делает его текущим.
+    Возвращает описание пакета, как current().
+    """
+    bundle_dir().mkdir(parents=True, exist_ok=True)
+    chunks = [
+        _build_chunk(kind, bucket, fingerprint)
+        for (kind, bucket), fingerprint in sorted(_fingerprints().items())
+    ]
+    chunks = [(path, meta) for path, meta in chunks if meta["count"]]
+    manifest = {
+        "format": FORMAT,
+        "chunks": [
+            {key: meta[key] for key in ("name", "kind", "count", "sha256")}
+            for _, meta in chunks
+        ],
+        "thumbnails": sorted(
+            (path, name) for _, meta in chunks for path, name in meta["thumbnails"].items()
+        ),
+    }
+    manifest_bytes = json.dumps(manifest, sort_keys=True).encode()
+    digest = hashlib.sha256(manifest_bytes).hexdigest()
+    name = f"wayzen-offline-{digest[:20]}.tar"
+    target = bundle_dir() / name
+
+    if not target.exists():
+        fd, tmp = tempfile.mkstemp(dir=bundle_dir(), suffix=".tmp")
+        with os.fdopen(fd, "wb") as out, tarfile.open(fileobj=out, mode="w") as tar:
+            _add(tar, "manifest.json", io.BytesIO(manifest_bytes), len(manifest_bytes))
+            for path, meta in chunks:
+                with open(path, "rb") as f:
+                    _add(tar, meta["name"], f, path.stat().st_size)
+            for path, source in manifest["thumbnails"]:
+                if default_storage.exists(source):
+                    with default_storage.open(source, "rb") as f:
+                        _add(tar, path, f, default_storage.size(source))
+        os.replace(tmp, target)
+
+    info = {
+        "name": name,
+        "hash": digest,
+        "size": target.stat().st_size,
+        "built_at": time.time(),
+    }
+    _write_atomic(bundle_dir() / "current.json", json.dumps(info).encode())
+    _prune(keep=name)
+    return info
+
+
+def _prune(keep):
+    bundles = sorted(
+        bundle_dir().glob("wayzen-offline-*.tar"), key=lambda p: p.stat().st_mtime
+    )
+    for path in bundles[:-KEEP_BUNDLES]:
+        if path.name != keep:
+            path.unlink(missing_ok=True)
+
+
+def current():
+    """Описание текущего пакета или None, если он ещё не собран"""
+    try:
+        return json.loads((bundle_dir() / "current.json").read_text())
+    except FileNotFoundError:
+        return None
+
+
+def bundle_path(name):
+    """Путь к пакету по имени из current(); None для чужих/удалённых имён"""
+    if not (name.startswith("wayzen-offline-") and name.endswith(".tar")) or "/" in name:
+        return None
+    path = bundle_dir() / name
+    return path if path.exists() else None
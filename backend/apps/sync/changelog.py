@@ -0,0 +1,80 @@
+from django.db.models import Max
+
+from apps.places.models import Category, Place
+from apps.places.serializers import CategorySerializer, PlaceSerializer
+from apps.tours.models import Tour
+from apps.tours.serializers import TourSerializer
+
+from .models import ChangeLogEntry
+
+# Изменения за один ответ; остальное клиент дочитывает по has_more
+PAGE_SIZE = 1000
+
+# kind -> (модель, ключ в ответе)
+KINDS = {
+    ChangeLogEntry.CATEGORY: (Category, "categories"),
+    ChangeLogEntry.PLACE: (Place, "places"),
+    ChangeLogEntry.TOUR: (Tour, "tours"),
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _) in KINDS.items()}
+
+# Туры отдаются со списком id мест вместо вложенных объектов
+TOUR_FIELDS = [
+    name for name, field in TourSerializer().fields.items() if not field.write_only
+]
+
+
+def record(model, object_ids, deleted=False):
+    """Добавляет записи журнала для объектов model (одним INSERT)"""
+    kind = KIND_BY_MODEL[model]
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(kind=kind, object_id=pk, deleted=deleted) for pk in object_ids
+    )
+
+
+def latest_token():
+    return ChangeLogEntry.objects.aggregate(last=Max("id"))["last"] or 0
+
+
+def _serialize(kind, objects, context):
+    if kind == ChangeLogEntry.CATEGORY:
+        return CategorySerializer(objects, many=True, context=context).data
+    if kind == ChangeLogEntry.PLACE:
+        qs = objects.select_related("category")
+        return PlaceSerializer(qs, many=True, context=context).data
+    qs = TourSerializer.restrict_queryset(objects, TOUR_FIELDS, ())
+    return TourSerializer(
+        qs, many=True, context=context, fields=TOUR_FIELDS, expand=()
+    ).data
+
+
+def changes_since(since, context=None, page_size=PAGE_SIZE):
+    """
+    Изменения после токена since: актуальные версии изменённых объектов и
+    id удалённых. Несколько записей об одном объекте схлопываются в последнюю.
+    """
+    entries = list(
+        ChangeLogEntry.objects.filter(id__gt=since)
+        .order_by("id")
+        .values_list("id", "kind", "object_id", "deleted")[: page_size + 1]
+    )
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+    token = entries[-1][0] if entries else max(since, 0)
+
+    state = {kind: {} for kind in KINDS}
+    for _, kind, object_id, deleted in entries:
+        state[kind][object_id] = deleted
+
+    context = context or {}
+    result = {"token": str(token), "has_more": has_more, "deleted": {}}
+    for kind, (model, key) in KINDS.items():
+        changed = [pk for pk, deleted in state[kind].items() if not deleted]
+        objects = model.objects.filter(pk__in=changed).order_by("pk")
+        result[key] = _serialize(kind, objects, context) if changed else []
+        found = {item["id"] for item in result[key]}
+        # Объект, исчезнувший без записи в журнале, тоже считается удалённым
+        result["deleted"][key] = sorted(
+            pk for pk, deleted in state[kind].items() if deleted or pk not in found
+        )
+    return result
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.sync import bundle
+
+
+class Command(BaseCommand):
+    help = "Build the offline catalogue bundle, reusing unchanged chunks"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        info = bundle.build()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {info['name']} ({info['size']:,} bytes) "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from apps.sync.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = "Drop changelog entries superseded by a later entry for the same object"
+
+    def handle(self, *args, **options):
+        # Клиенту с любым токеном достаточно последней записи по объекту,
+        # поэтому сжатие не делает выданные токены недействительными
+        latest = (
+            ChangeLogEntry.objects.order_by()
+            .values("kind", "object_id")
+            .annotate(last=Max("id"))
+            .values("last")
+        )
+        deleted, _ = ChangeLogEntry.objects.exclude(id__in=latest).delete()
+        self.stdout.write(self.style.SUCCESS(f"✅ Removed {deleted} superseded entries"))
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def seed_changelog(apps, schema_editor):
+    # Существующие объекты попадают в журнал, чтобы since=0 отдавал весь каталог
+    ChangeLogEntry = apps.get_model("sync", "ChangeLogEntry")
+    for kind, label in (
+        ("category", "places.Category"),
+        ("place", "places.Place"),
+        ("tour", "tours.Tour"),
+    ):
+        model = apps.get_model(label)
+        ids = model.objects.order_by("pk").values_list("pk", flat=True)
+        ChangeLogEntry.objects.bulk_create(
+            (ChangeLogEntry(kind=kind, object_id=pk) for pk in ids.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sync", "0001_initial"),
+        ("places", "0009_image_placeholder"),
+        ("tours", "0005_image_placeholder"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_changelog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Запись журнала изменений каталога для дельта-синхронизации.
+    Журнал только дополняется; id записи служит токеном синхронизации.
+    """
+
+    CATEGORY = "category"
+    PLACE = "place"
+    TOUR = "tour"
+    KIND_CHOICES = [(CATEGORY, "Category"), (PLACE, "Place"), (TOUR, "Tour")]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # Объект удалён (tombstone)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["kind", "object_id"], name="changelog_object_idx"),
+        ]
+
+    def __str__(self):
+        action = "deleted" if self.deleted else "changed"
+        return f"#{self.id} {self.kind} {self.object_id} {action}"
@@ -0,0 +1,60 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.places.images import variants_saved
+from apps.places.importer import places_imported
+from apps.places.models import Category, Place
+from apps.tours.models import Tour
+
+from . import changelog
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Place)
+@receiver(post_save, sender=Tour)
+def object_saved(sender, instance, **kwargs):
+    changelog.record(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Place)
+@receiver(post_delete, sender=Tour)
+def object_deleted(sender, instance, **kwargs):
+    changelog.record(sender, [instance.pk], deleted=True)
+
+
+@receiver(m2m_changed, sender=Tour.places.through)
+def tour_places_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        changelog.record(Tour, [instance.pk])
+    elif pk_set:
+        # place.tours.add(...) — изменились туры из pk_set
+        changelog.record(Tour, sorted(pk_set))
+
+
+@receiver(pre_delete, sender=Place)
+def remember_place_tours(sender, instance, **kwargs):
+    # Связи с турами удаляются каскадом без m2m_changed
+    instance._sync_tour_ids = list(instance.tours.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Place)
+def place_tours_changed(sender, instance, **kwargs):
+    tour_ids = getattr(instance, "_sync_tour_ids", None)
+    if tour_ids:
+        changelog.record(Tour, tour_ids)
+
+
+@receiver(variants_saved)
+def image_variants_saved(sender, pk, **kwargs):
+    # Копии изображения записываются через update() без post_save
+    if sender in changelog.KIND_BY_MODEL:
+        changelog.record(sender, [pk])
+
+
+@receiver(places_imported)
+def places_bulk_imported(sender, ids, **kwargs):
+    # Импорт пишет места через bulk_create без post_save
+    changelog.record(Place, ids)
@@ -0,0 +1,130 @@
+import io
+import json
+import tarfile
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.places.models import Category, Place
+from apps.tours.models import Tour
+
+from . import bundle
+
+
+class DeltaSyncTests(TestCase):
+    url = "/api/sync/"
+
+    def setUp(self):
+        self.category = Category.objects.create(name="History", slug="history")
+        self.place = Place.objects.create(
+            name="Ark Fortress", slug="ark-fortress", category=self.category
+        )
+        self.tour = Tour.objects.create(name="Bukhara", slug="bukhara")
+        self.tour.places.add(self.place)
+
+    def test_full_sync_then_delta(self):
+        full = self.client.get(self.url).json()
+        self.assertEqual([p["id"] for p in full["places"]], [self.place.pk])
+        self.assertEqual(full["tours"][0]["places"], [self.place.pk])
+        self.assertFalse(full["has_more"])
+
+        empty = self.client.get(self.url, {"since": full["token"]}).json()
+        self.assertEqual(empty["token"], full["token"])
+        self.assertEqual(empty["places"], [])
+
+        other = Place.objects.create(name="Lyabi-Hauz", slug="lyabi-hauz")
+        deleted_pk = self.place.pk
+        self.place.delete()
+        delta = self.client.get(self.url, {"since": full["token"]}).json()
+        self.assertEqual([p["id"] for p in delta["places"]], [other.pk])
+        self.assertEqual(delta["deleted"]["places"], [deleted_pk])
+        # Тур потерял место при каскадном удалении
+        self.assertEqual(delta["tours"][0]["places"], [])
+        self.assertEqual(delta["categories"], [])
+
+    def test_has_more_pages(self):
+        from apps.sync import changelog
+
+        first = changelog.changes_since(0, page_size=2)
+        self.assertTrue(first["has_more"])
+        rest = changelog.changes_since(int(first["token"]), page_size=100)
+        self.assertFalse(rest["has_more"])
+
+
+class OfflineBundleTests(TestCase):
+    url = "/api/sync/bundle/"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        bundle_dir = override_settings(OFFLINE_BUNDLE_DIR=directory.name)
+        bundle_dir.enable()
+        self.addCleanup(bundle_dir.disable)
+        category = Category.objects.create(name="History", slug="history")
+        self.place = Place.objects.create(
+            name="Ark Fortress", slug="ark-fortress", category=category
+        )
+        staff = get_user_model().objects.create_user(
+            username="staff", email="staff@example.com", password="x", is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+
+    def build(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def download(self, info, **headers):
+        return self.client.get(f"{self.url}{info['name']}", **headers)
+
+    def test_build_and_download(self):
+        info = self.build()
+        self.assertEqual(self.client.get(self.url).json()["name"], info["name"])
+        response = self.download(info)
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content)
+        self.assertEqual(len(content), info["size"])
+        with tarfile.open(fileobj=io.BytesIO(content)) as tar:
+            manifest = json.load(tar.extractfile("manifest.json"))
+            self.assertEqual(
+                [chunk["kind"] for chunk in manifest["chunks"]], ["category", "place"]
+            )
+
+    def test_range_and_if_range(self):
+        info = self.build()
+        full = b"".join(self.download(info).streaming_content)
+
+        etag = f'"{info["name"]}"'
+        response = self.download(info, HTTP_RANGE="bytes=100-199", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{info['size']}")
+        self.assertEqual(b"".join(response.streaming_content), full[100:200])
+
+        response = self.download(info, HTTP_RANGE="bytes=-10")
+        self.assertEqual(b"".join(response.streaming_content), full[-10:])
+
+        # If-Range от другой версии — докачка невозможна, отдаётся весь файл
+        response = self.download(info, HTTP_RANGE="bytes=100-199", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), full)
+
+        response = self.download(info, HTTP_RANGE=f"bytes={info['size']}-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_unchanged_chunks_are_reused(self):
+        first = self.build()
+        chunks = bundle.bundle_dir() / "chunks"
+        before = {path.name for path in chunks.glob("*.json.gz")}
+        self.assertEqual(self.build()["name"], first["name"])
+
+        self.place.name = "Ark"
+        self.place.save()
+        second = self.build()
+        self.assertNotEqual(second["name"], first["name"])
+        after = {path.name for path in chunks.glob("*.json.gz")}
+        # Новый отпечаток только у части с изменённым местом
+        self.assertEqual({name.split("-")[0] for name in before ^ after}, {"place"})
+        self.assertEqual(len(before - after), 1)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import bundle, bundle_file, sync
+
+urlpatterns = [
+    path("", sync, name="sync"),
+    path("bundle/", bundle, name="offline-bundle"),
+    path("bundle/<str:name>", bundle_file, name="offline-bundle-file"),
+]
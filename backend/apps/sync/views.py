@@ -0,0 +1,127 @@
+import re
+
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.response import Response
+
+from . import bundle as offline_bundle
+from . import changelog
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+READ_BLOCK = 256 * 1024
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def sync(request):
+    """
+    Дельта-синхронизация каталога: ?since=<token>.
+    Без since (или since=0) — весь каталог постранично. Пока has_more,
+    клиент повторяет запрос с полученным token.
+    """
+    since = request.query_params.get("since") or "0"
+    if not since.isdigit():
+        raise ValidationError({"detail": "since must be a token from a previous sync"})
+    return Response(changelog.changes_since(int(since), context={"request": request}))
+
+
+@api_view(["GET", "POST"])
+@permission_classes([permissions.AllowAny])
+def bundle(request):
+    """
+    GET — описание текущего офлайн-пакета и ссылка на него.
+    POST (staff) — пересобрать пакет; неизменённые части берутся из кэша.
+    """
+    if request.method == "POST":
+        if not request.user.is_staff:
+            raise PermissionDenied()
+        info = offline_bundle.build()
+    else:
+        info = offline_bundle.current()
+        if info is None:
+            raise NotFound("Offline bundle has not been built yet")
+    url = reverse("offline-bundle-file", kwargs={"name": info["name"]})
+    response = Response({**info, "url": request.build_absolute_uri(url)})
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def _byte_range(header, size):
+    """(start, end) из заголовка Range; None — отдать целиком; ValueError — 416"""
+    match = RANGE_RE.fullmatch(header.strip())
+    if match is None:
+        # Несколько диапазонов и прочие формы не поддерживаются
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(READ_BLOCK, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def bundle_file(request, name):
+    """
+    Файл пакета: имя содержит хэш содержимого, поэтому ответ неизменяем.
+    Поддерживает Range/If-Range для докачки по плохой связи.
+    """
+    path = offline_bundle.bundle_path(name)
+    if path is None:
+        raise Http404
+    size = path.stat().st_size
+    etag = quote_etag(name)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        return HttpResponse(status=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = _byte_range(range_header, size)
+        except ValueError:
+            return HttpResponse(
+                status=416, headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    response = StreamingHttpResponse(
+        _read(path, start, length),
+        status=206 if byte_range else 200,
+        content_type="application/x-tar",
+        headers=headers,
+    )
+    response["Content-Length"] = str(length)
+    response["Content-Disposition"] = f'attachment; filename="{name}"'
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
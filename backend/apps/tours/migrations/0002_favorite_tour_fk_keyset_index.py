@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0004_favorite_created_at_keyset_indexes'),
+        ('tours', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favoritetour',
+            name='tour',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='favorited_by', to='tours.tour'),
+        ),
+        migrations.AlterField(
+            model_name='favoritetour',
+            name='name',
+            field=models.CharField(blank=True, max_length=200, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='favoritetour',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=200, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='favoritetour',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='favtour_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['-created_at', '-id'], name='tour_created_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='favoritetour',
+            constraint=models.UniqueConstraint(fields=('user', 'tour'), name='unique_favorite_tour'),
+        ),
+    ]
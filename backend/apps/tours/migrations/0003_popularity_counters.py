@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_favorite_counts(apps, schema_editor):
+    Tour = apps.get_model("tours", "Tour")
+    FavoriteTour = apps.get_model("tours", "FavoriteTour")
+    counts = (
+        FavoriteTour.objects.filter(tour=OuterRef("pk"))
+        .order_by()
+        .values("tour")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Tour.objects.update(favorite_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0002_favorite_tour_fk_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='favorite_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_favorite_counts, migrations.RunPython.noop),
+    ]
@@ -3,16 +3,22 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
+from apps.places.popularity import PopularityCounters
+
 User = get_user_model()
 
 
-class Tour(models.Model):
+class Tour(PopularityCounters):
     name = models.CharField(_("Название тура"), max_length=255)
     slug = models.SlugField(max_length=255, unique=True, null=True, blank=True)
     description = models.TextField(_("Описание"), blank=True)
     image = models.ImageField(
         _("Изображение тура"), upload_to="tours/", null=True, blank=True
     )
+    # Уменьшенные копии изображения (см. apps/places/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Размытое превью для показа до загрузки изображения (data URI)
+    image_placeholder = models.TextField(blank=True, editable=False)
     places = models.ManyToManyField(
         "places.Place", related_name="tours", verbose_name=_("Места")
     )
@@ -25,6 +31,9 @@ class Tour(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="tour_created_id_idx"),
+        ]
         verbose_name = _("Тур")
         verbose_name_plural = _("Туры")
 
@@ -33,13 +42,19 @@ class Tour(models.Model):
 
 
 class FavoriteTour(models.Model):
-    name = models.CharField(max_length=200, unique=True)
+    name = models.CharField(max_length=200, unique=True, null=True, blank=True)
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name="favorite_tours",
     )
-    slug = models.SlugField(max_length=200, unique=True)
+    tour = models.ForeignKey(
+        Tour,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="favorited_by",
+    )
+    slug = models.SlugField(max_length=200, unique=True, null=True, blank=True)
     icon = models.CharField(
         max_length=8, blank=True, help_text="Emoji или короткий значок"
     )
@@ -47,6 +62,15 @@ class FavoriteTour(models.Model):
 
     class Meta:
         ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "tour"], name="unique_favorite_tour")
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="favtour_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
-        return self.name
+        return self.name or f"{self.user} → {self.tour}"
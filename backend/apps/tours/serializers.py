@@ -1,14 +1,16 @@
 from rest_framework import serializers
-from .models import Tour
-from apps.places.models import Place, FavoriteTour
-from apps.places.serializers import PlaceSerializer
+from .models import Tour, FavoriteTour
+from apps.places.models import Place
+from apps.places.fieldsets import SparseFieldsetSerializerMixin
+from apps.places.serializers import PlaceSerializer, SrcsetField
 
 
-class TourSerializer(serializers.ModelSerializer):
+class TourSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     places = PlaceSerializer(many=True, read_only=True)
     place_ids = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Place.objects.all(), write_only=True, source="places"
     )
+    srcset = SrcsetField()
 
     class Meta:
         model = Tour
@@ -18,6 +20,8 @@ class TourSerializer(serializers.ModelSerializer):
             "slug",
             "description",
             "image",
+            "srcset",
+            "image_placeholder",
             "price",
             "duration",
             "places",
@@ -26,11 +30,15 @@ class TourSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    expandable_fields = {"places": True}
+
 
 class TourShortSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField()
+
     class Meta:
         model = Tour
-        fields = ["id", "name", "slug", "image", "price"]
+        fields = ["id", "name", "slug", "image", "srcset", "image_placeholder", "price"]
 
 
 class FavoriteTourSerializer(serializers.ModelSerializer):
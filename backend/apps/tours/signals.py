@@ -0,0 +1,44 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from apps.places import images, versioning
+from apps.places.popularity import buffer as popularity
+from .models import FavoriteTour, Tour
+
+
+@receiver([post_save, post_delete], sender=Tour)
+def tour_changed(sender, instance, **kwargs):
+    versioning.bump("tours")
+
+
+@receiver(m2m_changed, sender=Tour.places.through)
+def tour_places_changed(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        versioning.bump("tours")
+
+
+@receiver(post_save, sender=FavoriteTour)
+def favorite_tour_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.tour_id:
+        popularity.record_favorite(Tour, instance.tour_id)
+
+
+@receiver(post_delete, sender=FavoriteTour)
+def favorite_tour_removed(sender, instance, **kwargs):
+    if instance.tour_id:
+        popularity.record_favorite(Tour, instance.tour_id, delta=-1)
+
+
+@receiver(post_save, sender=Tour)
+def process_tour_image(sender, instance, raw=False, **kwargs):
+    if not raw and (
+        images.needs_processing(instance) or images.needs_placeholder(instance)
+    ):
+        images.pipeline.schedule(instance)
+
+
+@receiver(post_delete, sender=Tour)
+def delete_tour_image_variants(sender, instance, **kwargs):
+    variants = instance.image_variants
+    transaction.on_commit(lambda: images.delete_variants(variants))
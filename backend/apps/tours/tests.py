@@ -1,3 +1,38 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import Tour
+
+
+class TourPermissionTests(TestCase):
+    def setUp(self):
+        self.tour = Tour.objects.create(name="Old City", slug="old-city")
+        self.url = f"/api/tours/tours/{self.tour.pk}/"
+        self.client = APIClient()
+
+    def test_anonymous_can_read(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_anonymous_cannot_write(self):
+        response = self.client.patch(self.url, {"name": "Hacked"}, format="json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.delete(self.url).status_code, 401)
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.name, "Old City")
+
+    def test_regular_user_cannot_write(self):
+        user = get_user_model().objects.create_user(username="user", password="x")
+        self.client.force_authenticate(user)
+        response = self.client.patch(self.url, {"name": "Hacked"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_can_write(self):
+        staff = get_user_model().objects.create_user(
+            username="staff", password="x", is_staff=True
+        )
+        self.client.force_authenticate(staff)
+        response = self.client.patch(self.url, {"name": "New City"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.name, "New City")
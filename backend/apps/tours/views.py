@@ -1,27 +1,48 @@
-from rest_framework import viewsets, permissions, status
+from django.db.models import Prefetch
+from rest_framework import viewsets, permissions, serializers, status
 from .models import Tour, FavoriteTour
 from .serializers import TourSerializer, FavoriteTourSerializer
 from rest_framework.response import Response
+from apps.places.conditional import ConditionalGetMixin
+from apps.places.fieldsets import SparseFieldsetsMixin
+from apps.places.models import Place
+from apps.places.pagination import KeysetPagination
+from apps.places.popularity import PopularityMixin
 
 
-class TourViewSet(viewsets.ModelViewSet):
-    queryset = Tour.objects.all().order_by("-created_at")
-    serializer_class = TourSerializer
-    permission_classes = [permissions.AllowAny]
+class IsAdminOrReadOnly(permissions.BasePermission):
+    """Чтение — всем, изменение туров — только сотрудникам"""
 
+    def has_permission(self, request, view):
+        return request.method in permissions.SAFE_METHODS or bool(
+            request.user and request.user.is_staff
+        )
 
-class FavoriteViewSet(viewsets.ModelViewSet):
-    queryset = FavoriteTour.objects.all()
-    serializer_class = FavoriteSerializer
-    permission_classes = [permissions.AllowAny]
+
+class TourViewSet(
+    PopularityMixin, ConditionalGetMixin, SparseFieldsetsMixin, viewsets.ModelViewSet
+):
+    queryset = Tour.objects.prefetch_related(
+        Prefetch("places", queryset=Place.objects.select_related("category"))
+    ).order_by("-created_at", "-id")
+    serializer_class = TourSerializer
+    permission_classes = [IsAdminOrReadOnly]
+    pagination_class = KeysetPagination
+    # Туры отдаются с вложенными местами и категориями
+    conditional_versions = ("tours", "places", "categories")
 
 
 class FavoriteTourViewSet(viewsets.ModelViewSet):
     serializer_class = FavoriteTourSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return FavoriteTour.objects.filter(user=self.request.user)
+        return (
+            FavoriteTour.objects.filter(user=self.request.user)
+            .select_related("tour")
+            .order_by("-created_at", "-id")
+        )
 
     def perform_create(self, serializer):
         # предотвращаем дублирование
@@ -30,7 +51,7 @@ class FavoriteTourViewSet(viewsets.ModelViewSet):
         )
         if not created:
             raise serializers.ValidationError("Этот тур уже в избранном.")
-        return instance
+        serializer.instance = instance
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
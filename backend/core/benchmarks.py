@@ -0,0 +1,258 @@
+import itertools
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Сценарии нагрузочного бенчмарка API. Каждый сценарий — функция
+# (client, ctx) -> response, которая проходит через настоящие URL,
+# middleware и аутентификацию. Задержка измеряется без инструментирования,
+# число запросов к БД и пик памяти — отдельным прогоном.
+
+BENCH_USER = "bench_user"
+BENCH_PASSWORD = "bench-password"
+
+# Бенчмарк падает, если метрика хуже базовой больше чем на порог...
+DEFAULT_THRESHOLD = 0.3
+# ...и при этом разница по времени больше шума измерения
+MIN_DELTA_MS = 2.0
+
+SCENARIOS = {}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def scenario(name, auth=False):
+    def decorator(fn):
+        SCENARIOS[name] = (fn, auth)
+        return fn
+
+    return decorator
+
+
+def _ok(response):
+    if response.status_code >= 400:
+        raise BenchmarkError(f"{response.request['PATH_INFO']}: HTTP {response.status_code}")
+    return response
+
+
+# --- Сценарии -------------------------------------------------------------
+
+
+@scenario("places_list")
+def places_list(client, ctx):
+    return _ok(client.get("/api/places/places/", {"page_size": 20}))
+
+
+@scenario("places_search")
+def places_search(client, ctx):
+    return _ok(client.get("/api/places/places/", {"search": "museum", "page_size": 20}))
+
+
+@scenario("places_radius")
+def places_radius(client, ctx):
+    lat, lon = ctx["point"]
+    return _ok(
+        client.get("/api/places/places/", {"lat": lat, "lon": lon, "radius": 5, "page_size": 20})
+    )
+
+
+@scenario("places_nearest")
+def places_nearest(client, ctx):
+    lat, lon = ctx["point"]
+    return _ok(client.get("/api/places/places/nearest/", {"lat": lat, "lon": lon, "k": 20}))
+
+
+@scenario("place_detail")
+def place_detail(client, ctx):
+    return _ok(client.get(f"/api/places/places/{next(ctx['slugs'])}/"))
+
+
+@scenario("categories_list")
+def categories_list(client, ctx):
+    return _ok(client.get("/api/places/categories/"))
+
+
+@scenario("tours_list")
+def tours_list(client, ctx):
+    return _ok(client.get("/api/tours/tours/", {"page_size": 20}))
+
+
+@scenario("favorites_list", auth=True)
+def favorites_list(client, ctx):
+    return _ok(client.get("/api/places/favorites/"))
+
+
+@scenario("favorites_create_delete", auth=True)
+def favorites_create_delete(client, ctx):
+    response = _ok(
+        client.post("/api/places/favorites/", {"place_id": ctx["free_place"]}, format="json")
+    )
+    return _ok(client.delete(f"/api/places/favorites/{response.data['id']}/"))
+
+
+@scenario("auth_login")
+def auth_login(client, ctx):
+    return _ok(
+        client.post(
+            "/api/auth/users/",
+            {"username": BENCH_USER, "password": BENCH_PASSWORD},
+            format="json",
+        )
+    )
+
+
+@scenario("auth_register")
+def auth_register(client, ctx):
+    number = next(ctx["counter"])
+    return _ok(
+        client.post(
+            "/api/auth/register/",
+            {
+                "username": f"bench_register_{number}",
+                "password": BENCH_PASSWORD,
+                "email": f"bench_register_{number}@example.com",
+            },
+            format="json",
+        )
+    )
+
+
+@scenario("chats_list", auth=True)
+def chats_list(client, ctx):
+    return _ok(client.get("/api/guide/chats/"))
+
+
+@scenario("chat_history", auth=True)
+def chat_history(client, ctx):
+    return _ok(client.get(f"/api/guide/history/{ctx['chat_id']}/"))
+
+
+# --- Запуск ---------------------------------------------------------------
+
+
+def prepare():
+    """Пользователь бенчмарка и объекты, на которые ссылаются сценарии"""
+    from apps.guide.models import ChatSession, Message
+    from apps.places.models import Place
+
+    User = get_user_model()
+    user = User.objects.create_user(
+        username=BENCH_USER, email="bench_user@example.com", password=BENCH_PASSWORD
+    )
+    popular = Place.objects.order_by("-favorite_count", "id")
+    slugs = list(popular.values_list("slug", flat=True)[:100])
+    if not slugs:
+        raise BenchmarkError("no places in the database")
+    center = popular.exclude(latitude=None).first()
+    # Чаты видны только владельцу: пользователю бенчмарка копируются
+    # сообщения последнего сгенерированного чата
+    source = ChatSession.objects.order_by("-id").first()
+    chat = ChatSession.objects.create(user=user, title="Benchmark")
+    if source is not None:
+        Message.objects.bulk_create(
+            Message(chat=chat, role=message.role, content=message.content)
+            for message in source.messages.order_by("created_at", "id")
+        )
+    return {
+        "user": user,
+        "token": str(RefreshToken.for_user(user).access_token),
+        "slugs": itertools.cycle(slugs),
+        "free_place": Place.objects.order_by("id").values_list("id", flat=True).first(),
+        "point": (float(center.latitude), float(center.longitude)),
+        "chat_id": chat.pk,
+        "counter": itertools.count(),
+    }
+
+
+def _percentile(samples, q):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+def run_scenario(name, ctx, iterations, warmup=5):
+    fn, auth = SCENARIOS[name]
+    client = APIClient()
+    if auth:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ctx['token']}")
+    for _ in range(warmup):
+        fn(client, ctx)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(client, ctx)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Отдельный прогон: учёт запросов и tracemalloc искажают время
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            fn(client, ctx)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(_percentile(timings, 50), 3),
+        "p95_ms": round(_percentile(timings, 95), 3),
+        "p99_ms": round(_percentile(timings, 99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": len(queries.captured_queries),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+METRICS = ("p50_ms", "p95_ms", "queries", "peak_kb")
+
+
+def load_baseline(path):
+    """Базовый прогон из JSON-файла; BenchmarkError, если файл не читается"""
+    try:
+        with open(path) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError) as exc:
+        raise BenchmarkError(f"cannot read baseline: {exc}")
+    scenarios = baseline.get("scenarios") if isinstance(baseline, dict) else None
+    if not isinstance(scenarios, dict):
+        raise BenchmarkError(f"baseline {path} has no scenarios")
+    for name, metrics in scenarios.items():
+        if not isinstance(metrics, dict) or not all(
+            isinstance(metrics.get(metric), (int, float)) for metric in METRICS
+        ):
+            raise BenchmarkError(
+                f"baseline {path}: scenario {name} lacks {', '.join(METRICS)}"
+            )
+    return baseline
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """Регрессии относительно базового прогона: [(сценарий, метрика, было, стало)]"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        # p99 на десятках итераций — почти максимум, сравнивать его шумно
+        for metric in ("p50_ms", "p95_ms"):
+            if (
+                current[metric] > base[metric] * (1 + threshold)
+                and current[metric] - base[metric] > min_delta_ms
+            ):
+                regressions.append((name, metric, base[metric], current[metric]))
+        # Число запросов детерминировано — любой рост считается регрессией
+        if current["queries"] > base["queries"]:
+            regressions.append((name, "queries", base["queries"], current["queries"]))
+        if current["peak_kb"] > base["peak_kb"] * (1 + threshold):
+            regressions.append((name, "peak_kb", base["peak_kb"], current["peak_kb"]))
+    return regressions
@@ -0,0 +1,141 @@
+import json
+import logging
+import random
+import re
+import time
+import warnings
+from collections import Counter
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+
+# Учёт SQL-запросов каждого запроса: число запросов, время в БД и
+# повторяющиеся формы запросов (N+1). Результат — заголовок Server-Timing
+# и одна строка JSON в логе "wayzen.sql". Инструментируется только доля
+# запросов SAMPLE_RATE, остальные проходят без обёрток.
+#
+# Запросы, выполненные при чтении StreamingHttpResponse, не учитываются:
+# тело потока читается уже после выхода из middleware.
+
+logger = logging.getLogger("wayzen.sql")
+
+DEFAULTS = {
+    "SAMPLE_RATE": 1.0,
+    # Сколько раз одна форма запроса может выполниться за запрос
+    "DUPLICATE_THRESHOLD": 10,
+    # "log" — предупреждение в лог, "warn" — NPlusOneWarning, "raise" — NPlusOneError
+    "ON_DUPLICATES": "log",
+}
+
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*%s\s*,?)+\)", re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "SQL_INSTRUMENTATION", {})}
+
+
+@lru_cache(maxsize=2048)
+def normalize(sql):
+    """Форма запроса: без литералов и с IN (...) любой длины"""
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper: считает запросы и их время"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.shapes[sql] += 1
+
+    def duplicates(self, threshold):
+        """[(форма, сколько раз)] для форм, выполненных больше threshold раз"""
+        counts = Counter()
+        for sql, count in self.shapes.items():
+            counts[normalize(sql)] += count
+        return [(shape, count) for shape, count in counts.most_common() if count > threshold]
+
+
+def add_server_timing(response, *metrics):
+    """Дописывает метрики к заголовку Server-Timing"""
+    value = ", ".join(metrics)
+    if response.has_header("Server-Timing"):
+        value = f"{response['Server-Timing']}, {value}"
+    response["Server-Timing"] = value
+
+
+class SQLInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if random.random() >= config["SAMPLE_RATE"]:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = recorder.seconds * 1000
+
+        duplicates = recorder.duplicates(config["DUPLICATE_THRESHOLD"])
+        add_server_timing(
+            response,
+            f'db;dur={db_ms:.2f};desc="{recorder.count} queries"',
+            f"app;dur={total_ms - db_ms:.2f}",
+        )
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(db_ms, 2),
+            "total_ms": round(total_ms, 2),
+            "duplicates": [{"sql": shape[:300], "count": count} for shape, count in duplicates],
+        }
+        logger.info(json.dumps(record, ensure_ascii=False))
+        if duplicates:
+            self.report(config["ON_DUPLICATES"], request, duplicates)
+        return response
+
+    def report(self, action, request, duplicates):
+        shape, count = duplicates[0]
+        message = (
+            f"{request.method} {request.path}: query ran {count} times "
+            f"(possible N+1): {shape[:300]}"
+        )
+        if action == "raise":
+            raise NPlusOneError(message)
+        if action == "warn":
+            warnings.warn(message, NPlusOneWarning, stacklevel=2)
+        else:
+            logger.warning(message)
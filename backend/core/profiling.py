@@ -0,0 +1,297 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .instrumentation import add_server_timing
+
+# Статистический профилировщик: отдельный поток раз в INTERVAL_MS снимает
+# стеки через sys._current_frames(). Два режима:
+#   - один запрос: сотрудник отправляет заголовок X-Profile: 1 (или
+#     X-Profile: collapsed / speedscope), профилируется только его поток;
+#   - окно: POST /api/profiling/ {"seconds": N} — все потоки процесса.
+#     Окно хранится в памяти процесса (_window) и снимает только тот
+#     воркер, который принял POST; остальные воркеры не профилируются.
+# Профили сохраняются в PROFILING["DIR"] в формате speedscope JSON
+# (https://www.speedscope.app) или collapsed stacks (flamegraph.pl).
+# Без заголовка и окна накладные расходы — одна проверка словаря.
+
+DEFAULTS = {
+    "DIR": None,  # по умолчанию BASE_DIR / "cache" / "profiles"
+    "INTERVAL_MS": 5,
+    "MAX_WINDOW": 60,  # секунд
+    "FORMAT": "speedscope",
+    "KEEP": 50,  # сколько последних профилей хранить
+}
+FORMATS = {"speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}
+MAX_DEPTH = 200
+
+_NAME_RE = re.compile(r"^[\w.-]+$")
+_window_lock = threading.Lock()
+_window = None
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, "PROFILING", {})}
+    config["DIR"] = Path(config["DIR"] or settings.BASE_DIR / "cache" / "profiles")
+    return config
+
+
+def _short_path(filename):
+    for prefix in (str(settings.BASE_DIR), sys.prefix, sys.base_prefix):
+        if filename.startswith(prefix):
+            return filename[len(prefix) :].lstrip(os.sep)
+    return filename
+
+
+class Sampler(threading.Thread):
+    """Снимает стеки потоков thread_ids (None — всех) до вызова stop()"""
+
+    def __init__(self, thread_ids=None, interval_ms=5):
+        super().__init__(name="wayzen-profiler", daemon=True)
+        self.thread_ids = thread_ids
+        self.interval = interval_ms / 1000
+        self.interval_ms = interval_ms
+        self.stacks = Counter()  # (имя потока, (кадр, ...)) -> число выборок
+        self.frames = {}  # code -> (функция, файл, строка)
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._stop_event = threading.Event()
+
+    def _frame(self, code):
+        frame = self.frames.get(code)
+        if frame is None:
+            frame = self.frames[code] = (
+                code.co_name,
+                _short_path(code.co_filename),
+                code.co_firstlineno,
+            )
+        return frame
+
+    def sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            name = names.get(thread_id, str(thread_id))
+            if name.startswith("wayzen-profiler"):
+                continue
+            if self.thread_ids is not None and thread_id not in self.thread_ids:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(self._frame(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[(name, tuple(stack))] += 1
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    # --- Форматы ---
+
+    def collapsed(self):
+        lines = []
+        for (thread, stack), count in sorted(self.stacks.items()):
+            names = [thread] + [f"{name} ({path}:{line})" for name, path, line in stack]
+            lines.append(f"{';'.join(name.replace(';', ':') for name in names)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, title):
+        frames, index = [], {}
+        by_thread = {}
+        for (thread, stack), count in self.stacks.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, path, line = frame
+                    frames.append({"name": name, "file": path, "line": line})
+                ids.append(index[frame])
+            samples, weights = by_thread.setdefault(thread, ([], []))
+            samples.append(ids)
+            weights.append(count * self.interval_ms)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": title,
+            "exporter": "wayzen",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+                for thread, (samples, weights) in sorted(by_thread.items())
+            ],
+        }
+
+    def save(self, label, fmt=None):
+        """Сохраняет профиль и возвращает имя файла"""
+        config = get_config()
+        fmt = fmt if fmt in FORMATS else config["FORMAT"]
+        slug = re.sub(r"[^\w-]+", "-", label).strip("-")[:60] or "profile"
+        name = f"{self.started_at:%Y%m%d-%H%M%S-%f}-{slug}{FORMATS[fmt]}"
+        if fmt == "collapsed":
+            data = self.collapsed()
+        else:
+            data = json.dumps(self.speedscope(label), separators=(",", ":"))
+        directory = config["DIR"]
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp, directory / name)
+        _prune(directory, config["KEEP"])
+        return name
+
+
+def _prune(directory, keep):
+    profiles = sorted(list_profiles(directory), reverse=True)
+    for name in profiles[keep:]:
+        (directory / name).unlink(missing_ok=True)
+
+
+def list_profiles(directory=None):
+    directory = directory or get_config()["DIR"]
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path.name for path in directory.iterdir() if path.name.endswith(tuple(FORMATS.values()))
+    )
+
+
+# --- Окно по всем потокам -------------------------------------------------
+
+
+def start_window(seconds, fmt=None):
+    """Запускает профилирование всех потоков; None, если окно уже идёт"""
+    global _window
+    config = get_config()
+    seconds = max(0.1, min(float(seconds), config["MAX_WINDOW"]))
+    with _window_lock:
+        if _window is not None:
+            return None
+        sampler = _window = Sampler(interval_ms=config["INTERVAL_MS"])
+    sampler.start()
+
+    def finish():
+        global _window
+        time.sleep(seconds)
+        try:
+            sampler.stop().save(f"window-{seconds:g}s", fmt)
+        finally:
+            with _window_lock:
+                _window = None
+
+    threading.Thread(target=finish, name="wayzen-profiler-window", daemon=True).start()
+    return sampler, seconds
+
+
+def active_window():
+    return _window
+
+
+# --- Middleware и API -----------------------------------------------------
+
+
+def _is_staff(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    # API аутентифицируется JWT на уровне DRF, здесь — вручную
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return bool(result and result[0].is_staff)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        fmt = request.META.get("HTTP_X_PROFILE")
+        if not fmt or not _is_staff(request):
+            return self.get_response(request)
+
+        config = get_config()
+        sampler = Sampler({threading.get_ident()}, config["INTERVAL_MS"])
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        # Тело StreamingHttpResponse читается позже и в профиль не попадает
+        name = sampler.save(f"{request.method} {request.path}", fmt)
+        response["X-Profile"] = name
+        add_server_timing(response, f'profile;dur={sampler.elapsed * 1000:.2f};desc="{name}"')
+        return response
+
+
+@api_view(["GET", "POST"])
+@permission_classes([permissions.IsAdminUser])
+def profiles(request):
+    """
+    GET — сохранённые профили и текущее окно.
+    POST {"seconds": 10, "format": "speedscope"} — профилировать все потоки.
+    Окно покрывает только процесс, принявший POST: при нескольких воркерах
+    запросы к другим процессам в профиль не попадут, а GET в другом
+    воркере не увидит идущее окно.
+    """
+    if request.method == "POST":
+        try:
+            seconds = float(request.data.get("seconds", 10))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "seconds must be a number"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        started = start_window(seconds, request.data.get("format"))
+        if started is None:
+            return Response(
+                {"detail": "profiling window already running"}, status=status.HTTP_409_CONFLICT
+            )
+        return Response({"seconds": started[1]}, status=status.HTTP_202_ACCEPTED)
+
+    window = active_window()
+    return Response(
+        {
+            "window": window and {"started_at": window.started_at.isoformat()},
+            "profiles": list_profiles()[::-1],
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def profile_file(request, name):
+    path = get_config()["DIR"] / name
+    if not _NAME_RE.match(name) or not path.is_file():
+        raise Http404
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=name)
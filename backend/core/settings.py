@@ -34,18 +34,20 @@ THIRD_APPS = [
     "corsheaders",
 ]
 
-LOCAL_APPS = ["apps.accounts", "apps.places", "apps.guide", "apps.tours"]
+LOCAL_APPS = ["apps.accounts", "apps.places", "apps.guide", "apps.tours", "apps.sync"]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_APPS + LOCAL_APPS
 
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "core.instrumentation.SQLInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -93,6 +95,42 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+# Кэш сериализованных мест: "locmem" (LRU в процессе) или "django"
+PLACE_PAYLOAD_CACHE = {
+    "BACKEND": config("PLACE_PAYLOAD_CACHE_BACKEND", default="locmem"),
+    "ALIAS": "place_payloads",
+    "MAX_ENTRIES": 10000,
+}
+if PLACE_PAYLOAD_CACHE["BACKEND"] == "django":
+    # Общий для воркеров кэш. Объявляется только когда нужен: Django создаёт
+    # каталог FileBasedCache при открытии, в том числе при запуске тестов
+    CACHES["place_payloads"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "place_payloads",
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    }
+
+# Дисковый кэш бинарных тайлов мест (apps/places/tiles.py)
+PLACE_TILE_CACHE_DIR = BASE_DIR / "cache" / "tiles"
+PLACE_TILE_CACHE_MAX_FILES = 20000
+
+# Офлайн-пакет каталога и кэш его частей (apps/sync/bundle.py)
+OFFLINE_BUNDLE_DIR = BASE_DIR / "cache" / "bundle"
+
+# Буфер счётчиков популярности (apps/places/popularity.py): сброс в БД
+# раз в FLUSH_INTERVAL секунд или при FLUSH_SIZE объектах в буфере
+POPULARITY = {
+    "FLUSH_INTERVAL": 10,
+    "FLUSH_SIZE": 1000,
+}
+
+
 LANGUAGE_CODE = "ru"
 TIME_ZONE = "Asia/Tashkent"
 USE_I18N = True
@@ -101,6 +139,33 @@ USE_TZ = True
 STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# Учёт SQL по запросам (core/instrumentation.py): Server-Timing, лог
+# "wayzen.sql" и поиск N+1. Тесты, которым нужен каждый запрос или ошибка
+# на N+1, включают это через override_settings
+SQL_INSTRUMENTATION = {
+    "SAMPLE_RATE": config("SQL_SAMPLE_RATE", default=0.05, cast=float),
+    "DUPLICATE_THRESHOLD": 10,
+    "ON_DUPLICATES": config("SQL_ON_DUPLICATES", default="log"),
+}
+
+# Профилировщик для сотрудников (core/profiling.py): заголовок X-Profile
+# или окно POST /api/profiling/
+PROFILING = {
+    "DIR": BASE_DIR / "cache" / "profiles",
+    "INTERVAL_MS": 5,
+    "MAX_WINDOW": 60,
+    "FORMAT": "speedscope",
+    "KEEP": 50,
+}
+
+# Уменьшенные копии изображений мест и туров (apps/places/images.py)
+IMAGE_PIPELINE = {
+    "WIDTHS": (320, 640, 1280),
+    "FORMATS": ("webp", "jpeg"),
+    "QUALITY": 80,
+    "WORKERS": 2,  # потоков фоновой обработки на процесс
+}
 STATIC_ROOT = BASE_DIR / "static"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
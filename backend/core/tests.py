@@ -0,0 +1,205 @@
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import JsonResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+from rest_framework.response import Response
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import benchmarks, profiling
+from .instrumentation import NPlusOneError, normalize
+
+
+def group_counts(request):
+    # count() на каждого пользователя — типичный N+1
+    users = get_user_model().objects.order_by("id")
+    return JsonResponse({"counts": [user.groups.count() for user in users]})
+
+
+urlpatterns = [path("counts/", group_counts)]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    SQL_INSTRUMENTATION={"SAMPLE_RATE": 1.0, "ON_DUPLICATES": "raise"},
+)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        for i in range(12):
+            get_user_model().objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com", password="x"
+            )
+
+    def test_n_plus_one_raises(self):
+        with self.assertRaises(NPlusOneError):
+            self.client.get("/counts/")
+
+    def test_below_threshold_reports_server_timing(self):
+        get_user_model().objects.exclude(username__in=["user0", "user1", "user2"]).delete()
+        response = self.client.get("/counts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('desc="4 queries"', response["Server-Timing"])
+
+    @override_settings(SQL_INSTRUMENTATION={"SAMPLE_RATE": 1.0, "ON_DUPLICATES": "log"})
+    def test_log_mode_does_not_raise(self):
+        with self.assertLogs("wayzen.sql", "WARNING"):
+            response = self.client.get("/counts/")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SQL_INSTRUMENTATION={"SAMPLE_RATE": 0.0, "ON_DUPLICATES": "raise"})
+    def test_unsampled_request_is_not_instrumented(self):
+        response = self.client.get("/counts/")
+        self.assertNotIn("Server-Timing", response)
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE id IN (%s, %s, %s) AND x = 'a' LIMIT 21"),
+            normalize("SELECT * FROM t WHERE id IN (%s) AND x = 'b' LIMIT 5"),
+        )
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        override = override_settings(PROFILING={"DIR": self.dir.name, "INTERVAL_MS": 1})
+        override.enable()
+        self.addCleanup(override.disable)
+        staff = get_user_model().objects.create_user(
+            username="staff", email="staff@example.com", password="x", is_staff=True
+        )
+        token = RefreshToken.for_user(staff).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def _slow_list(self, request, *args, **kwargs):
+        time.sleep(0.05)
+        return Response([])
+
+    def test_header_profiles_request_for_staff_only(self):
+        response = self.client.get("/api/places/places/", HTTP_X_PROFILE="collapsed")
+        self.assertNotIn("X-Profile", response)
+
+        with mock.patch("apps.places.views.PlaceViewSet.list", self._slow_list):
+            response = self.client.get(
+                "/api/places/places/", HTTP_X_PROFILE="collapsed", **self.auth
+            )
+        name = response["X-Profile"]
+        self.assertTrue(name.endswith(".collapsed.txt"))
+        self.assertIn(name, profiling.list_profiles())
+        download = self.client.get(f"/api/profiling/{name}", **self.auth)
+        self.assertIn(b"_slow_list", b"".join(download.streaming_content))
+
+    def test_window_requires_staff(self):
+        self.assertEqual(self.client.post("/api/profiling/", {"seconds": 1}).status_code, 401)
+        self.assertEqual(self.client.get("/api/profiling/", **self.auth).status_code, 200)
+
+    def test_window_is_saved(self):
+        response = self.client.post(
+            "/api/profiling/", {"seconds": 0.2, "format": "collapsed"}, **self.auth
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["seconds"], 0.2)
+        response = self.client.post("/api/profiling/", {"seconds": 0.2}, **self.auth)
+        self.assertEqual(response.status_code, 409)
+
+        deadline = time.monotonic() + 5
+        while profiling.active_window() is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIsNone(profiling.active_window())
+
+        profiles = self.client.get("/api/profiling/", **self.auth).json()
+        self.assertIsNone(profiles["window"])
+        self.assertEqual(len(profiles["profiles"]), 1)
+        name = profiles["profiles"][0]
+        self.assertTrue(name.endswith("-window-0-2s.collapsed.txt"))
+        # Окно снимает все потоки процесса, включая поток теста
+        download = self.client.get(f"/api/profiling/{name}", **self.auth)
+        self.assertIn(b"test_window_is_saved", b"".join(download.streaming_content))
+
+
+class BenchmarkCompareTests(TestCase):
+    def result(self, p50=10.0, p95=20.0, queries=3, peak_kb=100.0):
+        return {
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p95,
+            "queries": queries,
+            "peak_kb": peak_kb,
+        }
+
+    def run_compare(self, **current):
+        baseline = {"scenarios": {"places_list": self.result()}}
+        results = {"scenarios": {"places_list": self.result(**current)}}
+        return benchmarks.compare(results, baseline, threshold=0.3)
+
+    def write(self, content):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        self.addCleanup(os.unlink, path)
+        return path
+
+    def test_regression_over_threshold(self):
+        self.assertEqual(
+            self.run_compare(p50=14.0, queries=4, peak_kb=131.0),
+            [
+                ("places_list", "p50_ms", 10.0, 14.0),
+                ("places_list", "queries", 3, 4),
+                ("places_list", "peak_kb", 100.0, 131.0),
+            ],
+        )
+
+    def test_within_tolerance(self):
+        self.assertEqual(self.run_compare(p50=12.9, p95=25.9, queries=2, peak_kb=129.0), [])
+        # Больше порога в процентах, но в пределах шума по времени
+        baseline = {"scenarios": {"tiny": self.result(p50=1.0, p95=1.0)}}
+        results = {"scenarios": {"tiny": self.result(p50=2.5, p95=2.5)}}
+        self.assertEqual(benchmarks.compare(results, baseline), [])
+
+    def test_unknown_scenario_is_skipped(self):
+        baseline = {"scenarios": {}}
+        results = {"scenarios": {"places_list": self.result()}}
+        self.assertEqual(benchmarks.compare(results, baseline), [])
+
+    def test_missing_or_corrupt_baseline(self):
+        missing = os.path.join(tempfile.gettempdir(), "wayzen-no-such-baseline.json")
+        for path in (
+            missing,
+            self.write("{not json"),
+            self.write("[]"),
+            self.write(json.dumps({"scenarios": {"places_list": {"p50_ms": 1}}})),
+        ):
+            with self.assertRaises(benchmarks.BenchmarkError):
+                benchmarks.load_baseline(path)
+            # Команда падает сразу, не запуская сценарии
+            with mock.patch(
+                "apps.places.management.commands.bench_api.Command._run"
+            ) as run, self.assertRaises(CommandError):
+                call_command("bench_api", baseline=path, stdout=io.StringIO())
+            run.assert_not_called()
+
+    def test_command_fails_on_regression(self):
+        baseline = self.write(json.dumps({"scenarios": {"places_list": self.result()}}))
+        with mock.patch(
+            "apps.places.management.commands.bench_api.Command._run",
+            return_value={"scenarios": {"places_list": self.result(queries=5)}},
+        ), self.assertRaisesMessage(CommandError, "1 regression(s)"):
+            call_command(
+                "bench_api", baseline=baseline, stdout=io.StringIO(), stderr=io.StringIO()
+            )
+
+        with mock.patch(
+            "apps.places.management.commands.bench_api.Command._run",
+            return_value={"scenarios": {"places_list": self.result(p50=11.0)}},
+        ):
+            out = io.StringIO()
+            call_command("bench_api", baseline=baseline, stdout=out)
+        self.assertIn("No regressions", out.getvalue())
@@ -3,8 +3,15 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core import profiling
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/auth/", include("apps.accounts.urls")),
     path("api/places/", include('apps.places.urls')),
+    path("api/tours/", include("apps.tours.urls")),
+    path("api/sync/", include("apps.sync.urls")),
+    path("api/guide/", include("apps.guide.urls")),
+    path("api/profiling/", profiling.profiles, name="profiling"),
+    path("api/profiling/<str:name>", profiling.profile_file, name="profiling-file"),
 ]